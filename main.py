@@ -3,15 +3,32 @@
 Gather statistics about all IPs in your route to a destination
 """
 
-import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
+import time
 import yaml
 
-from src.classes.mtr import MTR
+from src.classes.atomic_file import AtomicFile
+from src.classes.columnar_export import ColumnarExport
+from src.classes.cycle_result import CycleResult
+from src.classes.history_store import HistoryStore
+from src.classes.hop_sketches import HopSketches
+from src.classes.metrics_server import MetricsServer
 from src.classes.parseargs import ParseArgs
+from src.classes.probe_backend import ProbeBackend
+from src.classes.probe_engine import ProbeEngine
+from src.classes.prom_renderer import PromRenderer
 from src.classes.promfile import PromFile
+from src.classes.pushgateway import Pushgateway
+from src.classes.remote_write import RemoteWrite
+from src.classes.ring_buffer import RingBuffer
+from src.classes.series_limiter import SeriesLimiter
+from src.classes.target_state import TargetState
+from src.classes.trace import Trace
+from src.classes.trace_accumulator import TraceAccumulator
 from src.classes.which import Which
+from src.classes.write_request import WriteRequest
 from src.constants import constants
 
 
@@ -21,48 +38,225 @@ def main() -> int:
     parseargs = ParseArgs(args)
     config_file = get_config_file(parseargs)
     config = read_config_file(config_file)
+    try:
+        history = HistoryStore(config)
+        ColumnarExport(config)
+
+    except ValueError as e:
+        print(e)
+        return -1
+
+    if parseargs.command == 'query':
+        return query(history, parseargs)
+
     result = prometheus_setup(config)
     if not result:
         return -1
 
-    mtr_binary = find_mtr()
-    if not mtr_binary:
-        print('ERROR: Unable to locate the mtr binary in your path!')
+    try:
+        engine = ProbeEngine(config)
+
+    except KeyError as e:
+        print(e)
+        return -1
+
+    except ValueError as e:
+        print(e)
         return -1
 
+    mtr_binary = find_mtr()
     try:
-        ips = config['mtr']['ips']
+        backend = engine.create_backend(config, mtr_binary)
 
     except KeyError as e:
         print(e)
         return -1
 
-    traces = []
-    with concurrent.futures.ThreadPoolExecutor(
-            max_workers=len(ips)) as executor:
-        future_to_ip = {
-            executor.submit(
-                run_mtr,
-                mtr_binary,
-                ip): ip for ip in ips}
-        for future in concurrent.futures.as_completed(future_to_ip):
-            data = future.result()
-            traces.append(data)
-
-    combined_traces = combine_traces(traces)
-    averaged_traces = average_traces(combined_traces)
-
-    result = write_prometheus_file(config, averaged_traces)
-    if not result:
+    except ValueError as e:
+        print(e)
+        return -1
+
+    if not backend:
+        if not mtr_binary:
+            print('ERROR: Unable to locate the mtr binary in your path!')
         return -1
 
-    result = move_prometheus_file(config)
+    if parseargs.serve:
+        return serve(config, engine, backend)
+
+    cycle = probe_cycle(config, engine, backend)
+    result = write_prometheus_file(config, cycle)
+    if config.get('remote_write'):
+        result = push_remote_write(config, cycle) and result
+    if config.get('pushgateway'):
+        result = push_pushgateway(config, cycle) and result
     if not result:
         return -1
 
     return 0
 
 
+def probe_cycle(config: dict, engine: ProbeEngine,
+                backend: ProbeBackend) -> CycleResult:
+    """
+    Trace every IP once and merge the results
+
+    :param config: The current configuration
+    :type config: dict
+    :param engine: The ProbeEngine that runs the traces
+    :type engine: ProbeEngine
+    :param backend: The probe backend from create_backend()
+    :type backend: ProbeBackend
+    :return: Everything the cycle produced, as accepted by
+    write_prometheus_file()
+    :rtype: CycleResult
+    """
+    promfile = PromFile(config)
+    accumulator = TraceAccumulator()
+    sketches = load_sketches(config)
+    limiter = create_limiter(config)
+    history = HistoryStore(config)
+    export = ColumnarExport(config)
+    traces = []
+    shard_traces = {}
+    timestamps = {}
+    rows = []
+
+    def on_result(ip: str, trace: Trace) -> None:
+        now = time.time()
+        traces.append(trace)
+        timestamps.update(dict.fromkeys(trace, now))
+        if history.enabled:
+            rows.extend(HistoryStore.rows(now, ip, trace))
+        if export.enabled:
+            export.add(now, ip, trace)
+        if promfile.sharded:
+            shard_traces.setdefault(promfile.shard_of(ip), []).append(trace)
+        if sketches is not None:
+            sketches.add(trace)
+        if limiter is not None:
+            limiter.add(trace)
+
+    engine.run(backend, on_result)
+    # Merged in one batch, which is vectorized when NumPy is installed
+    accumulator.add_many(traces)
+    if history.enabled:
+        with history:
+            if history.connection is not None:
+                history.insert(rows, time.time())
+    if export.enabled:
+        export.write(time.time())
+    result = CycleResult(
+        accumulator.to_trace(1), target_status(engine), sketches,
+        timestamps=timestamps, completed=dict(engine.completed))
+    if sketches is not None:
+        sketches.save()
+    result.windows = rolling_windows(config, accumulator)
+
+    if promfile.sharded:
+        # Every shard with a target probed this cycle, even if its traces
+        # failed, so the status of its targets is written
+        result.shards = {}
+        for target, status in result.targets.items():
+            shard = promfile.shard_of(target)
+            if shard not in result.shards:
+                merged = None
+                if shard in shard_traces:
+                    shard_accumulator = TraceAccumulator()
+                    shard_accumulator.add_many(shard_traces[shard])
+                    merged = shard_accumulator.to_trace(1)
+                result.shards[shard] = CycleResult(
+                    merged, timestamps=timestamps,
+                    completed=result.completed)
+            result.shards[shard].targets[target] = status
+
+    limit_series(config, limiter, result)
+    return result
+
+
+def serve(config: dict, engine: ProbeEngine, backend: ProbeBackend) -> int:
+    """
+    Run as an exporter: probe every interval seconds and serve the metrics
+    of the last cycle over HTTP until interrupted
+
+    :param config: The current configuration
+    :type config: dict
+    :param engine: The ProbeEngine that runs the traces
+    :type engine: ProbeEngine
+    :param backend: The probe backend from create_backend()
+    :type backend: ProbeBackend
+    :return: 0 once interrupted, -1 if the server could not start
+    :rtype: int
+    """
+    try:
+        server = MetricsServer(config)
+
+    except ValueError as e:
+        print(e)
+        return -1
+
+    if not server.start():
+        return -1
+
+    promfile = PromFile(config)
+    renderer = PromRenderer()
+    try:
+        while True:
+            started = time.monotonic()
+            # Everything is served at once, so shards do not apply
+            result = probe_cycle(config, engine, backend)
+            server.update(
+                render_prometheus(config, result, renderer=renderer),
+                promfile.format)
+            elapsed = time.monotonic() - started
+            time.sleep(max(server.interval - elapsed, 0))
+
+    except KeyboardInterrupt:
+        return 0
+
+    finally:
+        server.stop()
+
+
+def query(history: HistoryStore, parseargs: ParseArgs) -> int:
+    """
+    Print the loss and latency of every hop over a window of the history
+    store, lossiest first
+
+    :param history: The history store
+    :type history: HistoryStore
+    :param parseargs: The reference to the current ParseArgs class
+    :type parseargs: ParseArgs
+    :return: 0 if the history could be read, -1 if not
+    :rtype: int
+    """
+    if not os.path.exists(history.filename):
+        print(f'{history.filename} does not exist, enable the history '
+              'section to record runs!')
+        return -1
+
+    with history:
+        if history.connection is None:
+            return -1
+        hops = history.aggregate(
+            time.time() - parseargs.window, hop=parseargs.hop,
+            target=parseargs.target)
+
+    print(f'{"hop":<16} {"runs":>6} {"sent":>8} {"loss%":>7} '
+          f'{"avg":>8} {"best":>8} {"worst":>8}  last seen')
+    for hop in hops:
+        values = [
+            '-' if hop[name] is None else f'{hop[name]:.1f}'
+            for name in ('loss', 'average', 'best', 'worst')
+        ]
+        last_seen = time.strftime(
+            '%Y-%m-%d %H:%M:%S', time.localtime(hop['last_seen']))
+        print(f'{hop["hop_ip"]:<16} {hop["runs"]:>6} {hop["sent"]:>8} '
+              f'{values[0]:>7} {values[1]:>8} {values[2]:>8} '
+              f'{values[3]:>8}  {last_seen}')
+    return 0
+
+
 def get_config_file(parseargs: ParseArgs) -> str:
     """
     Find the config_file and set it
@@ -106,14 +300,11 @@ def prometheus_setup(config: dict) -> bool:
     try:
         promfile = PromFile(config)
 
+        # The file is written through a temporary file next to it
         result = promfile.create_filepath()
         if not result:
             return False
 
-        result = promfile.create_temp_filepath()
-        if not result:
-            return False
-
         return True
 
     except KeyError as e:
@@ -140,136 +331,541 @@ def find_mtr() -> str:
     return which.command
 
 
-def run_mtr(mtr_binary: str, ip: str) -> dict:
+def load_sketches(config: dict) -> HopSketches:
     """
-    Using the MTR() class, run a traceroute to the given IP Address using the
-    given mtr binary and return the formatted trace
+    Load the round-trip time sketches of every hop from earlier runs, if the
+    histogram is enabled
 
-    :param mtr_binary: The full filepath to the mtr binary
-    :type mtr_binary: str
-    :param ip: The IPv4 Address to provide to the mtr binary
-    :type ip: str
-    :return: The trace dictionary if the trace was successful,
-    an empty dictionary if the trace failed
-    :rtype: dict
+    :param config: The current configuration
+    :type config: dict
+    :return: The sketches, or None if the histogram is disabled
+    :rtype: HopSketches
     """
-    mtr = MTR(mtr_binary)
-    mtr.ip = ip
-    result = mtr.run_mtr()
-    if not result:
-        return {}
-
-    result = mtr.parse_mtr_stdout()
-    if not result:
-        return {}
+    promfile = PromFile(config)
+    if not promfile.histogram:
+        return None
+    sketches = HopSketches(
+        constants.HOP_SKETCHES_FILE, constants.HOP_SKETCHES_MAX_AGE,
+        constants.HOP_SKETCHES_RELATIVE_ACCURACY,
+        constants.HOP_SKETCHES_MAX_BINS, promfile.max_idle_runs)
+    sketches.load()
+    sketches.start_run()
+    return sketches
+
+
+def create_limiter(config: dict) -> SeriesLimiter:
+    """
+    Create the limiter of the series written per run, if top_hops or
+    max_series is set
 
-    return mtr.trace
+    :param config: The current configuration
+    :type config: dict
+    :return: The limiter, or None if neither limit is set
+    :rtype: SeriesLimiter
+    """
+    promfile = PromFile(config)
+    if not promfile.top_hops and not promfile.max_series:
+        return None
+    return SeriesLimiter(
+        promfile.top_hops, promfile.top_hops_by, promfile.max_series)
 
 
-def combine_traces(traces: list) -> dict:
+def limit_series(config: dict, limiter: SeriesLimiter,
+                 result: CycleResult) -> None:
     """
-    Take in a list of dicts, where the list represents all traces, and each
-    item in the list is a trace represented in dictionary format.
-    Return a dictionary where each key represents a unique IP and
-    contains all values from all traces against that IP
+    Drop the hops the limiter did not select from every series written per
+    hop, and record the number of series dropped
 
-    :param traces: The list of traces
-    :type traces: list
-    :return: A dictionary containing each combined trace
-    :rtype: dict
+    :param config: The current configuration
+    :type config: dict
+    :param limiter: The limiter every trace was added to, or None
+    :type limiter: SeriesLimiter
+    :param result: The results of the cycle, changed in place
+    :type result: CycleResult
+    :return: None
+    :rtype: None
     """
-    combined_traces = {}
-    for trace in traces:
-        for ip_addr, values in trace.items():
-            if ip_addr not in combined_traces:
-                combined_traces.update({ip_addr: {}})
+    if limiter is None:
+        return
 
-            for key, value in values.items():
-                try:
-                    combined_traces[ip_addr][key].append(value)
-                except KeyError:
-                    combined_traces[ip_addr][key] = [value]
+    promfile = PromFile(config)
+    if result.shards is None:
+        costs = dict.fromkeys(result.traces, len(Trace.STATS))
+    else:
+        # A hop is written once for every shard it was seen in
+        costs = {}
+        for shard in result.shards.values():
+            for ip in shard.traces:
+                costs[ip] = costs.get(ip, 0) + len(Trace.STATS)
+    if result.sketches is not None:
+        # Every bucket, +Inf, _sum and _count
+        per_hop = len(promfile.histogram_buckets) + 3
+        for ip in result.sketches.sketches:
+            costs[ip] = costs.get(ip, 0) + per_hop
+    for hops in (result.windows or {}).values():
+        for ip, stats in hops.items():
+            costs[ip] = costs.get(ip, 0) + len(stats)
+    fixed = sum(len(objs) for objs in result.targets.values())
+    fixed += len(limiter.dropped)
+    selected = limiter.select(result.traces, costs, fixed)
+
+    result.traces = result.traces.subset(
+        ip for ip in result.traces if ip in selected)
+    if result.sketches is not None:
+        result.sketches = result.sketches.subset(
+            ip for ip in result.sketches.sketches if ip in selected)
+    if result.windows is not None:
+        result.windows = {
+            window: {
+                ip: stats for ip, stats in hops.items() if ip in selected
+            }
+            for window, hops in result.windows.items()
+        }
+    for shard in (result.shards or {}).values():
+        shard.traces = shard.traces.subset(
+            ip for ip in shard.traces if ip in selected)
+    result.dropped = limiter.dropped
+
+
+def rolling_windows(config: dict, accumulator: TraceAccumulator) -> dict:
+    """
+    Store this run in the ring buffer and merge the runs inside every
+    rolling window, if the rolling windows are enabled
 
-    return combined_traces
+    :param config: The current configuration
+    :type config: dict
+    :param accumulator: The merged statistics of this run
+    :type accumulator: TraceAccumulator
+    :return: The loss and average round-trip time of every hop keyed by
+    window, or None if the rolling windows are disabled or the ring buffer
+    could not be opened
+    :rtype: dict
+    """
+    promfile = PromFile(config)
+    if not promfile.rolling:
+        return None
+    ring = RingBuffer(
+        constants.RING_BUFFER_FILE, constants.RING_BUFFER_RUNS,
+        constants.RING_BUFFER_MAX_HOPS)
+    if not ring.open():
+        return None
+    try:
+        now = time.time()
+        ring.append(
+            now, accumulator.ips, accumulator.sent, accumulator.received,
+            accumulator.mean)
+        return {
+            window: ring.window(seconds, now)
+            for window, seconds in constants.ROLLING_WINDOWS.items()
+        }
+    finally:
+        ring.close()
+
+
+def target_status(engine: ProbeEngine) -> dict:
+    """
+    Build the per-target status series from the outcome of the last run,
+    carrying the last successful trace time over from earlier runs for
+    targets that did not finish
 
+    :param engine: The ProbeEngine that ran the traces
+    :type engine: ProbeEngine
+    :return: A dictionary of status values keyed by target IP Address
+    :rtype: dict
+    """
+    state = TargetState(constants.TARGET_STATE_FILE)
+    state.load()
+    for ip, timestamp in engine.completed.items():
+        state.record_success(ip, timestamp)
+    state.save()
+
+    targets = {}
+    for ip in engine.ips:
+        status = {'timed_out': int(ip in engine.timed_out)}
+        if ip in state.last_success:
+            status['last_success_timestamp'] = state.last_success[ip]
+        targets[ip] = status
+    return targets
+
+
+def render_prometheus(config: dict, result: CycleResult,
+                      shard: str = None,
+                      renderer: PromRenderer = None) -> bytes:
+    """
+    Render the results of a cycle in the Prometheus text format, or in the
+    OpenMetrics format if the format key says so
 
-def average_traces(traces: dict) -> dict:
+    :param config: The current configuration
+    :type config: dict
+    :param result: The results of the cycle
+    :type result: CycleResult
+    :param shard: The shard the results belong to, added as a label to
+    every hop so a hop seen in several shards stays unique
+    :type shard: str
+    :param renderer: A renderer kept from earlier cycles, so the series it
+    has already encoded are reused
+    :type renderer: PromRenderer
+    :return: The metrics, one series per line
+    :rtype: bytes
     """
-    Iterate over each trace, represented by a dictionary, and average out
-    all values
+    promfile = PromFile(config)
+    if renderer is None:
+        renderer = PromRenderer()
+    if promfile.format == 'openmetrics':
+        return render_openmetrics(config, result, shard, renderer)
+    renderer.begin()
+    add = renderer.add
+
+    shard_label = '' if shard is None else f', shard="{shard}"'
+    columns = [getattr(result.traces, name) for name in Trace.STATS]
+    for ip_addr, values in zip(result.traces, zip(*columns)):
+        add(('ping_stats', ip_addr, shard), values, (
+            f'ping_stats{{ip_addr="{ip_addr}", stat="{name}"{shard_label}}}'
+            for name in Trace.STATS))
+
+    for target, objs in result.targets.items():
+        add(('ping_stats_target', target, *objs), tuple(objs.values()), (
+            f'ping_stats_target{{target="{target}", stat="{name}"}}'
+            for name in objs))
+
+    if result.sketches is not None:
+        bounds = promfile.histogram_buckets
+        for ip_addr, sketch in result.sketches.sketches.items():
+            labels = f'ip_addr="{ip_addr}"'
+            add(('ping_stats_rtt_ms', ip_addr), (
+                *(sketch.count_le(bound) for bound in bounds),
+                sketch.count, sketch.sum, sketch.count), (
+                *(f'ping_stats_rtt_ms_bucket{{{labels}, le="{bound}"}}'
+                  for bound in (*bounds, '+Inf')),
+                f'ping_stats_rtt_ms_sum{{{labels}}}',
+                f'ping_stats_rtt_ms_count{{{labels}}}'))
+
+    for window, hops in (result.windows or {}).items():
+        for ip_addr, stats in hops.items():
+            labels = f'ip_addr="{ip_addr}", window="{window}"'
+            add(('ping_stats_window', window, ip_addr, *stats),
+                tuple(stats.values()), (
+                    f'ping_stats_window{{{labels}, stat="{name}"}}'
+                    for name in stats))
+
+    if result.dropped is not None:
+        dropped = result.dropped
+        add(('ping_stats_dropped_series', *dropped), tuple(dropped.values()), (
+            f'ping_stats_dropped_series{{reason="{reason}"}}'
+            for reason in dropped))
+
+    return renderer.finish()
+
+
+def render_openmetrics(config: dict, result: CycleResult, shard: str = None,
+                       renderer: PromRenderer = None) -> bytes:
+    """
+    Render the results of a cycle in the OpenMetrics format: one typed
+    family per statistic, each with HELP and TYPE metadata, samples
+    timestamped with when their hop was last seen or their target finished,
+    and a closing # EOF
 
-    :param traces: A dictionary of all traces
-    :type traces: dict
-    :return: A dictionary of all traces with averaged values
+    :param config: The current configuration
+    :type config: dict
+    :param result: The results of the cycle
+    :type result: CycleResult
+    :param shard: The shard the results belong to, added as a label to
+    every hop so a hop seen in several shards stays unique
+    :type shard: str
+    :param renderer: A renderer kept from earlier cycles, so the series it
+    has already encoded are reused
+    :type renderer: PromRenderer
+    :return: The metrics
+    :rtype: bytes
+    """
+    promfile = PromFile(config)
+    if renderer is None:
+        renderer = PromRenderer()
+    renderer.begin()
+    add = renderer.add
+
+    def family(name: str, kind: str, text: str) -> None:
+        renderer.comment(f'# HELP {name} {text}')
+        renderer.comment(f'# TYPE {name} {kind}')
+
+    shard_label = '' if shard is None else f', shard="{shard}"'
+    timestamps = result.timestamps
+    if result.traces:
+        for stat in Trace.STATS:
+            name, text = constants.OPENMETRICS_STATS[stat]
+            family(name, 'gauge', text)
+            column = getattr(result.traces, stat)
+            for ip_addr, value in zip(result.traces, column):
+                add((name, ip_addr, shard), (value,),
+                    (f'{name}{{ip_addr="{ip_addr}"{shard_label}}}',),
+                    timestamps.get(ip_addr))
+
+    if result.targets:
+        for stat, (name, text) in constants.OPENMETRICS_TARGET_STATS.items():
+            family(name, 'gauge', text)
+            for target, objs in result.targets.items():
+                if stat in objs:
+                    add((name, target), (objs[stat],),
+                        (f'{name}{{target="{target}"}}',),
+                        result.completed.get(target))
+
+    if result.sketches is not None:
+        name = 'ping_stats_rtt_ms'
+        family(name, 'histogram', 'Round-trip times of every hop, in ms')
+        bounds = promfile.histogram_buckets
+        for ip_addr, sketch in result.sketches.sketches.items():
+            labels = f'ip_addr="{ip_addr}"'
+            add((name, ip_addr), (
+                *(sketch.count_le(bound) for bound in bounds),
+                sketch.count, sketch.count, sketch.sum), (
+                *(f'{name}_bucket{{{labels}, le="{float(bound)}"}}'
+                  for bound in bounds),
+                f'{name}_bucket{{{labels}, le="+Inf"}}',
+                f'{name}_count{{{labels}}}',
+                f'{name}_sum{{{labels}}}'),
+                result.sketches.updated.get(ip_addr))
+
+    if result.windows is not None:
+        for stat, (name, text) in constants.OPENMETRICS_WINDOW_STATS.items():
+            family(name, 'gauge', text)
+            for window, hops in result.windows.items():
+                for ip_addr, stats in hops.items():
+                    add((name, window, ip_addr), (stats[stat],),
+                        (f'{name}{{ip_addr="{ip_addr}", '
+                         f'window="{window}"}}',))
+
+    if result.dropped is not None:
+        name = 'ping_stats_dropped_series'
+        family(name, 'gauge',
+               'Series not written because of the cardinality limits')
+        for reason, value in result.dropped.items():
+            add((name, reason), (value,), (f'{name}{{reason="{reason}"}}',))
+
+    renderer.comment('# EOF')
+    return renderer.finish()
+
+
+def split_shards(result: CycleResult) -> dict:
+    """
+    Split the results of a cycle into the groups written or pushed on
+    their own
+
+    :param result: The results of the cycle
+    :type result: CycleResult
+    :return: The results of every shard keyed by shard name, and under
+    None the results that are not per shard. Without shards, all of the
+    results are under None
     :rtype: dict
     """
-    for _, values in traces.items():
-        for key, value in values.items():
-            average = round(sum(value) / len(value), 1)
-            values[key] = average
-    return traces
+    if result.shards is None:
+        return {None: result}
+    # The main group keeps the series that are not per target
+    groups = {None: CycleResult(
+        sketches=result.sketches, windows=result.windows,
+        dropped=result.dropped)}
+    groups.update(result.shards)
+    return groups
 
 
-def write_prometheus_file(config: dict, traces: dict) -> bool:
+def write_prometheus_file(config: dict, result: CycleResult) -> bool:
     """
-    Write dicts to prometheus-formatted file for collection
+    Write the results of a cycle to prometheus-formatted files for
+    collection. Every file is replaced atomically, and left alone if its
+    content is unchanged. Once every file is written, the files of shards
+    that are no longer configured are removed
 
     :param config: The current configuration
     :type config: dict
-    :param traces: A dictionary of all traces
-    :type traces: dict
-    :return: True if temp file was successfully created and written to,
-    False if the file could not be created or opened for writing
+    :param result: The results of the cycle. With shards, the traces and
+    targets of every shard are written to the file of that shard instead
+    of the main file
+    :type result: CycleResult
+    :return: True if every file was written or already up to date, False
+    if any could not be written
     :rtype: bool
     """
     promfile = PromFile(config)
-    tempfile = os.path.join(promfile.temp_filepath, promfile.temp_filename)
+    files = {}
+    for shard, shard_result in split_shards(result).items():
+        if shard is None:
+            filename = os.path.join(promfile.filepath, promfile.filename)
+        else:
+            filename = promfile.shard_filename(shard)
+        files[filename] = (shard_result, shard)
+
+    def write(filename: str, args: tuple) -> None:
+        AtomicFile(filename).write(render_prometheus(config, *args))
+
+    succeeded = True
+    workers = min(len(files), constants.SHARD_WRITERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(write, filename, args)
+            for filename, args in files.items()
+        ]
+        for future in futures:
+            try:
+                future.result()
+
+            except OSError as e:
+                print(e)
+                succeeded = False
+
+    if succeeded:
+        # Shards dropped by a change of shards or shard_groups would
+        # otherwise be collected next to the new ones forever
+        for filename in promfile.shard_filenames():
+            if filename in files:
+                continue
+            try:
+                os.remove(filename)
+
+            except FileNotFoundError:
+                pass
+
+            except OSError as e:
+                print(e)
+
+    return succeeded
+
+
+def remote_write_requests(config: dict, result: CycleResult, labels: dict,
+                          batch_size: int) -> list:
+    """
+    Build the remote_write requests of a cycle, with the same series as
+    the Prometheus text format
 
-    lines = []
-    for ip_addr, objs in traces.items():
+    :param config: The current configuration
+    :type config: dict
+    :param result: The results of the cycle
+    :type result: CycleResult
+    :param labels: The labels added to every series
+    :type labels: dict
+    :param batch_size: The maximum number of series per request
+    :type batch_size: int
+    :return: The WriteRequests
+    :rtype: list
+    """
+    promfile = PromFile(config)
+    now = time.time()
+    requests = [WriteRequest()]
+
+    def add(name: str, series: dict, value: float,
+            timestamp: float = None) -> None:
+        if len(requests[-1]) >= batch_size:
+            requests.append(WriteRequest())
+        requests[-1].add(
+            name, {**labels, **series}, value, timestamp or now)
+
+    columns = [getattr(result.traces, name) for name in Trace.STATS]
+    for ip_addr, values in zip(result.traces, zip(*columns)):
+        timestamp = result.timestamps.get(ip_addr)
+        for name, value in zip(Trace.STATS, values):
+            add('ping_stats', {'ip_addr': ip_addr, 'stat': name}, value,
+                timestamp)
+
+    for target, objs in result.targets.items():
         for name, value in objs.items():
-            items = [
-                'ping_stats{ip_addr="', ip_addr, '", stat="', name,
-                '"} ', str(value)
-            ]
-            lines.append(''.join(items))
+            add('ping_stats_target', {'target': target, 'stat': name}, value,
+                result.completed.get(target))
+
+    if result.sketches is not None:
+        bounds = promfile.histogram_buckets
+        for ip_addr, sketch in result.sketches.sketches.items():
+            timestamp = result.sketches.updated.get(ip_addr)
+            for bound in bounds:
+                add('ping_stats_rtt_ms_bucket',
+                    {'ip_addr': ip_addr, 'le': str(bound)},
+                    sketch.count_le(bound), timestamp)
+            add('ping_stats_rtt_ms_bucket', {'ip_addr': ip_addr, 'le': '+Inf'},
+                sketch.count, timestamp)
+            add('ping_stats_rtt_ms_sum', {'ip_addr': ip_addr}, sketch.sum,
+                timestamp)
+            add('ping_stats_rtt_ms_count', {'ip_addr': ip_addr}, sketch.count,
+                timestamp)
+
+    for window, hops in (result.windows or {}).items():
+        for ip_addr, stats in hops.items():
+            for name, value in stats.items():
+                add('ping_stats_window',
+                    {'ip_addr': ip_addr, 'window': window, 'stat': name},
+                    value)
+
+    for reason, value in (result.dropped or {}).items():
+        add('ping_stats_dropped_series', {'reason': reason}, value)
+
+    return requests
+
+
+def push_remote_write(config: dict, result: CycleResult) -> bool:
+    """
+    Push the results of a cycle to the remote_write receiver, after any
+    requests spooled while it was down
 
+    :param config: The current configuration
+    :type config: dict
+    :param result: The results of the cycle. Shards do not apply, every
+    series is pushed once
+    :type result: CycleResult
+    :return: True if every request was pushed, False if any was spooled or
+    the remote_write section is invalid
+    :rtype: bool
+    """
     try:
-        with open(tempfile, 'w', encoding='utf-8') as file:
-            file.write('\n'.join(lines))
-            file.write('\n')
-        return True
+        remote = RemoteWrite(config)
 
-    except PermissionError as e:
+    except ValueError as e:
         print(e)
         return False
 
+    requests = remote_write_requests(
+        config, result, remote.labels, remote.batch_size)
+    try:
+        return remote.push(requests)
+
     except OSError as e:
         print(e)
         return False
 
+    finally:
+        remote.close()
+
 
-def move_prometheus_file(config: dict) -> bool:
+def push_pushgateway(config: dict, result: CycleResult) -> bool:
     """
-    Move the temp prometheus file to the primary location
+    PUT the results of a cycle to the Pushgateway, one group for the main
+    file and one for every shard, rendered as they are written to files
 
     :param config: The current configuration
     :type config: dict
-    :return: True if the temp file was successfully moved to the main file,
-    False if the temp file could not replace the main file
+    :param result: The results of the cycle
+    :type result: CycleResult
+    :return: True if every changed group was pushed, False if any was not
+    or the pushgateway section is invalid
     :rtype: bool
     """
-    promfile = PromFile(config)
-    tempfile = os.path.join(promfile.temp_filepath, promfile.temp_filename)
-    mainfile = os.path.join(promfile.filepath, promfile.filename)
-
     try:
-        os.replace(tempfile, mainfile)
-        return True
-    except OSError as e:
+        gateway = Pushgateway(config)
+
+    except ValueError as e:
         print(e)
         return False
 
+    # The Pushgateway rejects timestamps, so OpenMetrics is not pushed
+    config = {**config, 'prometheus': {
+        **config['prometheus'], 'format': 'prometheus'}}
+    groups = {
+        shard: render_prometheus(config, shard_result, shard)
+        for shard, shard_result in split_shards(result).items()
+    }
+    gateway.load()
+    try:
+        return gateway.push(groups)
+
+    finally:
+        gateway.save()
+        gateway.close()
+
 
 if __name__ == '__main__':
     RESULT = main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+AtomicFile() class file
+"""
+
+import hashlib
+import os
+import tempfile
+
+
+class AtomicFile:
+    """
+    Replace a file atomically, and only when its content changes.
+
+    The new content is written to a hidden temporary file in the same
+    directory as the file, flushed to disk with fsync() and renamed over the
+    file. Renaming within one directory never crosses filesystems, and
+    readers such as node_exporter only ever see the old or the new file.
+
+    A digest of the content last written, or of the file as found on the
+    first write, is kept so identical content is not written again. The
+    whole content is compared, timestamps included, so a file holding the
+    time of the last success of a target is replaced whenever it succeeds.
+    """
+
+    def __init__(self, filename: str, mode: int = 0o644) -> None:
+        self.filename = filename
+        self.mode = mode
+        self.digest = None
+
+    @staticmethod
+    def hash(data: bytes) -> bytes:
+        """
+        Return the digest of some content
+
+        :param data: The content
+        :type data: bytes
+        :return: The digest
+        :rtype: bytes
+        """
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def _current_digest(self) -> bytes:
+        """
+        Return the digest of the file, reading it on the first call
+
+        :return: The digest, or None if the file could not be read
+        :rtype: bytes
+        """
+        if self.digest is None:
+            try:
+                with open(self.filename, 'rb') as file:
+                    self.digest = self.hash(file.read())
+            except OSError:
+                return None
+        return self.digest
+
+    def write(self, data: bytes) -> bool:
+        """
+        Replace the file with new content, unless it already holds it
+
+        :param data: The new content
+        :type data: bytes
+        :raise OSError: If the file could not be written or replaced
+        :return: True if the file was replaced, False if it was unchanged
+        :rtype: bool
+        """
+        digest = self.hash(data)
+        if digest == self._current_digest():
+            return False
+
+        directory, name = os.path.split(self.filename)
+        fd, temp = tempfile.mkstemp(
+            prefix=f'.{name}.', suffix='.tmp', dir=directory or '.')
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fchmod(fd, self.mode)
+            os.fsync(fd)
+            os.close(fd)
+            fd = None
+            os.replace(temp, self.filename)
+
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            os.unlink(temp)
+            raise
+
+        # Make the rename itself durable
+        dir_fd = os.open(directory or '.', os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self.digest = digest
+        return True
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+ColumnarExport() class file
+"""
+
+from array import array
+import csv
+import gzip
+import os
+import shutil
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from src.classes.trace import Trace
+from src.constants import constants
+
+
+class ColumnarExport:
+    """
+    Export every hop of every trace to time-partitioned columnar files for
+    offline analysis, e.g. with pandas or DuckDB.
+
+    The hops of a run are collected column by column straight from the
+    traces, one row per target and hop, and staged in directory/.staging
+    under the partition of the run, such as date=2024-05-01. Once a
+    partition is over, or holds row_group_size rows, its staged runs are
+    compacted into one part file in its partition directory: Parquet with
+    row groups of row_group_size rows when pyarrow is installed, gzipped
+    CSV otherwise. Readers only ever see complete part files, e.g.
+    directory/date=2024-05-01/part-<ns>.parquet, and never the small
+    per-run files.
+    """
+
+    OPTIONAL_CONFIG_KEYS = [
+        'enabled', 'directory', 'partition', 'format', 'row_group_size'
+    ]
+
+    COLUMNS = [
+        'ts', 'target', 'hop', 'hop_ip', *Trace.STATS
+    ]
+
+    PARTITIONS = {
+        'day': 'date=%Y-%m-%d',
+        'hour': 'date=%Y-%m-%d/hour=%H'
+    }
+
+    def __init__(self, config: dict) -> None:
+        self.enabled = False
+        self.directory = constants.EXPORT_DIRECTORY
+        self.partition = constants.EXPORT_PARTITION
+        self.format = constants.EXPORT_FORMAT
+        self.row_group_size = constants.EXPORT_ROW_GROUP_SIZE
+        self.config = config
+        for key, value in self.config.items():
+            setattr(self, key, value)
+        self.clear()
+
+    @property
+    def config(self) -> dict:
+        """
+        config.getter
+
+        :return: A dictionary containing the export section of the current
+        configuration
+        :rtype: dict
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        """
+        config.setter
+
+        :param config: A configuration of the current program
+        :type config: dict
+        :raise ValueError: If an unknown key is present
+        :return: None
+        :rtype: None
+        """
+        self._config = {}
+        section = 'export'
+        # The whole section is optional
+        settings = config.get(section) or {}
+        for key in settings.keys():
+            if key not in self.OPTIONAL_CONFIG_KEYS:
+                raise ValueError(f'{key} key is invalid and must be removed!')
+        self._config = settings
+
+    @property
+    def enabled(self) -> bool:
+        """
+        enabled.getter
+
+        :return: True if every run is exported
+        :rtype: bool
+        """
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled) -> None:
+        """
+        enabled.setter
+
+        :param enabled: True to export every run
+        :type enabled: bool
+        :raise ValueError: If enabled is not a boolean
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(enabled, bool):
+            raise ValueError(f'{enabled} is not a boolean!')
+        self._enabled = enabled
+
+    @property
+    def directory(self) -> str:
+        """
+        directory.getter
+
+        :return: The directory the partitions are written to
+        :rtype: str
+        """
+        return self._directory
+
+    @directory.setter
+    def directory(self, directory) -> None:
+        """
+        directory.setter
+
+        :param directory: The directory to write the partitions to
+        :type directory: str
+        :raise ValueError: If directory is not a non-empty string
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(directory, str) or not directory:
+            raise ValueError(f'{directory} is not a non-empty string!')
+        self._directory = directory
+
+    @property
+    def partition(self) -> str:
+        """
+        partition.getter
+
+        :return: How the runs are partitioned, by 'day' or 'hour'
+        :rtype: str
+        """
+        return self._partition
+
+    @partition.setter
+    def partition(self, partition) -> None:
+        """
+        partition.setter
+
+        :param partition: 'day' or 'hour'
+        :type partition: str
+        :raise ValueError: If partition is not supported
+        :return: None
+        :rtype: None
+        """
+        if partition not in self.PARTITIONS:
+            raise ValueError(f'{partition} is not a valid partition!')
+        self._partition = partition
+
+    @property
+    def format(self) -> str:
+        """
+        format.getter
+
+        :return: The format of the part files, 'parquet' or 'csv'
+        :rtype: str
+        """
+        return self._format
+
+    @format.setter
+    def format(self, export_format) -> None:
+        """
+        format.setter
+
+        :param export_format: One of constants.EXPORT_FORMATS, 'auto' uses
+        Parquet when pyarrow is installed and CSV otherwise
+        :type export_format: str
+        :raise ValueError: If export_format is not supported, or is parquet
+        and pyarrow is not installed
+        :return: None
+        :rtype: None
+        """
+        if export_format not in constants.EXPORT_FORMATS:
+            raise ValueError(f'{export_format} is not a valid format!')
+        if export_format == 'auto':
+            export_format = 'csv' if pq is None else 'parquet'
+        if export_format == 'parquet' and pq is None:
+            raise ValueError('parquet needs pyarrow, which is not installed!')
+        self._format = export_format
+
+    @property
+    def row_group_size(self) -> int:
+        """
+        row_group_size.getter
+
+        :return: The number of rows a partition is compacted at, and the
+        size of the row groups of Parquet part files
+        :rtype: int
+        """
+        return self._row_group_size
+
+    @row_group_size.setter
+    def row_group_size(self, row_group_size) -> None:
+        """
+        row_group_size.setter
+
+        :param row_group_size: A positive number of rows
+        :type row_group_size: int
+        :raise ValueError: If row_group_size is not a positive integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(row_group_size, int) or
+                isinstance(row_group_size, bool) or row_group_size < 1):
+            raise ValueError(f'{row_group_size} is not a positive integer!')
+        self._row_group_size = row_group_size
+
+    def __len__(self) -> int:
+        return len(self.columns['ts'])
+
+    def clear(self) -> None:
+        """
+        Drop the hops collected since the last write
+
+        :return: None
+        :rtype: None
+        """
+        self.columns = {
+            'ts': array('d'), 'target': [], 'hop': array('i'), 'hop_ip': []
+        }
+        for name in Trace.STATS:
+            self.columns[name] = array('d')
+
+    def add(self, timestamp: float, target: str, trace: Trace) -> None:
+        """
+        Collect the hops of a completed trace
+
+        :param timestamp: The time the trace completed
+        :type timestamp: float
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :param trace: The completed trace
+        :type trace: Trace
+        :return: None
+        :rtype: None
+        """
+        hops = len(trace)
+        self.columns['ts'].extend([timestamp] * hops)
+        self.columns['target'].extend([target] * hops)
+        self.columns['hop'].extend(trace.ttl(row) for row in range(hops))
+        self.columns['hop_ip'].extend(trace)
+        for name in Trace.STATS:
+            self.columns[name].extend(getattr(trace, name))
+
+    def partition_of(self, timestamp: float) -> str:
+        """
+        Return the partition of a time, in UTC
+
+        :param timestamp: Seconds since the epoch
+        :type timestamp: float
+        :return: The path of the partition below directory
+        :rtype: str
+        """
+        return time.strftime(
+            self.PARTITIONS[self.partition], time.gmtime(timestamp))
+
+    def _staging(self, partition: str = None) -> str:
+        """
+        Return the staging directory of a partition
+
+        :param partition: The partition, None for the staging root
+        :type partition: str
+        :return: The directory
+        :rtype: str
+        """
+        staging = os.path.join(self.directory, '.staging')
+        if partition is None:
+            return staging
+        return os.path.join(staging, partition.replace('/', ','))
+
+    def write(self, now: float) -> bool:
+        """
+        Stage the hops collected in the partition of now, then compact the
+        partitions that are over or full
+
+        :param now: The time of the run
+        :type now: float
+        :return: True if the run was staged and every compaction succeeded,
+        False if not
+        :rtype: bool
+        """
+        current = self.partition_of(now)
+        try:
+            if len(self):
+                staging = self._staging(current)
+                os.makedirs(staging, mode=0o755, exist_ok=True)
+                self._stage(staging, time.time_ns())
+            self.clear()
+            if not os.path.isdir(self._staging()):
+                return True
+
+            for name in sorted(os.listdir(self._staging())):
+                partition = name.replace(',', '/')
+                staging = self._staging(partition)
+                if (partition != current or
+                        self._staged_rows(staging) >= self.row_group_size):
+                    self._compact(partition, staging)
+            return True
+
+        except OSError as e:
+            print(e)
+            return False
+
+    def _stage(self, staging: str, run: int) -> None:
+        """
+        Write the hops collected to the staging directory of a partition
+
+        :param staging: The staging directory
+        :type staging: str
+        :param run: A unique, increasing number for the run
+        :type run: int
+        :return: None
+        :rtype: None
+        """
+        if self.format == 'parquet':
+            filename = os.path.join(staging, f'run-{run}.parquet')
+            pq.write_table(self._table(), f'{filename}.tmp')
+            os.replace(f'{filename}.tmp', filename)
+            return
+        # Appended, as each run adds only a few rows
+        with open(os.path.join(staging, 'rows.csv'), 'a', newline='',
+                  encoding='utf-8') as file:
+            csv.writer(file).writerows(zip(*self.columns.values()))
+
+    def _table(self) -> 'pa.Table':
+        """
+        Build an Arrow table from the hops collected
+
+        :return: The table
+        :rtype: pa.Table
+        """
+        types = {'target': pa.string(), 'hop': pa.int32(),
+                 'hop_ip': pa.string()}
+        return pa.table({
+            name: pa.array(column, type=types.get(name, pa.float64()))
+            for name, column in self.columns.items()
+        })
+
+    def _staged_rows(self, staging: str) -> int:
+        """
+        Count the rows staged for a partition
+
+        :param staging: The staging directory
+        :type staging: str
+        :return: The number of rows
+        :rtype: int
+        """
+        rows = 0
+        for name in os.listdir(staging):
+            filename = os.path.join(staging, name)
+            if name.endswith('.parquet'):
+                rows += pq.ParquetFile(filename).metadata.num_rows
+            elif name == 'rows.csv':
+                with open(filename, 'rb') as file:
+                    for chunk in iter(lambda: file.read(1 << 20), b''):
+                        rows += chunk.count(b'\n')
+        return rows
+
+    def _compact(self, partition: str, staging: str) -> None:
+        """
+        Write the runs staged for a partition into one part file, and
+        remove them
+
+        :param partition: The partition
+        :type partition: str
+        :param staging: The staging directory of the partition
+        :type staging: str
+        :return: None
+        :rtype: None
+        """
+        directory = os.path.join(self.directory, partition)
+        os.makedirs(directory, mode=0o755, exist_ok=True)
+        part = os.path.join(directory, f'part-{time.time_ns()}')
+        runs = sorted(os.listdir(staging))
+        if any(name.endswith('.parquet') for name in runs):
+            table = pa.concat_tables([
+                pq.read_table(os.path.join(staging, name))
+                for name in runs if name.endswith('.parquet')
+            ])
+            pq.write_table(
+                table, f'{part}.tmp', row_group_size=self.row_group_size,
+                compression='zstd')
+            os.replace(f'{part}.tmp', f'{part}.parquet')
+        if 'rows.csv' in runs:
+            with open(os.path.join(staging, 'rows.csv'), 'rb') as source, \
+                    gzip.open(f'{part}.tmp', 'wb') as target:
+                target.write((','.join(self.COLUMNS) + '\n').encode('utf-8'))
+                shutil.copyfileobj(source, target)
+            os.replace(f'{part}.tmp', f'{part}.csv.gz')
+        shutil.rmtree(staging)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+ConnectionPool() class file
+"""
+
+import http.client
+import queue
+import urllib.parse
+
+
+class ConnectionPool:
+    """
+    Persistent HTTP connections to one server.
+
+    A connection is taken from the pool for every request and put back once
+    its response has been read, so requests reuse open keep-alive
+    connections and each thread sending at the same time gets its own. A
+    pooled connection the server has closed in the meantime is replaced
+    and the request sent again once.
+    """
+
+    def __init__(self, url: str, timeout: float) -> None:
+        parts = urllib.parse.urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self._pool = queue.LifoQueue()
+
+    def __len__(self) -> int:
+        return self._pool.qsize()
+
+    def _connection(self) -> tuple:
+        """
+        Take a connection from the pool, or open a new one
+
+        :return: A connection to the server, and True if it was pooled
+        :rtype: tuple
+        """
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            pass
+        if self.scheme == 'https':
+            connection = http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout)
+        else:
+            connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout)
+        return connection, False
+
+    def request(self, method: str, path: str, body: bytes = None,
+                headers: dict = None) -> tuple:
+        """
+        Send a request and read its response
+
+        :param method: The HTTP method
+        :type method: str
+        :param path: The path and query string
+        :type path: str
+        :param body: The request body
+        :type body: bytes
+        :param headers: The request headers
+        :type headers: dict
+        :raise OSError: If the server could not be reached
+        :raise http.client.HTTPException: If the response was not valid
+        :return: The status and the body of the response
+        :rtype: tuple
+        """
+        while True:
+            connection, pooled = self._connection()
+            try:
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+                # Read the whole response, so the connection can be reused
+                data = response.read()
+                break
+
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                # The server may have closed an idle pooled connection
+                if not pooled:
+                    raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._pool.put(connection)
+        return response.status, data
+
+    def close(self) -> None:
+        """
+        Close every pooled connection
+
+        :return: None
+        :rtype: None
+        """
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+CycleResult() class file
+"""
+
+from src.classes.hop_sketches import HopSketches
+from src.classes.trace import Trace
+
+
+class CycleResult:
+    """
+    Everything one probe cycle produced for the outputs to write.
+
+    traces holds the merged statistics of every hop and targets the status
+    of every target. sketches, windows, dropped and shards are None when
+    the histogram, the rolling windows, the cardinality limits or sharding
+    are disabled. shards maps each shard name to a CycleResult holding only
+    the traces and targets of that shard. timestamps holds the time each hop
+    was last seen and completed the time each target finished, both keyed by
+    IP Address.
+    """
+
+    __slots__ = (
+        'traces', 'targets', 'sketches', 'windows', 'dropped', 'shards',
+        'timestamps', 'completed'
+    )
+
+    def __init__(self, traces: Trace = None, targets: dict = None,
+                 sketches: HopSketches = None, windows: dict = None,
+                 dropped: dict = None, shards: dict = None,
+                 timestamps: dict = None, completed: dict = None) -> None:
+        self.traces = Trace() if traces is None else traces
+        self.targets = {} if targets is None else targets
+        self.sketches = sketches
+        self.windows = windows
+        self.dropped = dropped
+        self.shards = shards
+        self.timestamps = {} if timestamps is None else timestamps
+        self.completed = {} if completed is None else completed
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+DDSketch() class file
+"""
+
+import math
+
+
+class DDSketch:
+    """
+    A mergeable quantile sketch with a bounded relative error (DDSketch).
+
+    Values are counted in logarithmic bins, so any quantile is returned
+    within relative_accuracy of the true value no matter how many values
+    have been added. At most max_bins bins are kept; past that the lowest
+    bins are collapsed together, which only costs accuracy at the bottom of
+    the distribution and keeps the tail, such as p99, exact to the sketch.
+
+    Values at or below MIN_VALUE, which includes 0, are counted separately.
+    """
+
+    MIN_VALUE = 1e-6
+
+    def __init__(self, relative_accuracy: float = 0.01,
+                 max_bins: int = 1024) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(
+                f'{relative_accuracy} is not a relative accuracy between 0 '
+                'and 1!')
+        if (not isinstance(max_bins, int) or isinstance(max_bins, bool) or
+                max_bins < 1):
+            raise ValueError(f'{max_bins} is not a positive integer!')
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        """
+        Return the bin a positive value is counted in
+
+        :param value: A value above MIN_VALUE
+        :type value: float
+        :return: The bin index
+        :rtype: int
+        """
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        """
+        Return the value that represents a bin
+
+        :param key: The bin index
+        :type key: int
+        :return: The value within relative_accuracy of every value in the
+        bin
+        :rtype: float
+        """
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """
+        Add a value to the sketch
+
+        :param value: The value to add
+        :type value: float
+        :param count: The number of times to add it
+        :type count: int
+        :return: None
+        :rtype: None
+        """
+        if value <= self.MIN_VALUE:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self) -> None:
+        """
+        Fold the lowest bins into one until at most max_bins remain
+
+        :return: None
+        :rtype: None
+        """
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        if excess <= 0:
+            return
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other: 'DDSketch') -> None:
+        """
+        Add every value counted by another sketch
+
+        :param other: A sketch with the same relative accuracy
+        :type other: DDSketch
+        :raise ValueError: If the sketches have different accuracies
+        :return: None
+        :rtype: None
+        """
+        if other.gamma != self.gamma:
+            raise ValueError('Unable to merge sketches of different accuracy!')
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile
+
+        :param q: The quantile, from 0 to 1
+        :type q: float
+        :raise ValueError: If q is not between 0 and 1
+        :return: The estimated value, or None if the sketch is empty
+        :rtype: float
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f'{q} is not a quantile between 0 and 1!')
+        if not self.count:
+            return None
+        # The extremes are tracked exactly
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return min(self.min, 0.0)
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    def count_le(self, value: float) -> int:
+        """
+        Estimate how many values are less than or equal to a value, as a
+        Prometheus histogram bucket would count them
+
+        :param value: The upper bound
+        :type value: float
+        :return: The number of values in the bins at or below the bound
+        :rtype: int
+        """
+        if value < 0:
+            return 0
+        count = self.zero_count
+        if value <= self.MIN_VALUE:
+            return count
+        limit = self._key(value)
+        return count + sum(
+            count for key, count in self.bins.items() if key <= limit)
+
+    def to_dict(self) -> dict:
+        """
+        Return the sketch in a form that can be written as JSON
+
+        :return: The state of the sketch
+        :rtype: dict
+        """
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'bins': {str(key): count for key, count in self.bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DDSketch':
+        """
+        Rebuild a sketch written by to_dict()
+
+        :param data: The state of a sketch
+        :type data: dict
+        :raise KeyError: If a required field is missing
+        :raise ValueError: If a field is invalid
+        :return: The sketch
+        :rtype: DDSketch
+        """
+        sketch = cls(data['relative_accuracy'], data['max_bins'])
+        sketch.bins = {int(key): int(count)
+                       for key, count in data['bins'].items()}
+        sketch.zero_count = int(data['zero_count'])
+        sketch.count = int(data['count'])
+        sketch.sum = float(data['sum'])
+        if sketch.count:
+            sketch.min = float(data['min'])
+            sketch.max = float(data['max'])
+        sketch._collapse()
+        return sketch
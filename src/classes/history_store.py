@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+HistoryStore() class file
+"""
+
+import sqlite3
+
+from src.classes.trace import Trace
+from src.constants import constants
+
+
+class HistoryStore:
+    """
+    Keep every hop of every trace in a local SQLite database.
+
+    The database runs in WAL mode, so a query can read while a run is
+    written. Each run is inserted with one executemany() in a single
+    transaction, and rows older than retention seconds are deleted after
+    every insert. Rows are indexed by (hop_ip, ts), (target, ts) and ts,
+    so a window of history is read through an index whether or not it is
+    filtered by a hop or a target, and pruning never scans the table.
+    """
+
+    OPTIONAL_CONFIG_KEYS = [
+        'enabled', 'filename', 'retention'
+    ]
+
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS hops ('
+        'ts REAL NOT NULL, target TEXT NOT NULL, hop INTEGER NOT NULL, '
+        'hop_ip TEXT NOT NULL, loss REAL, sent INTEGER, last REAL, '
+        'average REAL, best REAL, worst REAL, stdev REAL)',
+        'CREATE INDEX IF NOT EXISTS hops_hop_ip_ts ON hops (hop_ip, ts)',
+        'CREATE INDEX IF NOT EXISTS hops_target_ts ON hops (target, ts)',
+        'CREATE INDEX IF NOT EXISTS hops_ts ON hops (ts)'
+    ]
+
+    # Loss and average are weighted by the probes sent and answered, and
+    # best only counts hops that answered, as unanswered hops report 0
+    AGGREGATE = (
+        'SELECT hop_ip, COUNT(*), SUM(sent), '
+        'SUM(sent * loss) / NULLIF(SUM(sent), 0), '
+        'SUM(sent * (100 - loss) * average) / '
+        'NULLIF(SUM(sent * (100 - loss)), 0), '
+        'MIN(CASE WHEN loss < 100 THEN best END), MAX(worst), MAX(ts) '
+        'FROM hops INDEXED BY {index} WHERE {where} GROUP BY hop_ip '
+        'ORDER BY 4 DESC, hop_ip'
+    )
+
+    COLUMNS = [
+        'hop_ip', 'runs', 'sent', 'loss', 'average', 'best', 'worst',
+        'last_seen'
+    ]
+
+    def __init__(self, config: dict) -> None:
+        self.enabled = False
+        self.filename = constants.HISTORY_FILE
+        self.retention = constants.HISTORY_RETENTION
+        self.config = config
+        for key, value in self.config.items():
+            setattr(self, key, value)
+        self.connection = None
+
+    @property
+    def config(self) -> dict:
+        """
+        config.getter
+
+        :return: A dictionary containing the history section of the current
+        configuration
+        :rtype: dict
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        """
+        config.setter
+
+        :param config: A configuration of the current program
+        :type config: dict
+        :raise ValueError: If an unknown key is present
+        :return: None
+        :rtype: None
+        """
+        self._config = {}
+        section = 'history'
+        # The whole section is optional
+        settings = config.get(section) or {}
+        for key in settings.keys():
+            if key not in self.OPTIONAL_CONFIG_KEYS:
+                raise ValueError(f'{key} key is invalid and must be removed!')
+        self._config = settings
+
+    @property
+    def enabled(self) -> bool:
+        """
+        enabled.getter
+
+        :return: True if every run is stored
+        :rtype: bool
+        """
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled) -> None:
+        """
+        enabled.setter
+
+        :param enabled: True to store every run
+        :type enabled: bool
+        :raise ValueError: If enabled is not a boolean
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(enabled, bool):
+            raise ValueError(f'{enabled} is not a boolean!')
+        self._enabled = enabled
+
+    @property
+    def filename(self) -> str:
+        """
+        filename.getter
+
+        :return: The path of the database
+        :rtype: str
+        """
+        return self._filename
+
+    @filename.setter
+    def filename(self, filename) -> None:
+        """
+        filename.setter
+
+        :param filename: The path of the database
+        :type filename: str
+        :raise ValueError: If filename is not a non-empty string
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(filename, str) or not filename:
+            raise ValueError(f'{filename} is not a non-empty string!')
+        self._filename = filename
+
+    @property
+    def retention(self) -> float:
+        """
+        retention.getter
+
+        :return: The number of seconds rows are kept
+        :rtype: float
+        """
+        return self._retention
+
+    @retention.setter
+    def retention(self, retention) -> None:
+        """
+        retention.setter
+
+        :param retention: A positive number of seconds
+        :type retention: float
+        :raise ValueError: If retention is not a positive number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(retention, (int, float)) or
+                isinstance(retention, bool) or retention <= 0):
+            raise ValueError(f'{retention} is not a positive number!')
+        self._retention = retention
+
+    def open(self) -> bool:
+        """
+        Open the database, creating it if needed
+
+        :return: True if the database is open, False if it could not be
+        opened
+        :rtype: bool
+        """
+        try:
+            self.connection = sqlite3.connect(self.filename)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            # A crash may lose the last run, but never corrupts the database
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            with self.connection:
+                for statement in self.SCHEMA:
+                    self.connection.execute(statement)
+            return True
+
+        except sqlite3.Error as e:
+            print(f'{self.filename}: {e}')
+            self.close()
+            return False
+
+    def close(self) -> None:
+        """
+        Close the database
+
+        :return: None
+        :rtype: None
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self) -> 'HistoryStore':
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    def rows(timestamp: float, target: str, trace: Trace) -> list:
+        """
+        Build the rows of one trace
+
+        :param timestamp: The time the trace completed
+        :type timestamp: float
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :param trace: The completed trace
+        :type trace: Trace
+        :return: One row per hop that answered, in the order of the columns
+        of hops, numbered by its TTL
+        :rtype: list
+        """
+        columns = [getattr(trace, name) for name in Trace.STATS]
+        return [
+            (timestamp, target, trace.ttl(row), ip_addr, *values)
+            for row, (ip_addr, values) in enumerate(
+                zip(trace, zip(*columns)))
+        ]
+
+    def insert(self, rows: list, now: float) -> bool:
+        """
+        Store the rows of a run, then delete the rows past retention
+
+        :param rows: The rows of every trace of the run, see rows()
+        :type rows: list
+        :param now: The current time
+        :type now: float
+        :return: True if the run was stored, False if it could not be
+        :rtype: bool
+        """
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT INTO hops (ts, target, hop, hop_ip, loss, sent, '
+                    'last, average, best, worst, stdev) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                self.connection.execute(
+                    'DELETE FROM hops WHERE ts < ?', (now - self.retention,))
+            return True
+
+        except sqlite3.Error as e:
+            print(f'{self.filename}: {e}')
+            return False
+
+    def aggregate(self, since: float, until: float = None, hop: str = None,
+                  target: str = None) -> list:
+        """
+        Aggregate the history of every hop over a window, lossiest first
+
+        :param since: The start of the window
+        :type since: float
+        :param until: The end of the window, None for now
+        :type until: float
+        :param hop: Only aggregate this hop
+        :type hop: str
+        :param target: Only aggregate the hops on the route to this target
+        :type target: str
+        :return: A dictionary per hop, with the keys in COLUMNS
+        :rtype: list
+        """
+        cursor = self.connection.execute(
+            *self._aggregate(since, until, hop, target))
+        return [dict(zip(self.COLUMNS, row)) for row in cursor]
+
+    def plan(self, since: float, until: float = None, hop: str = None,
+             target: str = None) -> list:
+        """
+        Explain how aggregate() reads the table
+
+        :param since: The start of the window
+        :type since: float
+        :param until: The end of the window, None for now
+        :type until: float
+        :param hop: Only aggregate this hop
+        :type hop: str
+        :param target: Only aggregate the hops on the route to this target
+        :type target: str
+        :return: The details of every step of the query plan
+        :rtype: list
+        """
+        statement, params = self._aggregate(since, until, hop, target)
+        cursor = self.connection.execute(
+            f'EXPLAIN QUERY PLAN {statement}', params)
+        return [row[-1] for row in cursor]
+
+    def _aggregate(self, since: float, until: float, hop: str,
+                   target: str) -> tuple:
+        """
+        Build the statement of aggregate()
+
+        Without statistics, SQLite prefers to read the whole of the
+        (hop_ip, ts) index to group by hop_ip without sorting, so the index
+        that narrows the window the most is named instead
+
+        :param since: The start of the window
+        :type since: float
+        :param until: The end of the window, None for now
+        :type until: float
+        :param hop: Only aggregate this hop
+        :type hop: str
+        :param target: Only aggregate the hops on the route to this target
+        :type target: str
+        :return: The statement and its parameters
+        :rtype: tuple
+        """
+        clauses = ['ts >= ?']
+        params = [since]
+        if until is not None:
+            clauses.append('ts < ?')
+            params.append(until)
+        index = 'hops_ts'
+        if target is not None:
+            clauses.append('target = ?')
+            params.append(target)
+            index = 'hops_target_ts'
+        if hop is not None:
+            clauses.append('hop_ip = ?')
+            params.append(hop)
+            index = 'hops_hop_ip_ts'
+        statement = self.AGGREGATE.format(
+            index=index, where=' AND '.join(clauses))
+        return statement, params
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Hop() class file
+"""
+
+
+class Hop:
+    """
+    The statistics of a single hop of a trace. Hops are small __slots__
+    records handed out by Trace(), which keeps the statistics of every hop
+    in columns rather than one object per hop.
+    """
+
+    STATS = (
+        'loss', 'sent', 'last', 'average', 'best', 'worst', 'stdev'
+    )
+
+    __slots__ = ('ip',) + STATS
+
+    def __init__(self, ip: str, loss: float = 0.0, sent: float = 0,
+                 last: float = 0.0, average: float = 0.0, best: float = 0.0,
+                 worst: float = 0.0, stdev: float = 0.0) -> None:
+        self.ip = ip
+        self.loss = loss
+        self.sent = sent
+        self.last = last
+        self.average = average
+        self.best = best
+        self.worst = worst
+        self.stdev = stdev
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Hop):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        stats = ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'Hop({stats})'
+
+    def to_dict(self) -> dict:
+        """
+        Return the statistics of the hop keyed by name
+
+        :return: A dictionary of the statistics in Hop.STATS
+        :rtype: dict
+        """
+        return {name: getattr(self, name) for name in self.STATS}
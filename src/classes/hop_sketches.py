@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+HopSketches() class file
+"""
+
+import time
+
+from src.classes.dd_sketch import DDSketch
+from src.classes.state_file import StateFile
+from src.classes.trace import Trace
+
+
+class HopSketches:
+    """
+    Keep a DDSketch() of the round-trip times of every hop, merged across
+    every target and every run.
+
+    Traces that kept their individual replies, from the raw mtr mode or the
+    ICMP prober, add every reply. The report and json modes only print
+    summaries, so their last reply is added. Hops shared by every target
+    are added once per run. The sketches are kept in a JSON file so they
+    survive between runs, and a hop that has not been seen for max_age
+    seconds, or in the last max_idle_runs runs, is dropped, which keeps the
+    file bounded.
+    """
+
+    def __init__(self, filename: str, max_age: float,
+                 relative_accuracy: float = 0.01,
+                 max_bins: int = 1024, max_idle_runs: int = 0) -> None:
+        self.filename = filename
+        self.max_age = max_age
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.max_idle_runs = max_idle_runs
+        self.sketches = {}
+        self.updated = {}
+        self.runs = 0
+        self.last_run = {}
+        self._shared = set()
+
+    def load(self) -> bool:
+        """
+        Read the sketch file into self.sketches
+
+        :return: True if the sketches were loaded or no sketch file exists
+        yet, False if the file could not be read or is not valid
+        :rtype: bool
+        """
+        data = StateFile(self.filename).load()
+        if data is None:
+            return False
+        try:
+            self.sketches = {
+                ip: DDSketch.from_dict(sketch)
+                for ip, sketch in data.get('sketches', {}).items()
+            }
+            self.updated = data.get('updated', {})
+            self.runs = int(data.get('runs', 0))
+            self.last_run = {
+                ip: int(run) for ip, run in data.get('last_run', {}).items()
+            }
+            return True
+
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            print(e)
+            self.sketches = {}
+            self.updated = {}
+            self.runs = 0
+            self.last_run = {}
+            return False
+
+    def save(self) -> bool:
+        """
+        Drop hops older than max_age and write self.sketches to the sketch
+        file
+
+        :return: True if the file was written, False if it could not be
+        :rtype: bool
+        """
+        self.prune()
+        return StateFile(self.filename).save({
+            'sketches': {
+                ip: sketch.to_dict() for ip, sketch in self.sketches.items()
+            },
+            'updated': self.updated,
+            'runs': self.runs,
+            'last_run': self.last_run
+        })
+
+    def add(self, trace: Trace, timestamp: float = None) -> None:
+        """
+        Add the replies of every hop of a trace
+
+        :param trace: A completed trace
+        :type trace: Trace
+        :param timestamp: When the trace completed, defaults to now
+        :type timestamp: float
+        :return: None
+        :rtype: None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        for packed, hop in zip(trace.ips, trace.hops()):
+            if hop.ip in self.sketches:
+                self.last_run[hop.ip] = self.runs
+            if packed in trace.shared:
+                if packed in self._shared:
+                    continue
+                self._shared.add(packed)
+            if hop.ip in trace.samples:
+                samples = trace.samples[hop.ip]
+            elif hop.loss < 100:
+                samples = [hop.last]
+            else:
+                samples = []
+            if not samples:
+                continue
+
+            sketch = self.sketches.get(hop.ip)
+            if sketch is None:
+                sketch = self.sketches[hop.ip] = DDSketch(
+                    self.relative_accuracy, self.max_bins)
+                self.last_run[hop.ip] = self.runs
+            for rtt in samples:
+                sketch.add(rtt)
+            self.updated[hop.ip] = timestamp
+
+    def start_run(self) -> None:
+        """
+        Count a new run, which every hop added from now on was seen in
+
+        :return: None
+        :rtype: None
+        """
+        self.runs += 1
+        self._shared = set()
+
+    def prune(self, now: float = None) -> None:
+        """
+        Drop the sketches of hops that have not been seen for max_age
+        seconds or in the last max_idle_runs runs
+
+        :param now: The current time, defaults to now
+        :type now: float
+        :return: None
+        :rtype: None
+        """
+        if now is None:
+            now = time.time()
+        for ip in list(self.sketches):
+            # Hops from files written before runs were counted start now
+            idle = self.runs - self.last_run.setdefault(ip, self.runs)
+            if ((self.max_age and now - self.updated.get(ip, 0) >
+                 self.max_age) or
+                    (self.max_idle_runs and idle >= self.max_idle_runs)):
+                del self.sketches[ip]
+                self.updated.pop(ip, None)
+                self.last_run.pop(ip, None)
+
+    def subset(self, ips) -> 'HopSketches':
+        """
+        Return the sketches of some hops, sharing the sketches themselves
+
+        :param ips: The IP Addresses to keep
+        :type ips: iterable
+        :return: A HopSketches() with the same settings and only those hops
+        :rtype: HopSketches
+        """
+        subset = HopSketches(
+            self.filename, self.max_age, self.relative_accuracy,
+            self.max_bins, self.max_idle_runs)
+        for ip in ips:
+            if ip in self.sketches:
+                subset.sketches[ip] = self.sketches[ip]
+                subset.updated[ip] = self.updated.get(ip, 0)
+        return subset
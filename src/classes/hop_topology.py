@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+HopTopology() class file
+"""
+
+import time
+
+from src.classes.state_file import StateFile
+
+
+class HopTopology:
+    """
+    Learn the route to each target and the run of hops at the start of every
+    route that all targets share, such as the gateway and the ISP edge, so
+    those hops can be probed once per cycle instead of once per target.
+
+    The routes are kept in a small JSON file so they survive between runs,
+    and are only trusted for max_age seconds after they were learned.
+    """
+
+    def __init__(self, filename: str, max_age: float) -> None:
+        self.filename = filename
+        self.max_age = max_age
+        self.paths = {}
+        self.learned_at = 0.0
+
+    def load(self) -> bool:
+        """
+        Read the topology file into self.paths
+
+        :return: True if the topology was loaded or no topology file exists
+        yet, False if the file could not be read or is not valid JSON
+        :rtype: bool
+        """
+        data = StateFile(self.filename).load()
+        if data is None:
+            return False
+        self.paths = data.get('paths', {})
+        self.learned_at = data.get('learned_at', 0.0)
+        return True
+
+    def save(self) -> bool:
+        """
+        Write self.paths to the topology file
+
+        :return: True if the file was written, False if it could not be
+        :rtype: bool
+        """
+        return StateFile(self.filename).save(
+            {'paths': self.paths, 'learned_at': self.learned_at})
+
+    def learn(self, target: str, hops: list) -> None:
+        """
+        Remember the route to a target from a full trace
+
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :param hops: The (hop index, host) tuples of the trace, where hops
+        that are missing or did not answer are stored as '???'
+        :type hops: list
+        :return: None
+        :rtype: None
+        """
+        if not hops:
+            return
+        path = ['???'] * max(hop for hop, _ in hops)
+        for hop, host in hops:
+            path[hop - 1] = host
+        self.paths[target] = path
+
+    def forget(self) -> None:
+        """
+        Forget every route, forcing full traces on the next run
+
+        :return: None
+        :rtype: None
+        """
+        self.paths = {}
+        self.learned_at = 0.0
+
+    def is_fresh(self, targets: list) -> bool:
+        """
+        Determine if the route to every target is known and recent
+
+        :param targets: The IPv4 Addresses of the targets
+        :type targets: list
+        :return: True if every route is known and younger than max_age
+        :rtype: bool
+        """
+        if time.time() - self.learned_at >= self.max_age:
+            return False
+        return all(target in self.paths for target in targets)
+
+    def shared_prefix(self, targets: list) -> list:
+        """
+        Find the hops at the start of every target's route that are the same
+        for all of them. At least one hop of every route is left out so each
+        target is still probed itself.
+
+        :param targets: The IPv4 Addresses of the targets
+        :type targets: list
+        :return: The shared hops in order, starting at hop 1, or an empty
+        list if fewer than two routes are known
+        :rtype: list
+        """
+        paths = [self.paths[target] for target in targets
+                 if target in self.paths]
+        if len(paths) < 2:
+            return []
+
+        prefix = []
+        for hosts in zip(*paths):
+            if hosts[0] == '???' or hosts.count(hosts[0]) != len(hosts):
+                break
+            prefix.append(hosts[0])
+        return prefix[:min(len(path) for path in paths) - 1]
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+IcmpBackend() class file
+"""
+
+import asyncio
+import os
+import re
+import socket
+import struct
+import time
+
+from src.classes.mtr import MTR
+from src.classes.probe_backend import ProbeBackend
+from src.classes.raw_trace import RawTrace
+from src.classes.trace import Trace
+from src.constants import constants
+
+
+class IcmpBackend(ProbeBackend):
+    """
+    Trace from inside this process by sending ICMP echo requests with an
+    increasing TTL, the same way mtr does, without starting a process per
+    IP Address.
+
+    An unprivileged ICMP datagram socket is used when the kernel allows it
+    (see net.ipv4.ping_group_range), otherwise a raw socket, which needs root
+    or CAP_NET_RAW. Every trace shares the one socket and the running event
+    loop, and replies are matched to probes by their sequence number.
+    """
+
+    name = 'icmp'
+
+    ICMP_ECHO_REPLY = 0
+    ICMP_DEST_UNREACH = 3
+    ICMP_ECHO_REQUEST = 8
+    ICMP_TIME_EXCEEDED = 11
+
+    # Linux values, for Python builds that do not expose them
+    IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+    MSG_ERRQUEUE = getattr(socket, 'MSG_ERRQUEUE', 0x2000)
+    SO_EE_ORIGIN_ICMP = 2
+
+    PAYLOAD = b'ping-stats-probe'
+
+    def __init__(self, cycles: int = constants.MTR_REPORT_CYCLES,
+                 max_hops: int = constants.MTR_MAX_HOPS,
+                 interval: float = constants.ICMP_INTERVAL,
+                 reply_timeout: float = constants.ICMP_REPLY_TIMEOUT) -> None:
+        self.cycles = cycles
+        self.max_hops = max_hops
+        self.interval = interval
+        self.reply_timeout = reply_timeout
+        self.packets_per_probe = cycles * max_hops
+        self.identifier = os.getpid() & 0xffff
+        self.sock = None
+        self.raw = False
+        self.pending = {}
+        self._sequence = 0
+        self._loop = None
+
+    def open(self) -> None:
+        """
+        Create the ICMP socket, preferring an unprivileged datagram socket
+
+        :raise OSError: If neither socket type is permitted
+        :return: None
+        :rtype: None
+        """
+        try:
+            sock = socket.socket(
+                socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            sock.setsockopt(socket.SOL_IP, self.IP_RECVERR, 1)
+            self.raw = False
+        except PermissionError:
+            sock = socket.socket(
+                socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            self.raw = True
+        sock.setblocking(False)
+        self.sock = sock
+
+    def close(self) -> None:
+        """
+        Close the ICMP socket
+
+        :return: None
+        :rtype: None
+        """
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    async def start(self) -> None:
+        """
+        Open the socket if needed and start reading replies on the running
+        event loop
+
+        :return: None
+        :rtype: None
+        """
+        if self.sock is None:
+            self.open()
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    async def stop(self) -> None:
+        """
+        Stop reading replies, abandon outstanding probes and close the socket
+
+        :return: None
+        :rtype: None
+        """
+        if self._loop is not None and self.sock is not None:
+            self._loop.remove_reader(self.sock.fileno())
+        for future, _ in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.close()
+
+    @staticmethod
+    def checksum(data: bytes) -> int:
+        """
+        Compute the RFC 1071 internet checksum
+
+        :param data: The bytes to checksum
+        :type data: bytes
+        :return: The 16-bit checksum
+        :rtype: int
+        """
+        if len(data) % 2:
+            data += b'\x00'
+        total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+        total = (total >> 16) + (total & 0xffff)
+        total += total >> 16
+        return ~total & 0xffff
+
+    def build_packet(self, sequence: int) -> bytes:
+        """
+        Build an ICMP echo request
+
+        :param sequence: The sequence number identifying the probe
+        :type sequence: int
+        :return: The ICMP packet
+        :rtype: bytes
+        """
+        header = struct.pack(
+            '!BBHHH', self.ICMP_ECHO_REQUEST, 0, 0, self.identifier,
+            sequence)
+        checksum = self.checksum(header + self.PAYLOAD)
+        header = struct.pack(
+            '!BBHHH', self.ICMP_ECHO_REQUEST, 0, checksum, self.identifier,
+            sequence)
+        return header + self.PAYLOAD
+
+    def parse_reply(self, data: bytes) -> tuple:
+        """
+        Parse a packet read from the socket. Raw sockets include the IP
+        header and also receive the ICMP errors quoting our echo requests.
+
+        :param data: The packet
+        :type data: bytes
+        :return: The ICMP type and the sequence number of the probe it
+        answers, or None if the packet is not an answer to one of our probes
+        :rtype: tuple
+        """
+        icmp = data
+        if self.raw:
+            icmp = data[(data[0] & 0x0f) * 4:] if data else b''
+        if len(icmp) < 8:
+            return None
+
+        icmp_type, _, _, identifier, sequence = struct.unpack(
+            '!BBHHH', icmp[:8])
+        if icmp_type == self.ICMP_ECHO_REPLY:
+            if self.raw and identifier != self.identifier:
+                return None
+            return icmp_type, sequence
+
+        if not self.raw or icmp_type not in (
+                self.ICMP_TIME_EXCEEDED, self.ICMP_DEST_UNREACH):
+            return None
+
+        inner = icmp[8:]
+        if len(inner) < 20:
+            return None
+        echo = inner[(inner[0] & 0x0f) * 4:]
+        if len(echo) < 8:
+            return None
+        inner_type, _, _, identifier, sequence = struct.unpack(
+            '!BBHHH', echo[:8])
+        if (inner_type != self.ICMP_ECHO_REQUEST or
+                identifier != self.identifier):
+            return None
+        return icmp_type, sequence
+
+    def parse_error(self, data: bytes, ancdata: list) -> tuple:
+        """
+        Parse an ICMP error read from the error queue of a datagram socket,
+        where the kernel hands back our echo request and describes the error
+        in a sock_extended_err control message
+
+        :param data: The echo request that caused the error
+        :type data: bytes
+        :param ancdata: The control messages returned by recvmsg()
+        :type ancdata: list
+        :return: The IP Address that reported the error, the ICMP type and
+        the sequence number of the probe, or None if not an ICMP error
+        :rtype: tuple
+        """
+        if len(data) < 8:
+            return None
+        sequence = struct.unpack('!H', data[6:8])[0]
+        for level, kind, cdata in ancdata:
+            if level != socket.SOL_IP or kind != self.IP_RECVERR:
+                continue
+            if len(cdata) < 24:
+                continue
+            _, origin, icmp_type, _, _, _, _ = struct.unpack(
+                '=IBBBBII', cdata[:16])
+            if origin != self.SO_EE_ORIGIN_ICMP:
+                continue
+            # The offending address follows as a struct sockaddr_in
+            return socket.inet_ntoa(cdata[20:24]), icmp_type, sequence
+        return None
+
+    def _on_readable(self) -> None:
+        """
+        Drain every reply and error waiting on the socket. A socket error
+        that is not a queued ICMP error fails every outstanding probe.
+
+        :return: None
+        :rtype: None
+        """
+        while True:
+            try:
+                data, address = self.sock.recvfrom(4096)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # A queued ICMP error is also reported once through recv(),
+                # any other error will not go away by reading again
+                if self._read_error_queue():
+                    continue
+                print(e)
+                self._fail_pending()
+                return
+            reply = self.parse_reply(data)
+            if reply is not None:
+                self._resolve(reply[1], address[0], reply[0])
+
+        self._read_error_queue()
+
+    def _read_error_queue(self) -> bool:
+        """
+        Drain the ICMP errors queued on a datagram socket
+
+        :return: True if at least one error was read, False if none
+        :rtype: bool
+        """
+        if self.raw:
+            return False
+
+        read = False
+        while True:
+            try:
+                data, ancdata, _, _ = self.sock.recvmsg(
+                    4096, 4096, self.MSG_ERRQUEUE)
+            except OSError:
+                return read
+            read = True
+            error = self.parse_error(data, ancdata)
+            if error is not None:
+                self._resolve(error[2], error[0], error[1])
+
+    def _fail_pending(self) -> None:
+        """
+        Fail every outstanding probe as unanswered
+
+        :return: None
+        :rtype: None
+        """
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_result(None)
+        self.pending.clear()
+
+    def _resolve(self, sequence: int, responder: str, icmp_type: int) -> None:
+        """
+        Complete the probe waiting on a sequence number
+
+        :param sequence: The sequence number of the probe
+        :type sequence: int
+        :param responder: The IP Address that answered
+        :type responder: str
+        :param icmp_type: The ICMP type of the answer
+        :type icmp_type: int
+        :return: None
+        :rtype: None
+        """
+        try:
+            future, sent = self.pending.pop(sequence)
+        except KeyError:
+            return
+        if not future.done():
+            rtt = (time.perf_counter() - sent) * 1000
+            future.set_result((responder, rtt, icmp_type))
+
+    def _next_sequence(self) -> int:
+        """
+        Allocate a sequence number that is not in use
+
+        :return: The sequence number
+        :rtype: int
+        """
+        while True:
+            self._sequence = (self._sequence + 1) & 0xffff
+            if self._sequence not in self.pending:
+                return self._sequence
+
+    def _send(self, ip: str, ttl: int) -> tuple:
+        """
+        Send a single echo request
+
+        :param ip: The IPv4 Address to send to
+        :type ip: str
+        :param ttl: The TTL of the packet
+        :type ttl: int
+        :return: The sequence number and the future its answer is set on
+        :rtype: tuple
+        """
+        sequence = self._next_sequence()
+        future = self._loop.create_future()
+        self.pending[sequence] = (future, time.perf_counter())
+        try:
+            # Safe as nothing else sends between these two calls
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+            self.sock.sendto(self.build_packet(sequence), (ip, 0))
+        except OSError:
+            self.pending.pop(sequence, None)
+            future.set_result(None)
+        return sequence, future
+
+    async def _wait(self, sequence: int, future: asyncio.Future) -> tuple:
+        """
+        Wait for the answer to a probe
+
+        :param sequence: The sequence number of the probe
+        :type sequence: int
+        :param future: The future its answer is set on
+        :type future: asyncio.Future
+        :return: The responder, round-trip time in milliseconds and ICMP
+        type, or None if no answer arrived in time
+        :rtype: tuple
+        """
+        try:
+            return await asyncio.wait_for(future, self.reply_timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.pending.pop(sequence, None)
+
+    async def trace(self, ip: str, first_ttl: int = 1, max_ttl: int = 0,
+                    hops: list = None) -> Trace:
+        """
+        Trace the route to an IP Address. Each cycle probes every TTL at
+        once and stops at the first hop that answers with an echo reply.
+
+        :param ip: The IPv4 Address to trace
+        :type ip: str
+        :param first_ttl: The first TTL, or hop, to probe
+        :type first_ttl: int
+        :param max_ttl: The last TTL to probe, 0 for self.max_hops
+        :type max_ttl: int
+        :param hops: If given, a (hop index, host) tuple is appended to it
+        for every hop in order
+        :type hops: list
+        :raise ValueError: If the string is not in IPv4 Address format
+        :return: The trace
+        :rtype: Trace
+        """
+        if not re.match(MTR.IP4_PATTERN, ip):
+            raise ValueError(f'{ip} is not a valid IPv4 Address!')
+
+        raw_trace = RawTrace()
+        max_ttl = max_ttl or self.max_hops
+        for cycle in range(self.cycles):
+            started = self._loop.time()
+            probes = [
+                self._send(ip, ttl) for ttl in range(first_ttl, max_ttl + 1)
+            ]
+            replies = await asyncio.gather(
+                *(self._wait(sequence, future) for sequence, future in probes))
+
+            reached = [
+                ttl for ttl, reply in enumerate(replies, first_ttl)
+                if reply and reply[2] == self.ICMP_ECHO_REPLY
+            ]
+            if reached:
+                max_ttl = min(reached)
+
+            for ttl, reply in enumerate(
+                    replies[:max_ttl - first_ttl + 1], first_ttl):
+                raw_trace.add_transmit(ttl)
+                if reply is None:
+                    continue
+                raw_trace.add_host(ttl, reply[0])
+                raw_trace.add_ping(ttl, reply[1])
+
+            remaining = self.interval - (self._loop.time() - started)
+            if remaining > 0 and cycle < self.cycles - 1:
+                await asyncio.sleep(remaining)
+
+        if hops is not None:
+            hops.extend(
+                hop for hop in raw_trace.hops if hop[0] >= first_ttl)
+        trace = raw_trace.to_trace(self.cycles)
+        trace.set_ttls(raw_trace.hops)
+        return trace
+
+    async def ping(self, ips: list) -> Trace:
+        """
+        Ping every IP Address once per cycle, all at the same time
+
+        :param ips: The IPv4 Addresses to ping
+        :type ips: list
+        :return: The same statistics as a trace, keyed by IP Address
+        :rtype: Trace
+        """
+        raw_trace = RawTrace()
+        for index, ip in enumerate(ips, 1):
+            raw_trace.add_host(index, ip)
+
+        for cycle in range(self.cycles):
+            started = self._loop.time()
+            probes = [self._send(ip, constants.ICMP_PING_TTL) for ip in ips]
+            replies = await asyncio.gather(
+                *(self._wait(sequence, future) for sequence, future in probes))
+
+            for index, reply in enumerate(replies, 1):
+                raw_trace.add_transmit(index)
+                if reply and reply[2] == self.ICMP_ECHO_REPLY:
+                    raw_trace.add_ping(index, reply[1])
+
+            remaining = self.interval - (self._loop.time() - started)
+            if remaining > 0 and cycle < self.cycles - 1:
+                await asyncio.sleep(remaining)
+
+        return raw_trace.to_trace(self.cycles)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+MetricsHandler() class file
+"""
+
+from http.server import BaseHTTPRequestHandler
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Serve the pre-rendered metrics of the MetricsServer() that owns the
+    HTTP server
+    """
+
+    # The content type of every format in constants.OUTPUT_FORMATS
+    CONTENT_TYPES = {
+        'prometheus': 'text/plain; version=0.0.4; charset=utf-8',
+        'openmetrics':
+            'application/openmetrics-text; version=1.0.0; charset=utf-8'
+    }
+
+    def do_GET(self) -> None:
+        """
+        Answer a scrape of /metrics
+
+        :return: None
+        :rtype: None
+        """
+        self._send_metrics(True)
+
+    def do_HEAD(self) -> None:
+        """
+        Answer a scrape of /metrics without the body
+
+        :return: None
+        :rtype: None
+        """
+        self._send_metrics(False)
+
+    def _send_metrics(self, send_body: bool) -> None:
+        """
+        Send the headers of /metrics and, if asked to, the metrics
+
+        :param send_body: True to send the metrics after the headers
+        :type send_body: bool
+        :return: None
+        :rtype: None
+        """
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        # Read the payload once, so a swap during the scrape is not seen
+        payload = self.server.metrics.payload
+        if payload is None:
+            self.send_error(503, 'No probe cycle has completed yet')
+            return
+
+        body, compressed, content_type = payload
+        use_gzip = self.accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        if use_gzip:
+            body = compressed
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    @staticmethod
+    def accepts_gzip(accept_encoding: str) -> bool:
+        """
+        Parse an Accept-Encoding header
+
+        :param accept_encoding: The value of the header
+        :type accept_encoding: str
+        :return: True if gzip is acceptable, either by name or through *,
+        with a q-value above 0
+        :rtype: bool
+        """
+        qvalues = {}
+        for token in accept_encoding.split(','):
+            coding, *params = token.split(';')
+            qvalue = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        qvalue = float(value)
+                    except ValueError:
+                        qvalue = 0.0
+            qvalues[coding.strip().lower()] = qvalue
+        for coding in ('gzip', 'x-gzip', '*'):
+            if coding in qvalues:
+                return qvalues[coding] > 0
+        return False
+
+    def log_message(self, *args) -> None:
+        """Scrapes are not logged"""
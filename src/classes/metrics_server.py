@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+MetricsServer() class file
+"""
+
+import gzip
+from http.server import ThreadingHTTPServer
+import threading
+
+from src.classes.metrics_handler import MetricsHandler
+from src.constants import constants
+
+
+class MetricsServer:
+    """
+    Serve the metrics of the last probe cycle over HTTP, for running
+    ping-stats as a long-running exporter instead of writing a file for the
+    textfile collector.
+
+    Every probe cycle renders its metrics once and hands them to update(),
+    which also compresses them and replaces both in a single assignment.
+    Scrapes only write out bytes that are already rendered, and always see
+    one complete cycle.
+    """
+
+    OPTIONAL_CONFIG_KEYS = [
+        'listen_address', 'port', 'interval'
+    ]
+
+    def __init__(self, config: dict) -> None:
+        self.listen_address = constants.EXPORTER_LISTEN_ADDRESS
+        self.port = constants.EXPORTER_PORT
+        self.interval = constants.EXPORTER_INTERVAL
+        self.config = config
+        for key, value in self.config.items():
+            setattr(self, key, value)
+        self.payload = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def config(self) -> dict:
+        """
+        config.getter
+
+        :return: A dictionary containing the exporter section of the current
+        configuration
+        :rtype: dict
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        """
+        config.setter
+
+        :param config: A configuration of the current program
+        :type config: dict
+        :raise ValueError: If an unknown key is present
+        :return: None
+        :rtype: None
+        """
+        self._config = {}
+        section = 'exporter'
+        # The whole section is optional
+        settings = config.get(section) or {}
+        for key in settings.keys():
+            if key not in self.OPTIONAL_CONFIG_KEYS:
+                raise ValueError(f'{key} key is invalid and must be removed!')
+        self._config = settings
+
+    @property
+    def listen_address(self) -> str:
+        """
+        listen_address.getter
+
+        :return: The address the HTTP server listens on
+        :rtype: str
+        """
+        return self._listen_address
+
+    @listen_address.setter
+    def listen_address(self, listen_address) -> None:
+        """
+        listen_address.setter
+
+        :param listen_address: The address to listen on, '' for every
+        address
+        :type listen_address: str
+        :raise ValueError: If listen_address is not a string
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(listen_address, str):
+            raise ValueError(f'{listen_address} is not a string!')
+        self._listen_address = listen_address
+
+    @property
+    def port(self) -> int:
+        """
+        port.getter
+
+        :return: The TCP port the HTTP server listens on
+        :rtype: int
+        """
+        return self._port
+
+    @port.setter
+    def port(self, port) -> None:
+        """
+        port.setter
+
+        :param port: A TCP port, or 0 for any free port
+        :type port: int
+        :raise ValueError: If port is not an integer from 0 to 65535
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(port, int) or isinstance(port, bool) or
+                not 0 <= port <= 65535):
+            raise ValueError(f'{port} is not a valid port!')
+        self._port = port
+
+    @property
+    def interval(self) -> float:
+        """
+        interval.getter
+
+        :return: The number of seconds from the start of one probe cycle to
+        the start of the next
+        :rtype: float
+        """
+        return self._interval
+
+    @interval.setter
+    def interval(self, interval) -> None:
+        """
+        interval.setter
+
+        :param interval: A positive number of seconds
+        :type interval: float
+        :raise ValueError: If interval is not a positive number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(interval, (int, float)) or
+                isinstance(interval, bool) or interval <= 0):
+            raise ValueError(f'{interval} is not a positive number!')
+        self._interval = interval
+
+    @property
+    def server_address(self) -> tuple:
+        """
+        server_address.getter
+
+        :return: The address and port the HTTP server is bound to
+        :rtype: tuple
+        """
+        return self._server.server_address[:2]
+
+    def update(self, body: bytes,
+               output_format: str = constants.OUTPUT_FORMAT) -> None:
+        """
+        Replace the metrics served to every following scrape
+
+        :param body: The rendered metrics
+        :type body: bytes
+        :param output_format: The format body is in, one of
+        constants.OUTPUT_FORMATS
+        :type output_format: str
+        :return: None
+        :rtype: None
+        """
+        self.payload = (
+            body, gzip.compress(body, compresslevel=6),
+            MetricsHandler.CONTENT_TYPES[output_format])
+
+    def start(self) -> bool:
+        """
+        Start serving in a background thread
+
+        :return: True if the server is listening, False if it could not bind
+        :rtype: bool
+        """
+        try:
+            self._server = ThreadingHTTPServer(
+                (self.listen_address, self.port), MetricsHandler)
+        except OSError as e:
+            print(e)
+            return False
+        self._server.daemon_threads = True
+        self._server.metrics = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        """
+        Stop serving and close the listening socket
+
+        :return: None
+        :rtype: None
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
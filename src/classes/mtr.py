@@ -3,22 +3,59 @@
 MTR() class file
 """
 
+import asyncio
+import json
 import re
 import subprocess
 
+from src.classes.raw_trace import RawTrace
+from src.classes.trace import Trace
+from src.constants import constants
+
 
 class MTR:
     """
     Execute the mtr binary, capture its output, and parse out the key details
-    per IP Address into a dictionary called a trace
+    per IP Address into a Trace()
     """
 
     IP4_PATTERN = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'
 
+    MODES = [
+        'report', 'json', 'raw'
+    ]
+
+    # Matches every hop line of --report output in a single pass over the
+    # bytes mtr printed. [^\S\n] is whitespace that stays on the same line.
+    REPORT_PATTERN = re.compile(
+        rb"""^[^\S\n]+(\d{1,2})\.\|-+[^\S\n]+(\d+\.\d+\.\d+\.\d+)[^\S\n]+
+        (\d+\.\d+)%[^\S\n]+(\d+)[^\S\n]+(\d+\.\d+)[^\S\n]+
+        (\d+\.\d+)[^\S\n]+(\d+\.\d+)[^\S\n]+
+        (\d+\.\d+)[^\S\n]+(\d+\.\d+)$""", re.X | re.M
+    )
+
+    JSON_KEYS = {
+        'loss': 'Loss%',
+        'sent': 'Snt',
+        'last': 'Last',
+        'average': 'Avg',
+        'best': 'Best',
+        'worst': 'Wrst',
+        'stdev': 'StDev'
+    }
+
     def __init__(self, mtr_binary: str) -> None:
         self.mtr_binary = mtr_binary
-        self.mtr_stdout = ''
-        self.trace = {}
+        self.mode = 'report'
+        self.mtr_output = b''
+        self.trace = Trace()
+        self.hops = []
+        self.samples = {}
+        self.raw_trace = None
+        self.first_ttl = 1
+        self.max_ttl = 0
+        self.timeout = None
+        self.timed_out = False
         self.error = {}
 
     @property
@@ -48,23 +85,105 @@ class MTR:
         else:
             raise ValueError(f'{ip} is not a valid IPv4 Address!')
 
-    def run_mtr(self) -> bool:
+    @property
+    def mtr_stdout(self) -> str:
         """
-        Execute the mtr binary and capture its output in the self.mtr_stdout
-        property
+        mtr_stdout.getter
 
-        :return: True if mtr exits with exit code 0, False if mtr exits with
-        a non-zero exit code
+        :return: The output of mtr, decoded from the bytes in
+        self.mtr_output
+        :rtype: str
+        """
+        return self.mtr_output.decode('utf-8', errors='replace')
+
+    @mtr_stdout.setter
+    def mtr_stdout(self, mtr_stdout: str) -> None:
+        """
+        mtr_stdout.setter
+
+        :param mtr_stdout: The output of mtr
+        :type mtr_stdout: str
+        :return: None
+        :rtype: None
+        """
+        self.mtr_output = mtr_stdout.encode('utf-8')
+
+    @property
+    def mode(self) -> str:
+        """
+        mode.getter
+
+        :return: The mtr output format to request and parse
+        :rtype: str
+        """
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode: str) -> None:
+        """
+        mode.setter
+
+        :param mode: One of the supported output formats in self.MODES
+        :type mode: str
+        :raise ValueError: If the mode is not supported
+        :return: None
+        :rtype: None
+        """
+        if mode not in self.MODES:
+            raise ValueError(f'{mode} is not a supported mtr mode!')
+        self._mode = mode
+
+    def supports_json(self) -> bool:
+        """
+        Determine if the mtr binary is able to produce JSON output by
+        checking its help text for the --json option
+
+        :return: True if --json is supported, False if not supported or the
+        help text could not be read
         :rtype: bool
         """
+        try:
+            output = subprocess.run(
+                [self.mtr_binary, '--help'], capture_output=True, check=False)
+        except OSError:
+            return False
+        return b'--json' in output.stdout or b'--json' in output.stderr
+
+    def _build_command(self) -> list:
+        """
+        Build the mtr command line for the current IP Address and mode,
+        limited to the TTLs from self.first_ttl to self.max_ttl if set
+
+        :return: The command and its arguments
+        :rtype: list
+        """
         cmd = [
-            self.mtr_binary, '-4', '--no-dns', '--report', '--report-cycles',
-            '4', self.ip
+            self.mtr_binary, '-4', '--no-dns', f'--{self.mode}',
+            '--report-cycles', str(constants.MTR_REPORT_CYCLES)
         ]
+        if self.first_ttl > 1:
+            cmd.extend(['--first-ttl', str(self.first_ttl)])
+        if self.max_ttl:
+            cmd.extend(['--max-ttl', str(self.max_ttl)])
+        cmd.append(self.ip)
+        return cmd
+
+    def run_mtr(self) -> bool:
+        """
+        Execute the mtr binary and capture its output in the self.mtr_output
+        property. If self.timeout is set, mtr is killed once it runs for
+        longer than that many seconds.
+
+        :return: True if mtr exits with exit code 0, False if mtr exits with
+        a non-zero exit code or times out
+        :rtype: bool
+        """
+        cmd = self._build_command()
         try:
-            output = subprocess.run(cmd, capture_output=True, check=True)
+            output = subprocess.run(
+                cmd, capture_output=True, check=True, timeout=self.timeout)
             if output.returncode == 0:
-                self.mtr_stdout = output.stdout.decode('utf-8')
+                self.mtr_output = output.stdout
                 return True
             self.error.update({
                 'returncode': output.returncode,
@@ -83,40 +202,179 @@ class MTR:
             })
             return False
 
+        except subprocess.TimeoutExpired as e:
+            self.timed_out = True
+            self.error.update({
+                'timeout': e.timeout,
+                'stdout': e.stdout,
+                'stderr': e.stderr,
+                'command': e.cmd
+            })
+            return False
+
+    async def run_mtr_async(self) -> bool:
+        """
+        Execute the mtr binary as an asyncio subprocess and capture its output
+        in the self.mtr_output property. This does not block the event loop,
+        so many traces can share a single thread.
+
+        In raw mode the output is not buffered; each record is fed into
+        self.raw_trace as soon as mtr prints it.
+
+        If self.timeout is set, or the caller cancels this coroutine, mtr is
+        killed rather than left running in the background.
+
+        :return: True if mtr exits with exit code 0, False if mtr exits with
+        a non-zero exit code or times out
+        :rtype: bool
+        """
+        cmd = self._build_command()
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                self._communicate(process), self.timeout)
+
+        except asyncio.TimeoutError:
+            self.timed_out = True
+            self.error.update({
+                'timeout': self.timeout,
+                'command': cmd
+            })
+            return False
+
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+        if process.returncode == 0:
+            self.mtr_output = stdout
+            return True
+
+        self.error.update({
+            'returncode': process.returncode,
+            'stdout': stdout.decode('utf-8'),
+            'stderr': stderr.decode('utf-8'),
+            'command': cmd
+        })
+        return False
+
+    async def _communicate(self, process) -> tuple:
+        """
+        Read everything mtr prints until it exits
+
+        :param process: The running mtr process
+        :type process: asyncio.subprocess.Process
+        :return: The stdout and stderr bytes, where stdout is empty in raw
+        mode as it has already been consumed into self.raw_trace
+        :rtype: tuple
+        """
+        if self.mode != 'raw':
+            return await process.communicate()
+
+        self.raw_trace = RawTrace()
+        async for line in process.stdout:
+            self.raw_trace.feed(line)
+        stderr = await process.stderr.read()
+        await process.wait()
+        return b'', stderr
+
     def parse_mtr_stdout(self) -> bool:
         """
-        Parse the output in self.mtr_stdout into a dictionary and store in
+        Parse the output in self.mtr_output into a Trace() and store in
         self.trace
 
+        :return: True when parsing is complete, False if the output could not
+        be parsed
+        :rtype: bool
+        """
+        if self.mode == 'json':
+            return self.parse_mtr_json()
+
+        if self.mode == 'raw':
+            return self.parse_mtr_raw()
+
+        return self.parse_mtr_report()
+
+    def parse_mtr_report(self) -> bool:
+        """
+        Parse the --report output in self.mtr_output into a Trace() and store
+        in self.trace. The bytes mtr printed are scanned once, without
+        decoding them or splitting them into lines.
+
         :return: True when parsing is complete
         :rtype: bool
         """
-        lines = self.mtr_stdout.split('\n')
-        prematch = re.compile(self.IP4_PATTERN.split('^', maxsplit=1)[-1])
-        pattern = re.compile(
-            r"""^\s+\d{1,2}\.\|\-+\s+(?P<ip_addr>\d+\.\d+\.\d+\.\d+)\s+
-            (?P<loss>\d+\.\d+)\%\s+(?P<sent>\d+)\s+(?P<last>\d+\.\d+)\s+
-            (?P<average>\d+\.\d+)\s+(?P<best>\d+\.\d+)\s+
-            (?P<worst>\d+\.\d+)\s+(?P<stdev>\d+\.\d+)$""", re.X
-        )
+        for match in self.REPORT_PATTERN.finditer(self.mtr_output):
+            (hop, ip_addr, loss, sent, last, average, best, worst,
+             stdev) = match.groups()
+            ip_addr = ip_addr.decode('ascii')
+            try:
+                self.trace.put(
+                    ip_addr, float(loss), int(sent), float(last),
+                    float(average), float(best), float(worst), float(stdev))
+            except ValueError:
+                continue
+            self.hops.append((int(hop), ip_addr))
+
+        self.trace.set_ttls(self.hops)
+        return True
+
+    def parse_mtr_json(self) -> bool:
+        """
+        Parse the --json output in self.mtr_output into a Trace() and store in
+        self.trace. Every hop, including unreachable ones reported as
+        '???', is stored in order in self.hops as a (hop index, host) tuple.
+
+        :return: True when parsing is complete, False if the output is not
+        valid mtr JSON
+        :rtype: bool
+        """
+        try:
+            hubs = json.loads(self.mtr_output)['report']['hubs']
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            self.error.update({
+                'stdout': self.mtr_stdout,
+                'exception': str(e)
+            })
+            return False
 
-        for line in lines:
-            result = re.search(prematch, line)
-            if not result:
+        for hub in hubs:
+            host = hub['host']
+            self.hops.append((int(hub['count']), host))
+            if not re.match(self.IP4_PATTERN, host):
                 continue
 
-            matches = re.match(pattern, line)
-            if not matches:
+            try:
+                self.trace.put(host, *(
+                    float(hub[self.JSON_KEYS[key]]) for key in Trace.STATS))
+            except ValueError:
                 continue
 
-            self.trace[matches['ip_addr']] = {
-                'loss': float(matches['loss']),
-                'sent': int(matches['sent']),
-                'last': float(matches['last']),
-                'average': float(matches['average']),
-                'best': float(matches['best']),
-                'worst': float(matches['worst']),
-                'stdev': float(matches['stdev'])
-            }
+        self.trace.set_ttls(self.hops)
+        return True
+
+    def parse_mtr_raw(self) -> bool:
+        """
+        Summarise the records streamed into self.raw_trace, or parse the
+        --raw output in self.mtr_output if nothing was streamed, into a
+        Trace() stored in self.trace. The individual round-trip times are
+        kept in self.samples, keyed by IP Address.
+
+        :return: True when parsing is complete
+        :rtype: bool
+        """
+        if self.raw_trace is None:
+            self.raw_trace = RawTrace()
+            for line in self.mtr_output.split(b'\n'):
+                self.raw_trace.feed(line)
 
+        self.trace = self.raw_trace.to_trace(constants.MTR_REPORT_CYCLES)
+        self.hops = self.raw_trace.hops
+        self.trace.set_ttls(self.hops)
+        self.samples = self.raw_trace.samples_by_ip()
         return True
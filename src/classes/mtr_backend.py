@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+MtrBackend() class file
+"""
+
+from src.classes.mtr import MTR
+from src.classes.probe_backend import ProbeBackend
+from src.classes.trace import Trace
+
+
+class MtrBackend(ProbeBackend):
+    """
+    Trace by running the mtr binary once per IP Address
+    """
+
+    name = 'mtr'
+
+    def __init__(self, mtr_binary: str, mode: str) -> None:
+        self.mtr_binary = mtr_binary
+        self.mode = mode
+
+    async def trace(self, ip: str, first_ttl: int = 1, max_ttl: int = 0,
+                    hops: list = None) -> Trace:
+        """
+        Run and parse a single mtr
+
+        :param ip: The IPv4 Address to trace
+        :type ip: str
+        :param first_ttl: The first TTL, or hop, to probe
+        :type first_ttl: int
+        :param max_ttl: The last TTL to probe, 0 for the mtr default
+        :type max_ttl: int
+        :param hops: If given, a (hop index, host) tuple is appended to it
+        for every hop in order
+        :type hops: list
+        :raise ValueError: If the string is not in IPv4 Address format
+        :return: The trace, or an empty Trace() if the trace failed
+        :rtype: Trace
+        """
+        mtr = MTR(self.mtr_binary)
+        mtr.ip = ip
+        mtr.mode = self.mode
+        mtr.first_ttl = first_ttl
+        mtr.max_ttl = max_ttl
+        result = await mtr.run_mtr_async()
+        if not result:
+            return Trace()
+
+        result = mtr.parse_mtr_stdout()
+        if not result:
+            return Trace()
+
+        if hops is not None:
+            hops.extend(mtr.hops)
+        return mtr.trace
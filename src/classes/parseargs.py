@@ -23,6 +23,11 @@ class ParseArgs():
         self.parser = argparse.ArgumentParser(
             prog=self.NAME, description=self.DESC)
         self.config_file = ''
+        self.serve = False
+        self.command = None
+        self.window = self.duration(constants.QUERY_WINDOW)
+        self.hop = None
+        self.target = None
 
         self.parser.add_argument(
             '-v',
@@ -39,7 +44,49 @@ class ParseArgs():
             help='Optionally specify the full path to a custom config file'
         )
 
+        self.parser.add_argument(
+            '-s',
+            '--serve',
+            action='store_true',
+            required=False,
+            help='Run as an exporter and serve /metrics over HTTP instead '
+                 'of writing the Prometheus file once'
+        )
+
+        subparsers = self.parser.add_subparsers(dest='command')
+        query = subparsers.add_parser(
+            'query',
+            help='Show the loss and latency of every hop over a window of '
+                 'the history store')
+
+        query.add_argument(
+            '-w',
+            '--window',
+            type=self.duration,
+            default=self.window,
+            help='How far back to look, in seconds or with an s, m, h or d '
+                 f'suffix, e.g. 90m. Defaults to {constants.QUERY_WINDOW}'
+        )
+
+        query.add_argument(
+            '--hop',
+            required=False,
+            help='Only show this hop'
+        )
+
+        query.add_argument(
+            '--target',
+            required=False,
+            help='Only show the hops on the route to this target'
+        )
+
         self.parse_args = self.parser.parse_args()
+        self.serve = self.parse_args.serve
+        self.command = self.parse_args.command
+        if self.command == 'query':
+            self.window = self.parse_args.window
+            self.hop = self.parse_args.hop
+            self.target = self.parse_args.target
 
         if self.parse_args.version:
             self._print_version()
@@ -59,6 +106,30 @@ class ParseArgs():
 
             self.config_file = fc.file
 
+    @staticmethod
+    def duration(text: str) -> float:
+        """
+        Parse a duration such as 300, 90m or 1.5h
+
+        :param text: A number of seconds, or of minutes, hours or days with
+        an m, h or d suffix
+        :type text: str
+        :raise argparse.ArgumentTypeError: If text is not a positive duration
+        :return: The number of seconds
+        :rtype: float
+        """
+        units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+        scale = units.get(text[-1:], 1)
+        number = text[:-1] if text[-1:] in units else text
+        try:
+            seconds = float(number) * scale
+        except ValueError:
+            seconds = 0
+        if not seconds > 0:
+            raise argparse.ArgumentTypeError(
+                f'{text} is not a positive duration!')
+        return seconds
+
     def _print_version(self) -> None:
         """
         Print out the warranty and version number of the program.
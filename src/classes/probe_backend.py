@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+ProbeBackend() class file
+"""
+
+from abc import ABC, abstractmethod
+
+from src.classes.trace import Trace
+from src.constants import constants
+
+
+class ProbeBackend(ABC):
+    """
+    The interface ProbeEngine() uses to trace a single IP Address. Backends
+    produce the same Trace() as MTR(), keyed by hop IP Address.
+
+    A backend that runs past its time limit is cancelled by the engine, so
+    trace() must clean up after itself when cancelled.
+
+    Traces can be limited to a range of TTLs, which lets the engine probe hops
+    shared by many targets once instead of once per target. Backends that can
+    also ping many IP Addresses in one pass let the engine skip tracing
+    routes it already knows.
+    """
+
+    name = ''
+
+    packets_per_probe = constants.MTR_PACKETS_PER_PROBE
+
+    async def start(self) -> None:
+        """
+        Prepare the backend once the event loop is running
+
+        :return: None
+        :rtype: None
+        """
+
+    async def stop(self) -> None:
+        """
+        Release anything acquired by start()
+
+        :return: None
+        :rtype: None
+        """
+
+    @abstractmethod
+    async def trace(self, ip: str, first_ttl: int = 1, max_ttl: int = 0,
+                    hops: list = None) -> Trace:
+        """
+        Trace the route to an IP Address
+
+        :param ip: The IPv4 Address to trace
+        :type ip: str
+        :param first_ttl: The first TTL, or hop, to probe
+        :type first_ttl: int
+        :param max_ttl: The last TTL to probe, 0 for the backend default
+        :type max_ttl: int
+        :param hops: If given, a (hop index, host) tuple is appended to it
+        for every hop in order, using '???' for hops that did not answer
+        :type hops: list
+        :return: The trace, or an empty Trace() if the trace failed
+        :rtype: Trace
+        """
+
+    async def ping(self, ips: list) -> Trace:
+        """
+        Ping many IP Addresses directly in one pass
+
+        :param ips: The IPv4 Addresses to ping
+        :type ips: list
+        :return: The same statistics as a trace, keyed by IP Address, or
+        None if this backend cannot ping
+        :rtype: Trace
+        """
+        return None
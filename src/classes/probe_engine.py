@@ -0,0 +1,718 @@
+#!/usr/bin/env python3
+"""
+ProbeEngine() class file
+"""
+
+import asyncio
+import random
+import time
+
+from src.classes.hop_topology import HopTopology
+from src.classes.icmp_backend import IcmpBackend
+from src.classes.mtr import MTR
+from src.classes.mtr_backend import MtrBackend
+from src.classes.probe_backend import ProbeBackend
+from src.classes.replay_backend import ReplayBackend
+from src.classes.route_cache import RouteCache
+from src.classes.token_bucket import TokenBucket
+from src.classes.trace import Trace
+from src.constants import constants
+
+
+class ProbeEngine:
+    """
+    Trace every configured IP Address on a single asyncio event loop,
+    bounding how many traces are running at the same time. Traces are run by
+    a ProbeBackend(): the mtr binary, the in-process ICMP prober, or recorded
+    mtr output replayed from disk.
+
+    Each trace is handed to a callback as soon as it finishes so the caller
+    never has to hold every trace in memory at once.
+
+    When a packets-per-second budget is configured, every mtr start draws
+    from one shared token bucket after a random per-target delay, which
+    spreads the probe traffic out instead of sending it in one burst.
+
+    Each mtr is killed once it exceeds the per-probe timeout, and every probe
+    still running when the run-wide deadline passes is cancelled, so a single
+    hung mtr can never hold up the results of the others. The outcome of each
+    target is kept in self.completed and self.timed_out.
+
+    With shared_hops enabled, the hops at the start of every route, such as
+    the gateway, are probed once. Each target is then only probed from the
+    first hop after them, and the shared results are copied into its trace
+    and marked as shared. The routes are relearned with full traces once
+    they are older than topology_max_age seconds or stop matching.
+
+    With route_cache enabled, the hops discovered by a full trace are cached
+    for route_cache_ttl seconds. While a route is cached its hops are pinged
+    directly, in one batch shared by every target, and the target is only
+    traced again once its route expires or a cached hop stops answering.
+    Backends that cannot ping, such as mtr, trace every target as usual.
+    """
+
+    REQUIRED_CONFIG_KEYS = [
+        'ips'
+    ]
+
+    OPTIONAL_CONFIG_KEYS = [
+        'concurrency', 'packets_per_second', 'jitter', 'mode', 'timeout',
+        'deadline', 'backend', 'shared_hops', 'topology_max_age',
+        'route_cache', 'route_cache_ttl'
+    ]
+
+    BACKENDS = [
+        'auto', 'mtr', 'icmp', 'replay'
+    ]
+
+    def __init__(self, config: dict) -> None:
+        self.backend = constants.MTR_BACKEND
+        self.concurrency = constants.MTR_CONCURRENCY
+        self.packets_per_second = constants.MTR_PACKETS_PER_SECOND
+        self.jitter = constants.MTR_JITTER
+        self.mode = constants.MTR_MODE
+        self.timeout = constants.MTR_TIMEOUT
+        self.deadline = constants.MTR_DEADLINE
+        self.shared_hops = False
+        self.topology_max_age = constants.HOP_TOPOLOGY_MAX_AGE
+        self.route_cache = False
+        self.route_cache_ttl = constants.ROUTE_CACHE_TTL
+        self.completed = {}
+        self.timed_out = set()
+        self.config = config
+        for key, value in self.config.items():
+            setattr(self, key, value)
+
+    @property
+    def config(self) -> dict:
+        """
+        config.getter
+
+        :return: A dictionary containing the mtr section of the current
+        configuration
+        :rtype: dict
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        """
+        config.setter
+
+        :param config: A configuration of the current program
+        :type config: dict
+        :raise ValueError: If a required key is missing
+        :raise ValueError: If an unknown key is present
+        :raise KeyError: If a required section is missing
+        :return: None
+        :rtype: None
+        """
+        self._config = {}
+        section = 'mtr'
+        try:
+            # Ensure required configuration to operate is present
+            for key in self.REQUIRED_CONFIG_KEYS:
+                if key not in config[section].keys():
+                    raise ValueError(f'{key} key is missing but is required!')
+
+            # Ensure there aren't any unknown keys that could hurt
+            # the operation
+            for key in config[section].keys():
+                if (key not in self.REQUIRED_CONFIG_KEYS and
+                        key not in self.OPTIONAL_CONFIG_KEYS):
+                    raise ValueError(
+                        f'{key} key is invalid and must be removed!')
+
+        except KeyError as e:
+            raise KeyError(
+                f'{section} section is missing but is required!') from e
+
+        self._config = config[section]
+
+    @property
+    def ips(self) -> list:
+        """
+        ips.getter
+
+        :return: The IPv4 Addresses to execute an mtr against
+        :rtype: list
+        """
+        return self._ips
+
+    @ips.setter
+    def ips(self, ips) -> None:
+        """
+        ips.setter
+
+        :param ips: A list of IPv4 Addresses
+        :type ips: list
+        :raise ValueError: If ips is not a list
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(ips, list):
+            raise ValueError(f'{ips} is not a list!')
+        self._ips = ips
+
+    @property
+    def concurrency(self) -> int:
+        """
+        concurrency.getter
+
+        :return: The maximum number of mtr processes running at once
+        :rtype: int
+        """
+        return self._concurrency
+
+    @concurrency.setter
+    def concurrency(self, concurrency) -> None:
+        """
+        concurrency.setter
+
+        :param concurrency: The maximum number of mtr processes running at
+        once
+        :type concurrency: int
+        :raise ValueError: If concurrency is not a positive integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(concurrency, int) or
+                isinstance(concurrency, bool) or concurrency < 1):
+            raise ValueError(f'{concurrency} is not a positive integer!')
+        self._concurrency = concurrency
+
+    @property
+    def packets_per_second(self) -> float:
+        """
+        packets_per_second.getter
+
+        :return: The global probe packet budget, 0 if unlimited
+        :rtype: float
+        """
+        return self._packets_per_second
+
+    @packets_per_second.setter
+    def packets_per_second(self, packets_per_second) -> None:
+        """
+        packets_per_second.setter
+
+        :param packets_per_second: The global probe packet budget, 0 if
+        unlimited
+        :type packets_per_second: float
+        :raise ValueError: If packets_per_second is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(packets_per_second, (int, float)) or
+                isinstance(packets_per_second, bool) or
+                packets_per_second < 0):
+            raise ValueError(
+                f'{packets_per_second} is not a non-negative number!')
+        self._packets_per_second = packets_per_second
+
+    @property
+    def jitter(self) -> float:
+        """
+        jitter.getter
+
+        :return: The maximum random delay, in seconds, before each target
+        starts
+        :rtype: float
+        """
+        return self._jitter
+
+    @jitter.setter
+    def jitter(self, jitter) -> None:
+        """
+        jitter.setter
+
+        :param jitter: The maximum random delay, in seconds, before each
+        target starts
+        :type jitter: float
+        :raise ValueError: If jitter is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(jitter, (int, float)) or
+                isinstance(jitter, bool) or jitter < 0):
+            raise ValueError(f'{jitter} is not a non-negative number!')
+        self._jitter = jitter
+
+    @property
+    def mode(self) -> str:
+        """
+        mode.getter
+
+        :return: The configured mtr output format, or 'auto'
+        :rtype: str
+        """
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode) -> None:
+        """
+        mode.setter
+
+        :param mode: 'auto' or one of the formats supported by MTR()
+        :type mode: str
+        :raise ValueError: If the mode is not supported
+        :return: None
+        :rtype: None
+        """
+        if mode != 'auto' and mode not in MTR.MODES:
+            raise ValueError(f'{mode} is not a supported mtr mode!')
+        self._mode = mode
+
+    @property
+    def timeout(self) -> float:
+        """
+        timeout.getter
+
+        :return: The number of seconds a single mtr may run, 0 if unlimited
+        :rtype: float
+        """
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout) -> None:
+        """
+        timeout.setter
+
+        :param timeout: The number of seconds a single mtr may run, 0 if
+        unlimited
+        :type timeout: float
+        :raise ValueError: If timeout is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(timeout, (int, float)) or
+                isinstance(timeout, bool) or timeout < 0):
+            raise ValueError(f'{timeout} is not a non-negative number!')
+        self._timeout = timeout
+
+    @property
+    def deadline(self) -> float:
+        """
+        deadline.getter
+
+        :return: The number of seconds the whole run may take, 0 if unlimited
+        :rtype: float
+        """
+        return self._deadline
+
+    @deadline.setter
+    def deadline(self, deadline) -> None:
+        """
+        deadline.setter
+
+        :param deadline: The number of seconds the whole run may take, 0 if
+        unlimited
+        :type deadline: float
+        :raise ValueError: If deadline is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(deadline, (int, float)) or
+                isinstance(deadline, bool) or deadline < 0):
+            raise ValueError(f'{deadline} is not a non-negative number!')
+        self._deadline = deadline
+
+    @property
+    def backend(self) -> str:
+        """
+        backend.getter
+
+        :return: The configured probe backend, or 'auto'
+        :rtype: str
+        """
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend) -> None:
+        """
+        backend.setter
+
+        :param backend: One of the probe backends in self.BACKENDS
+        :type backend: str
+        :raise ValueError: If the backend is not supported
+        :return: None
+        :rtype: None
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f'{backend} is not a supported backend!')
+        self._backend = backend
+
+    @property
+    def shared_hops(self) -> bool:
+        """
+        shared_hops.getter
+
+        :return: True if hops shared by every route are probed only once
+        :rtype: bool
+        """
+        return self._shared_hops
+
+    @shared_hops.setter
+    def shared_hops(self, shared_hops) -> None:
+        """
+        shared_hops.setter
+
+        :param shared_hops: True to probe hops shared by every route once
+        :type shared_hops: bool
+        :raise ValueError: If shared_hops is not a boolean
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(shared_hops, bool):
+            raise ValueError(f'{shared_hops} is not a boolean!')
+        self._shared_hops = shared_hops
+
+    @property
+    def topology_max_age(self) -> float:
+        """
+        topology_max_age.getter
+
+        :return: The number of seconds learned routes are trusted for
+        :rtype: float
+        """
+        return self._topology_max_age
+
+    @topology_max_age.setter
+    def topology_max_age(self, topology_max_age) -> None:
+        """
+        topology_max_age.setter
+
+        :param topology_max_age: The number of seconds learned routes are
+        trusted for
+        :type topology_max_age: float
+        :raise ValueError: If topology_max_age is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(topology_max_age, (int, float)) or
+                isinstance(topology_max_age, bool) or topology_max_age < 0):
+            raise ValueError(
+                f'{topology_max_age} is not a non-negative number!')
+        self._topology_max_age = topology_max_age
+
+    @property
+    def route_cache(self) -> bool:
+        """
+        route_cache.getter
+
+        :return: True if cached routes are pinged instead of traced
+        :rtype: bool
+        """
+        return self._route_cache
+
+    @route_cache.setter
+    def route_cache(self, route_cache) -> None:
+        """
+        route_cache.setter
+
+        :param route_cache: True to ping cached routes instead of tracing
+        them
+        :type route_cache: bool
+        :raise ValueError: If route_cache is not a boolean
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(route_cache, bool):
+            raise ValueError(f'{route_cache} is not a boolean!')
+        self._route_cache = route_cache
+
+    @property
+    def route_cache_ttl(self) -> float:
+        """
+        route_cache_ttl.getter
+
+        :return: The number of seconds a discovered route is cached for
+        :rtype: float
+        """
+        return self._route_cache_ttl
+
+    @route_cache_ttl.setter
+    def route_cache_ttl(self, route_cache_ttl) -> None:
+        """
+        route_cache_ttl.setter
+
+        :param route_cache_ttl: The number of seconds a discovered route is
+        cached for
+        :type route_cache_ttl: float
+        :raise ValueError: If route_cache_ttl is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(route_cache_ttl, (int, float)) or
+                isinstance(route_cache_ttl, bool) or route_cache_ttl < 0):
+            raise ValueError(
+                f'{route_cache_ttl} is not a non-negative number!')
+        self._route_cache_ttl = route_cache_ttl
+
+    def resolve_mode(self, mtr_binary: str) -> str:
+        """
+        Resolve 'auto' to the best output format the installed mtr supports
+
+        :param mtr_binary: The full filepath to the mtr binary
+        :type mtr_binary: str
+        :return: The mtr output format every probe will use
+        :rtype: str
+        """
+        if self.mode != 'auto':
+            return self.mode
+        if MTR(mtr_binary).supports_json():
+            return 'json'
+        return 'report'
+
+    def create_backend(self, config: dict, mtr_binary: str) -> ProbeBackend:
+        """
+        Create the configured probe backend. 'auto' prefers the in-process
+        ICMP prober and falls back to mtr when ICMP sockets are not
+        permitted.
+
+        :param config: The current configuration
+        :type config: dict
+        :param mtr_binary: The full filepath to the mtr binary, or empty if
+        mtr could not be located
+        :type mtr_binary: str
+        :raise KeyError: If the replay section is missing for 'replay'
+        :raise ValueError: If the replay section is invalid for 'replay'
+        :return: The probe backend, or None if no backend is usable
+        :rtype: ProbeBackend
+        """
+        if self.backend == 'replay':
+            return ReplayBackend(config)
+
+        if self.backend in ('auto', 'icmp'):
+            backend = IcmpBackend()
+            try:
+                backend.open()
+                return backend
+            except OSError as e:
+                if self.backend == 'icmp':
+                    print(f'ERROR: Unable to open an ICMP socket: {e}')
+                    return None
+
+        if not mtr_binary:
+            return None
+        return MtrBackend(mtr_binary, self.resolve_mode(mtr_binary))
+
+    def run(self, backend: ProbeBackend, on_result) -> None:
+        """
+        Trace every IP Address and call on_result(ip, trace) as each trace
+        completes. A failed trace is reported as an empty Trace(), and
+        targets cancelled by the deadline are not reported at all.
+
+        :param backend: The probe backend from create_backend()
+        :type backend: ProbeBackend
+        :param on_result: A callable accepting the IP Address and its trace
+        :type on_result: callable
+        :return: None
+        :rtype: None
+        """
+        asyncio.run(self._run(backend, on_result))
+
+    async def _run(self, backend: ProbeBackend, on_result) -> None:
+        """
+        Schedule one probe per IP Address and hand off results in
+        completion order
+
+        :param backend: The probe backend every probe will use
+        :type backend: ProbeBackend
+        :param on_result: A callable accepting the IP Address and its trace
+        :type on_result: callable
+        :return: None
+        :rtype: None
+        """
+        await backend.start()
+        try:
+            await self._run_probes(backend, on_result)
+        finally:
+            await backend.stop()
+
+    async def _run_probes(self, backend: ProbeBackend, on_result) -> None:
+        """
+        Schedule one probe per IP Address and hand off results in
+        completion order, cancelling any that outlive the deadline
+
+        :param backend: The probe backend every probe will use
+        :type backend: ProbeBackend
+        :param on_result: A callable accepting the IP Address and its trace
+        :type on_result: callable
+        :return: None
+        :rtype: None
+        """
+        started = time.monotonic()
+        # The engine is reused by every cycle of the exporter mode
+        self.completed = {}
+        self.timed_out = set()
+        self._backend = backend
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._bucket = None
+        if self.packets_per_second:
+            self._bucket = TokenBucket(
+                self.packets_per_second,
+                max(self.packets_per_second, backend.packets_per_probe))
+
+        targets = self.ips
+        routes = None
+        if self.route_cache:
+            routes = RouteCache(
+                constants.ROUTE_CACHE_FILE, self.route_cache_ttl)
+            routes.load()
+            targets = await self._ping_cached_routes(routes, on_result)
+
+        topology = None
+        shared_trace = Trace()
+        if self.shared_hops:
+            topology = HopTopology(
+                constants.HOP_TOPOLOGY_FILE, self.topology_max_age)
+            topology.load()
+            shared_trace = await self._probe_shared_hops(topology)
+        first_ttl = len(shared_trace) + 1
+        learned = {}
+
+        tasks = {
+            asyncio.ensure_future(self._probe(ip, first_ttl)): ip
+            for ip in targets
+        }
+        timeout = None
+        if self.deadline:
+            timeout = max(self.deadline - (time.monotonic() - started), 0)
+        try:
+            for probe in asyncio.as_completed(tasks, timeout=timeout):
+                ip, trace, hops = await probe
+                if trace:
+                    self.completed[ip] = time.time()
+                    if first_ttl == 1:
+                        learned[ip] = hops
+                    else:
+                        tail = trace
+                        trace = shared_trace.copy()
+                        trace.update(tail)
+                        trace.shared = frozenset(shared_trace.ips)
+                    if routes is not None:
+                        routes.store(ip, [
+                            *enumerate(shared_trace, start=1), *hops
+                        ])
+                on_result(ip, trace)
+
+        except asyncio.TimeoutError:
+            for task, ip in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    self.timed_out.add(ip)
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if topology is not None and learned:
+            for ip, hops in learned.items():
+                topology.learn(ip, hops)
+            topology.learned_at = time.time()
+            topology.save()
+
+        if routes is not None:
+            routes.save()
+
+    async def _ping_cached_routes(self, routes: RouteCache,
+                                  on_result) -> list:
+        """
+        Ping the hops of every cached route in one batch and report a trace
+        for each target whose hops all still answer
+
+        :param routes: The cached routes to every target
+        :type routes: RouteCache
+        :param on_result: A callable accepting the IP Address and its trace
+        :type on_result: callable
+        :return: The IP Addresses that still need a full trace
+        :rtype: list
+        """
+        cached = [ip for ip in self.ips if routes.is_fresh(ip)]
+        if not cached:
+            return self.ips
+
+        hop_ips = list(dict.fromkeys(
+            host for ip in cached for host in routes.hosts(ip)))
+        if self._bucket is not None:
+            await self._bucket.acquire(
+                len(hop_ips) * constants.MTR_REPORT_CYCLES)
+        try:
+            results = await asyncio.wait_for(
+                self._backend.ping(hop_ips), self.timeout or None)
+        except asyncio.TimeoutError:
+            results = Trace()
+        if results is None:
+            return self.ips
+
+        answered = set()
+        for ip in cached:
+            trace = results.subset(routes.hosts(ip))
+            if routes.has_changed(ip, trace):
+                continue
+            # Every hop was pinged once for all the targets routed via it
+            trace.shared = frozenset(trace.ips)
+            trace.set_ttls(routes.numbered_hosts(ip))
+            answered.add(ip)
+            self.completed[ip] = time.time()
+            on_result(ip, trace)
+        return [ip for ip in self.ips if ip not in answered]
+
+    async def _probe_shared_hops(self, topology: HopTopology) -> dict:
+        """
+        Probe the hops every target's route starts with once, by tracing to
+        the last shared hop. If the route no longer matches what was learned,
+        the topology is forgotten so this run relearns it.
+
+        :param topology: The learned routes to every target
+        :type topology: HopTopology
+        :return: The trace of the shared hops, keyed by IP Address in hop
+        order, or an empty Trace() if every hop must be probed per target
+        :rtype: Trace
+        """
+        if not topology.is_fresh(self.ips):
+            return Trace()
+        prefix = topology.shared_prefix(self.ips)
+        if not prefix:
+            return Trace()
+
+        hops = []
+        try:
+            trace = await asyncio.wait_for(
+                self._backend.trace(prefix[-1], 1, len(prefix), hops),
+                self.timeout or None)
+        except asyncio.TimeoutError:
+            trace = Trace()
+
+        if list(trace) != prefix:
+            topology.forget()
+            return Trace()
+        return trace
+
+    async def _probe(self, ip: str, first_ttl: int) -> tuple:
+        """
+        Trace a single IP Address once a concurrency slot is free and the
+        packet budget allows it
+
+        :param ip: The IPv4 Address to trace
+        :type ip: str
+        :param first_ttl: The first hop to probe, after any shared hops
+        :type first_ttl: int
+        :return: The IP Address, its trace and its (hop index, host) tuples,
+        or an empty Trace() if the trace failed or timed out
+        :rtype: tuple
+        """
+        if self.jitter:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+
+        hops = []
+        async with self._semaphore:
+            if self._bucket is not None:
+                await self._bucket.acquire(self._backend.packets_per_probe)
+            try:
+                trace = await asyncio.wait_for(
+                    self._backend.trace(ip, first_ttl, 0, hops),
+                    self.timeout or None)
+            except asyncio.TimeoutError:
+                self.timed_out.add(ip)
+                return ip, Trace(), hops
+
+        return ip, trace, hops
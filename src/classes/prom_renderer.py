@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+PromRenderer() class file
+"""
+
+
+class PromRenderer:
+    """
+    Render series in the Prometheus text format into a single buffer.
+
+    Series are added in groups that share a key, such as the seven stat
+    series of one hop. The names and labels of a group are encoded once
+    into a template with a placeholder for every value, so rendering the
+    group again is one lookup and one format of its values. The cache keeps
+    the groups of the last render, so a renderer that is reused across
+    cycles, as the exporter mode does, only encodes hops it did not see in
+    the previous cycle and forgets hops that have gone away.
+
+    A group can also carry a timestamp, written after every value as the
+    OpenMetrics format allows.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        self._templates = {}
+        self._rendered = {}
+
+    def begin(self) -> None:
+        """
+        Start a new render with an empty buffer
+
+        :return: None
+        :rtype: None
+        """
+        self.buffer = bytearray()
+        self._rendered = {}
+
+    def add(self, key: tuple, values: tuple, series,
+            timestamp: float = None) -> None:
+        """
+        Append a group of series to the buffer
+
+        :param key: Identifies the group, e.g. the metric name and the IP
+        Address of a hop
+        :type key: tuple
+        :param values: The value of every series in the group
+        :type values: tuple
+        :param series: The name and labels of every series in the group, in
+        the same order as values, e.g. 'ping_stats{ip_addr="1.1.1.1",
+        stat="loss"}'. Only read the first time the key is seen
+        :type series: iterable
+        :param timestamp: The time of every value in the group in seconds
+        since the epoch, or None to write the values without one
+        :type timestamp: float
+        :return: None
+        :rtype: None
+        """
+        end = ' %r\n'
+        if timestamp is not None:
+            # A group is not always timestamped, e.g. a target that timed out
+            key = (key, 'timestamp')
+            end = ' %r %.3f\n'
+            values = tuple(
+                item for value in values for item in (value, timestamp))
+        template = self._rendered.get(key)
+        if template is None:
+            template = self._templates.get(key)
+            if template is None:
+                # Escape the labels, then add a placeholder for each value
+                text = end.join([
+                    line.replace('%', '%%') for line in series])
+                template = f'{text}{end}'.encode('utf-8')
+            self._rendered[key] = template
+        self.buffer += template % values
+
+    def comment(self, line: str) -> None:
+        """
+        Append a line that is not a series, such as # HELP or # TYPE metadata
+
+        :param line: The line, without the newline
+        :type line: str
+        :return: None
+        :rtype: None
+        """
+        self.buffer += f'{line}\n'.encode('utf-8')
+
+    def finish(self) -> bytes:
+        """
+        End the render, keeping only the groups it rendered in the cache
+
+        :return: The rendered series
+        :rtype: bytes
+        """
+        self._templates = self._rendered
+        self._rendered = {}
+        return bytes(self.buffer)
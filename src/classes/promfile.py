@@ -3,30 +3,50 @@
 PromFile() class file
 """
 
+import glob
 import os
+import zlib
+
+from src.classes.series_limiter import SeriesLimiter
+from src.constants import constants
 
 
 class PromFile:
     """
     Manage the creation of folders related to Prometheus text file collection.
-
-    This class uses both a main filepath and a temporary filepath.
     """
 
     REQUIRED_CONFIG_KEYS = [
-        'filepath', 'temp_filepath', 'filename'
+        'filepath', 'filename'
     ]
 
     OPTIONAL_CONFIG_KEYS = [
-        'temp_filename'
+        'histogram', 'histogram_buckets', 'rolling',
+        'top_hops', 'top_hops_by', 'max_series', 'max_idle_runs', 'shards',
+        'shard_groups', 'format'
+    ]
+
+    # Deprecated: the file is written through a temporary file next to it,
+    # so these keys are still accepted but ignored
+    DEPRECATED_CONFIG_KEYS = [
+        'temp_filepath', 'temp_filename'
     ]
 
     def __init__(self, config: dict) -> None:
+        self.histogram = False
+        self.histogram_buckets = constants.HISTOGRAM_BUCKETS
+        self.rolling = False
+        self.top_hops = constants.TOP_HOPS
+        self.top_hops_by = constants.TOP_HOPS_BY
+        self.max_series = constants.MAX_SERIES
+        self.max_idle_runs = constants.MAX_IDLE_RUNS
+        self.shards = 0
+        self.shard_groups = {}
+        self.format = constants.OUTPUT_FORMAT
         self.config = config
         for key, value in self.config.items():
-            setattr(self, key, value)
-        if 'temp_filename' not in self.config.keys():
-            self.temp_filename = self.filename
+            if key not in self.DEPRECATED_CONFIG_KEYS:
+                setattr(self, key, value)
 
     @property
     def config(self) -> dict:
@@ -64,7 +84,8 @@ class PromFile:
             # the operation
             for key in config[section].keys():
                 if (key not in self.REQUIRED_CONFIG_KEYS and
-                        key not in self.OPTIONAL_CONFIG_KEYS):
+                        key not in self.OPTIONAL_CONFIG_KEYS and
+                        key not in self.DEPRECATED_CONFIG_KEYS):
                     raise ValueError(
                         f'{key} key is invalid and must be removed!')
 
@@ -99,31 +120,6 @@ class PromFile:
             raise ValueError(f'{filepath} is not a string!')
         self._filepath = os.path.realpath(filepath)
 
-    @property
-    def temp_filepath(self) -> str:
-        """
-        temp_filepath.getter
-
-        :return: The full path to the temp file
-        :rtype: str
-        """
-        return self._temp_filepath
-
-    @temp_filepath.setter
-    def temp_filepath(self, temp_filepath) -> None:
-        """
-        temp_filepath.setter
-
-        :param filepath: A relative or absolute filepath
-        :type filepath: str
-        :raise ValueError: If filepath is not a string
-        :return: None
-        :rtype: None
-        """
-        if not isinstance(temp_filepath, str):
-            raise ValueError(f'{temp_filepath} is not a string!')
-        self._temp_filepath = os.path.realpath(temp_filepath)
-
     @property
     def filename(self) -> str:
         """
@@ -150,65 +146,350 @@ class PromFile:
         self._filename = filename
 
     @property
-    def temp_filename(self) -> str:
+    def histogram(self) -> bool:
+        """
+        histogram.getter
+
+        :return: True if round-trip times are exported as a histogram
+        :rtype: bool
+        """
+        return self._histogram
+
+    @histogram.setter
+    def histogram(self, histogram) -> None:
+        """
+        histogram.setter
+
+        :param histogram: True to export round-trip times as a histogram
+        :type histogram: bool
+        :raise ValueError: If histogram is not a boolean
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(histogram, bool):
+            raise ValueError(f'{histogram} is not a boolean!')
+        self._histogram = histogram
+
+    @property
+    def histogram_buckets(self) -> list:
+        """
+        histogram_buckets.getter
+
+        :return: The upper bounds of the histogram buckets, in milliseconds
+        :rtype: list
+        """
+        return self._histogram_buckets
+
+    @histogram_buckets.setter
+    def histogram_buckets(self, histogram_buckets) -> None:
+        """
+        histogram_buckets.setter
+
+        :param histogram_buckets: The upper bounds of the histogram buckets,
+        in milliseconds, in increasing order
+        :type histogram_buckets: list
+        :raise ValueError: If histogram_buckets is not a list of increasing
+        positive numbers
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(histogram_buckets, list) or
+                not histogram_buckets or
+                not all(isinstance(bound, (int, float)) and
+                        not isinstance(bound, bool) and bound > 0
+                        for bound in histogram_buckets) or
+                histogram_buckets != sorted(set(histogram_buckets))):
+            raise ValueError(
+                f'{histogram_buckets} is not a list of increasing positive '
+                'numbers!')
+        self._histogram_buckets = histogram_buckets
+
+    @property
+    def rolling(self) -> bool:
         """
-        temp_filename.getter
+        rolling.getter
 
-        :return: The temp filename
+        :return: True if the rolling window loss and latency are written
+        :rtype: bool
+        """
+        return self._rolling
+
+    @rolling.setter
+    def rolling(self, rolling: bool) -> None:
+        """
+        rolling.setter
+
+        :param rolling: True to write the rolling window loss and latency
+        :type rolling: bool
+        :raise ValueError: If rolling is not a boolean
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(rolling, bool):
+            raise ValueError(f'{rolling} is not a boolean!')
+        self._rolling = rolling
+
+    @property
+    def top_hops(self) -> int:
+        """
+        top_hops.getter
+
+        :return: The number of hops kept per target, 0 keeps every
+        hop
+        :rtype: int
+        """
+        return self._top_hops
+
+    @top_hops.setter
+    def top_hops(self, top_hops) -> None:
+        """
+        top_hops.setter
+
+        :param top_hops: The number of hops kept per target, 0 to keep
+        every hop
+        :type top_hops: int
+        :raise ValueError: If top_hops is not a non-negative integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(top_hops, int) or isinstance(top_hops, bool) or
+                top_hops < 0):
+            raise ValueError(f'{top_hops} is not a non-negative integer!')
+        self._top_hops = top_hops
+
+    @property
+    def top_hops_by(self) -> str:
+        """
+        top_hops_by.getter
+
+        :return: The statistic the top hops of every target are chosen by
         :rtype: str
         """
-        return self._temp_filename
+        return self._top_hops_by
 
-    @temp_filename.setter
-    def temp_filename(self, temp_filename) -> None:
+    @top_hops_by.setter
+    def top_hops_by(self, top_hops_by) -> None:
         """
-        temp_filename.setter
+        top_hops_by.setter
 
-        :param filename: A name of a file
-        :type filename: str
-        :raise ValueError: If filename is not a string
+        :param top_hops_by: One of SeriesLimiter.RANK_BY
+        :type top_hops_by: str
+        :raise ValueError: If top_hops_by is not supported
         :return: None
         :rtype: None
         """
-        if not isinstance(temp_filename, str):
-            raise ValueError(f'{temp_filename} is not a string!')
-        self._temp_filename = temp_filename
+        if top_hops_by not in SeriesLimiter.RANK_BY:
+            raise ValueError(f'{top_hops_by} is not a valid statistic!')
+        self._top_hops_by = top_hops_by
 
-    def create_filepath(self) -> bool:
+    @property
+    def max_series(self) -> int:
         """
-        Create the folder from self.filepath
+        max_series.getter
 
-        :return: True if folder is created or already exists,
-        False if not created
+        :return: The maximum number of series written, 0 for no
+        limit
+        :rtype: int
+        """
+        return self._max_series
+
+    @max_series.setter
+    def max_series(self, max_series) -> None:
+        """
+        max_series.setter
+
+        :param max_series: The maximum number of series written, 0 for no
+        limit
+        :type max_series: int
+        :raise ValueError: If max_series is not a non-negative integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(max_series, int) or
+                isinstance(max_series, bool) or max_series < 0):
+            raise ValueError(f'{max_series} is not a non-negative integer!')
+        self._max_series = max_series
+
+    @property
+    def max_idle_runs(self) -> int:
+        """
+        max_idle_runs.getter
+
+        :return: The number of runs a hop may go unseen before its
+        histogram is dropped, 0 to never drop it
+        :rtype: int
+        """
+        return self._max_idle_runs
+
+    @max_idle_runs.setter
+    def max_idle_runs(self, max_idle_runs) -> None:
+        """
+        max_idle_runs.setter
+
+        :param max_idle_runs: The number of runs a hop may go unseen before
+        its histogram is dropped, 0 to never drop it
+        :type max_idle_runs: int
+        :raise ValueError: If max_idle_runs is not a non-negative integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(max_idle_runs, int) or
+                isinstance(max_idle_runs, bool) or max_idle_runs < 0):
+            raise ValueError(f'{max_idle_runs} is not a non-negative integer!')
+        self._max_idle_runs = max_idle_runs
+
+    @property
+    def shards(self) -> int:
+        """
+        shards.getter
+
+        :return: The number of files targets are spread over by hash, 0 to
+        write one file
+        :rtype: int
+        """
+        return self._shards
+
+    @shards.setter
+    def shards(self, shards) -> None:
+        """
+        shards.setter
+
+        :param shards: The number of files targets are spread over by hash,
+        0 to write one file
+        :type shards: int
+        :raise ValueError: If shards is not a non-negative integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(shards, int) or isinstance(shards, bool) or
+                shards < 0):
+            raise ValueError(f'{shards} is not a non-negative integer!')
+        self._shards = shards
+
+    @property
+    def shard_groups(self) -> dict:
+        """
+        shard_groups.getter
+
+        :return: The targets of every shard, keyed by shard name
+        :rtype: dict
+        """
+        return self._shard_groups
+
+    @shard_groups.setter
+    def shard_groups(self, shard_groups) -> None:
+        """
+        shard_groups.setter
+
+        :param shard_groups: The targets of every shard, keyed by a shard name
+        made of letters, digits, '_' and '-'
+        :type shard_groups: dict
+        :raise ValueError: If shard_groups is not a dictionary of lists
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(shard_groups, dict) or
+                not all(isinstance(name, str) and name and
+                        name.replace('_', '').replace('-', '').isalnum() and
+                        isinstance(targets, list)
+                        for name, targets in shard_groups.items())):
+            raise ValueError(
+                f'{shard_groups} is not a dictionary of lists of targets!')
+        self._shard_groups = shard_groups
+        self._groups = {
+            target: name
+            for name, targets in shard_groups.items()
+            for target in targets
+        }
+
+    @property
+    def format(self) -> str:
+        """
+        format.getter
+
+        :return: The format the metrics are written in
+        :rtype: str
+        """
+        return self._format
+
+    @format.setter
+    def format(self, output_format) -> None:
+        """
+        format.setter
+
+        :param output_format: One of constants.OUTPUT_FORMATS
+        :type output_format: str
+        :raise ValueError: If output_format is not supported
+        :return: None
+        :rtype: None
+        """
+        if output_format not in constants.OUTPUT_FORMATS:
+            raise ValueError(f'{output_format} is not a valid format!')
+        self._format = output_format
+
+    @property
+    def sharded(self) -> bool:
+        """
+        sharded.getter
+
+        :return: True if targets are spread over several files
         :rtype: bool
         """
-        try:
-            os.mkdir(self.filepath, mode=0o755)
-            return True
-        except FileExistsError:
-            # This indicates the folder already exists
-            return True
-        except FileNotFoundError:
-            # This indicates that a folder in the path, a parent folder,
-            # does not exist
-            print(f'Parent directory not found in {self.filepath}!')
-            return False
-        except PermissionError:
-            # The user running the script does not have permissions to
-            # create a new folder in this path
-            print(f'Permission denied while creating {self.filepath}!')
-            return False
+        return bool(self.shard_groups or self.shards)
+
+    def shard_of(self, target: str) -> str:
+        """
+        Find the shard a target is written to
+
+        :param target: The IP Address of a target
+        :type target: str
+        :return: The name of the group holding the target, or 'default' if
+        none does, or the number of the shard the target hashes to, or None
+        if output is not sharded
+        :rtype: str
+        """
+        if self.shard_groups:
+            return self._groups.get(target, constants.DEFAULT_SHARD)
+        if self.shards:
+            return str(zlib.crc32(target.encode('utf-8')) % self.shards)
+        return None
+
+    def shard_filename(self, shard: str) -> str:
+        """
+        Return the full path of the file of a shard
+
+        :param shard: The name of the shard
+        :type shard: str
+        :return: The filename with the shard name before its extension, e.g.
+        ping_stats.3.prom
+        :rtype: str
+        """
+        stem, extension = os.path.splitext(self.filename)
+        return os.path.join(self.filepath, f'{stem}.{shard}{extension}')
+
+    def shard_filenames(self) -> list:
+        """
+        Find the shard files in self.filepath, including the files of shards
+        that were since removed from the configuration
+
+        :return: The full paths of every file named like a shard file
+        :rtype: list
+        """
+        stem, extension = os.path.splitext(self.filename)
+        pattern = f'{glob.escape(stem)}.*{glob.escape(extension)}'
+        return sorted(glob.glob(os.path.join(
+            glob.escape(self.filepath), pattern)))
 
-    def create_temp_filepath(self) -> bool:
+    def create_filepath(self) -> bool:
         """
-        Create the folder from self.temp_filepath
+        Create the folder from self.filepath
 
         :return: True if folder is created or already exists,
         False if not created
         :rtype: bool
         """
         try:
-            os.mkdir(self.temp_filepath, mode=0o755)
+            os.mkdir(self.filepath, mode=0o755)
             return True
         except FileExistsError:
             # This indicates the folder already exists
@@ -216,10 +497,10 @@ class PromFile:
         except FileNotFoundError:
             # This indicates that a folder in the path, a parent folder,
             # does not exist
-            print(f'Parent directory not found in {self.temp_filepath}!')
+            print(f'Parent directory not found in {self.filepath}!')
             return False
         except PermissionError:
             # The user running the script does not have permissions to
             # create a new folder in this path
-            print(f'Permission denied while creating {self.temp_filepath}!')
+            print(f'Permission denied while creating {self.filepath}!')
             return False
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Pushgateway() class file
+"""
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import http.client
+import socket
+import urllib.parse
+
+from src.classes.connection_pool import ConnectionPool
+from src.classes.state_file import StateFile
+from src.constants import constants
+
+
+class Pushgateway:
+    """
+    PUT rendered metrics to a Prometheus Pushgateway.
+
+    Every group of metrics, the main group and one per shard, replaces its
+    own grouping key below /metrics/job/<job>/instance/<instance>, the
+    shards with an added shard label. A digest of every group pushed is
+    kept in state_file, so a run only PUTs the groups that changed, all at
+    once over a pool of persistent connections, and deletes the groups of
+    shards that no longer exist. A group holding the last success time of a
+    target changes whenever the target succeeds, so in practice only the
+    groups of shards whose targets all kept failing are skipped.
+    """
+
+    REQUIRED_CONFIG_KEYS = [
+        'url'
+    ]
+
+    OPTIONAL_CONFIG_KEYS = [
+        'job', 'instance', 'connections', 'timeout'
+    ]
+
+    HEADERS = {
+        'Content-Type': 'text/plain; version=0.0.4; charset=utf-8',
+        'User-Agent': 'ping-stats'
+    }
+
+    def __init__(self, config: dict,
+                 state_file: str = constants.PUSHGATEWAY_STATE_FILE) -> None:
+        self.job = constants.PUSHGATEWAY_JOB
+        self.instance = socket.gethostname()
+        self.connections = constants.PUSHGATEWAY_CONNECTIONS
+        self.timeout = constants.PUSHGATEWAY_TIMEOUT
+        self.config = config
+        for key, value in self.config.items():
+            setattr(self, key, value)
+        self.state_file = state_file
+        self.pushed = {}
+        self._pool = ConnectionPool(self.url, self.timeout)
+
+    @property
+    def config(self) -> dict:
+        """
+        config.getter
+
+        :return: A dictionary containing the pushgateway section of the
+        current configuration
+        :rtype: dict
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        """
+        config.setter
+
+        :param config: A configuration of the current program
+        :type config: dict
+        :raise ValueError: If a required key is missing
+        :raise ValueError: If an unknown key is present
+        :raise KeyError: If the section is missing
+        :return: None
+        :rtype: None
+        """
+        self._config = {}
+        section = 'pushgateway'
+        try:
+            for key in self.REQUIRED_CONFIG_KEYS:
+                if key not in config[section].keys():
+                    raise ValueError(f'{key} key is missing but is required!')
+
+            for key in config[section].keys():
+                if (key not in self.REQUIRED_CONFIG_KEYS and
+                        key not in self.OPTIONAL_CONFIG_KEYS):
+                    raise ValueError(
+                        f'{key} key is invalid and must be removed!')
+
+        except KeyError as e:
+            raise KeyError(f'{section} section is missing!') from e
+
+        self._config = config[section]
+
+    @property
+    def url(self) -> str:
+        """
+        url.getter
+
+        :return: The URL of the Pushgateway
+        :rtype: str
+        """
+        return self._url
+
+    @url.setter
+    def url(self, url) -> None:
+        """
+        url.setter
+
+        :param url: An http:// or https:// URL
+        :type url: str
+        :raise ValueError: If url is not an http:// or https:// URL
+        :return: None
+        :rtype: None
+        """
+        parts = urllib.parse.urlsplit(url) if isinstance(url, str) else None
+        if (parts is None or parts.scheme not in ('http', 'https') or
+                not parts.hostname):
+            raise ValueError(f'{url} is not an http:// or https:// URL!')
+        self._url = url
+        self._path = parts.path.rstrip('/')
+
+    @property
+    def job(self) -> str:
+        """
+        job.getter
+
+        :return: The job label of every group
+        :rtype: str
+        """
+        return self._job
+
+    @job.setter
+    def job(self, job) -> None:
+        """
+        job.setter
+
+        :param job: A non-empty string
+        :type job: str
+        :raise ValueError: If job is not a non-empty string
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(job, str) or not job:
+            raise ValueError(f'{job} is not a non-empty string!')
+        self._job = job
+
+    @property
+    def instance(self) -> str:
+        """
+        instance.getter
+
+        :return: The instance label of every group
+        :rtype: str
+        """
+        return self._instance
+
+    @instance.setter
+    def instance(self, instance) -> None:
+        """
+        instance.setter
+
+        :param instance: A non-empty string, e.g. the hostname
+        :type instance: str
+        :raise ValueError: If instance is not a non-empty string
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(instance, str) or not instance:
+            raise ValueError(f'{instance} is not a non-empty string!')
+        self._instance = instance
+
+    @property
+    def connections(self) -> int:
+        """
+        connections.getter
+
+        :return: The maximum number of groups pushed at a time
+        :rtype: int
+        """
+        return self._connections
+
+    @connections.setter
+    def connections(self, connections) -> None:
+        """
+        connections.setter
+
+        :param connections: A positive number of connections
+        :type connections: int
+        :raise ValueError: If connections is not a positive integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(connections, int) or
+                isinstance(connections, bool) or connections < 1):
+            raise ValueError(f'{connections} is not a positive integer!')
+        self._connections = connections
+
+    @property
+    def timeout(self) -> float:
+        """
+        timeout.getter
+
+        :return: The number of seconds a request may take
+        :rtype: float
+        """
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout) -> None:
+        """
+        timeout.setter
+
+        :param timeout: A positive number of seconds
+        :type timeout: float
+        :raise ValueError: If timeout is not a positive number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(timeout, (int, float)) or
+                isinstance(timeout, bool) or timeout <= 0):
+            raise ValueError(f'{timeout} is not a positive number!')
+        self._timeout = timeout
+
+    @staticmethod
+    def label(name: str, value: str) -> str:
+        """
+        Encode a label of a grouping key as path segments
+
+        :param name: The label name
+        :type name: str
+        :param value: The label value, base64 encoded if it holds a /
+        :type value: str
+        :return: The path segments
+        :rtype: str
+        """
+        if '/' in value:
+            encoded = base64.urlsafe_b64encode(value.encode('utf-8'))
+            return f'/{name}@base64/{encoded.decode("ascii")}'
+        return f'/{name}/{urllib.parse.quote(value, safe="")}'
+
+    def grouping_path(self, shard: str = None) -> str:
+        """
+        Build the path of a group
+
+        :param shard: The shard of the group, None for the main group
+        :type shard: str
+        :return: The path
+        :rtype: str
+        """
+        path = (f'{self._path}/metrics' + self.label('job', self.job) +
+                self.label('instance', self.instance))
+        if shard is not None:
+            path += self.label('shard', shard)
+        return path
+
+    def load(self) -> bool:
+        """
+        Read the digests of the groups pushed by earlier runs
+
+        :return: True if the state was loaded or no state file exists yet,
+        False if the file could not be read or is not valid JSON
+        :rtype: bool
+        """
+        data = StateFile(self.state_file).load()
+        if data is None:
+            return False
+        self.pushed = data.get('pushed', {})
+        return True
+
+    def save(self) -> bool:
+        """
+        Write the digests of the groups pushed to the state file
+
+        :return: True if the file was written, False if it could not be
+        :rtype: bool
+        """
+        return StateFile(self.state_file).save({'pushed': self.pushed})
+
+    def _send(self, method: str, path: str, body: bytes = None) -> bool:
+        """
+        PUT or DELETE one group
+
+        :param method: PUT or DELETE
+        :type method: str
+        :param path: The path of the group
+        :type path: str
+        :param body: The metrics of the group, for PUT
+        :type body: bytes
+        :return: True if the Pushgateway accepted the request
+        :rtype: bool
+        """
+        try:
+            status, data = self._pool.request(
+                method, path, body, self.HEADERS)
+
+        except (OSError, http.client.HTTPException) as e:
+            print(f'{method} {path} failed: {e}')
+            return False
+
+        if not 200 <= status < 300:
+            print(f'{method} {path} failed: {status} {data[:200]!r}')
+            return False
+        return True
+
+    def push(self, groups: dict) -> bool:
+        """
+        PUT the groups that changed since they were last pushed and delete
+        the groups that are gone, all at the same time
+
+        :param groups: The rendered metrics of every group, keyed by shard,
+        None for the main group
+        :type groups: dict
+        :return: True if every request succeeded
+        :rtype: bool
+        """
+        requests = []
+        paths = set()
+        for shard, body in groups.items():
+            path = self.grouping_path(shard)
+            paths.add(path)
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            if self.pushed.get(path) != digest:
+                requests.append(('PUT', path, body, digest))
+        for path in self.pushed.keys() - paths:
+            requests.append(('DELETE', path, None, None))
+        if not requests:
+            return True
+
+        workers = min(len(requests), self.connections)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(
+                lambda request: self._send(*request[:3]), requests))
+
+        for (method, path, _, digest), sent in zip(requests, done):
+            if not sent:
+                continue
+            if method == 'PUT':
+                self.pushed[path] = digest
+            else:
+                del self.pushed[path]
+        return all(done)
+
+    def close(self) -> None:
+        """
+        Close every pooled connection
+
+        :return: None
+        :rtype: None
+        """
+        self._pool.close()
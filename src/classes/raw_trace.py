@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+RawTrace() class file
+"""
+
+from array import array
+import math
+
+from src.classes.hop import Hop
+from src.classes.trace import Trace
+
+
+class RawTrace:
+    """
+    Build a trace incrementally from the line-oriented records printed by
+    `mtr --raw`, keeping every round-trip time as a per-hop sample.
+
+    The records used are:
+        h <hop> <ip>          the host answering at a hop
+        x <hop> <seq>         a probe was transmitted to a hop
+        p <hop> <usec> <seq>  a reply arrived from a hop after usec
+        d <hop> <name>        the reverse DNS name of a hop
+    Hops are numbered from 0 by mtr and from 1 here, to match the report.
+    """
+
+    def __init__(self) -> None:
+        self.hosts = {}
+        self.names = {}
+        self.sent = {}
+        self.samples = {}
+
+    def feed(self, line) -> None:
+        """
+        Consume a single raw record, ignoring anything unrecognised
+
+        :param line: A line of `mtr --raw` output
+        :type line: bytes or str
+        :return: None
+        :rtype: None
+        """
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        fields = line.split()
+        if len(fields) < 3 or not fields[1].isdigit():
+            return
+
+        hop = int(fields[1]) + 1
+        record = fields[0]
+        try:
+            if record == 'h':
+                self.add_host(hop, fields[2])
+            elif record == 'x':
+                self.add_transmit(hop)
+            elif record == 'p':
+                self.add_ping(hop, int(fields[2]) / 1000)
+            elif record == 'd':
+                self.names[hop] = fields[2]
+        except ValueError:
+            return
+
+    def add_host(self, hop: int, host: str) -> None:
+        """
+        Record the host answering at a hop
+
+        :param hop: The hop index, starting at 1
+        :type hop: int
+        :param host: The IP Address of the host
+        :type host: str
+        :return: None
+        :rtype: None
+        """
+        self.hosts[hop] = host
+
+    def add_transmit(self, hop: int) -> None:
+        """
+        Record a probe sent to a hop
+
+        :param hop: The hop index, starting at 1
+        :type hop: int
+        :return: None
+        :rtype: None
+        """
+        self.sent[hop] = self.sent.get(hop, 0) + 1
+
+    def add_ping(self, hop: int, rtt: float) -> None:
+        """
+        Record a reply from a hop
+
+        :param hop: The hop index, starting at 1
+        :type hop: int
+        :param rtt: The round-trip time in milliseconds
+        :type rtt: float
+        :return: None
+        :rtype: None
+        """
+        try:
+            self.samples[hop].append(rtt)
+        except KeyError:
+            self.samples[hop] = array('d', [rtt])
+
+    @property
+    def hops(self) -> list:
+        """
+        hops.getter
+
+        :return: Every hop that has been seen in order, as (hop index, host)
+        tuples, using '???' for hops that never answered
+        :rtype: list
+        """
+        seen = set(self.hosts) | set(self.sent)
+        if not seen:
+            return []
+        return [(hop, self.hosts.get(hop, '???'))
+                for hop in range(1, max(seen) + 1)]
+
+    def to_trace(self, cycles: int) -> Trace:
+        """
+        Summarise the samples into the same Trace() produced by the report
+        and json parsers, keeping the samples of each host in trace.samples
+
+        :param cycles: The number of cycles requested, used as the sent
+        count for mtr versions that do not print transmit records
+        :type cycles: int
+        :return: The per-hop statistics keyed by IP Address
+        :rtype: Trace
+        """
+        trace = Trace()
+        for hop, host in sorted(self.hosts.items()):
+            samples = self.samples.get(hop, array('d'))
+            received = len(samples)
+            sent = max(self.sent.get(hop, cycles) if self.sent else cycles,
+                       received)
+            loss = 0.0
+            if sent:
+                loss = round((sent - received) / sent * 100, 1)
+
+            hop = Hop(host, loss, sent)
+            if received:
+                hop.average = sum(samples) / received
+                hop.last = samples[-1]
+                hop.best = min(samples)
+                hop.worst = max(samples)
+            if received > 1:
+                hop.stdev = math.sqrt(
+                    sum((x - hop.average) ** 2 for x in samples) /
+                    (received - 1))
+            try:
+                trace.put(host, *(getattr(hop, name) for name in Hop.STATS))
+            except ValueError:
+                continue
+            trace.samples[host] = samples
+        return trace
+
+    def samples_by_ip(self) -> dict:
+        """
+        Return every round-trip time sample keyed by IP Address
+
+        :return: A dictionary of sample arrays keyed by IP Address
+        :rtype: dict
+        """
+        return {
+            host: self.samples.get(hop, array('d'))
+            for hop, host in self.hosts.items()
+        }
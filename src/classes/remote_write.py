@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+RemoteWrite() class file
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import os
+import socket
+import time
+import urllib.parse
+
+try:
+    import snappy
+except ImportError:
+    snappy = None
+
+from src.classes.atomic_file import AtomicFile
+from src.classes.connection_pool import ConnectionPool
+from src.classes.write_request import WriteRequest
+from src.constants import constants
+
+
+class RemoteWrite:
+    """
+    Push WriteRequests to a Prometheus remote_write receiver.
+
+    Every request is snappy compressed and POSTed over a pool of persistent
+    HTTP connections, with up to connections requests in flight at a time.
+    Requests that fail because the receiver is down, or answers 429 or 5xx,
+    are spooled to files in spool_directory and pushed again, oldest first,
+    before the requests of the next push, so no series goes back in time.
+    At most max_queue requests are spooled and the oldest are dropped
+    beyond that. Requests the receiver rejects with any other status are
+    dropped, as sending them again cannot succeed.
+    """
+
+    REQUIRED_CONFIG_KEYS = [
+        'url'
+    ]
+
+    OPTIONAL_CONFIG_KEYS = [
+        'batch_size', 'connections', 'timeout', 'max_queue', 'labels'
+    ]
+
+    HEADERS = {
+        'Content-Encoding': 'snappy',
+        'Content-Type': 'application/x-protobuf',
+        'User-Agent': 'ping-stats',
+        'X-Prometheus-Remote-Write-Version': '0.1.0'
+    }
+
+    def __init__(self, config: dict,
+                 spool_directory: str = constants.REMOTE_WRITE_SPOOL) -> None:
+        self.batch_size = constants.REMOTE_WRITE_BATCH_SIZE
+        self.connections = constants.REMOTE_WRITE_CONNECTIONS
+        self.timeout = constants.REMOTE_WRITE_TIMEOUT
+        self.max_queue = constants.REMOTE_WRITE_MAX_QUEUE
+        self.labels = {'instance': socket.gethostname()}
+        self.config = config
+        for key, value in self.config.items():
+            setattr(self, key, value)
+        self.spool_directory = spool_directory
+        self.dropped = 0
+        self._pool = ConnectionPool(self.url, self.timeout)
+        self._sequence = 0
+
+    @property
+    def config(self) -> dict:
+        """
+        config.getter
+
+        :return: A dictionary containing the remote_write section of the
+        current configuration
+        :rtype: dict
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        """
+        config.setter
+
+        :param config: A configuration of the current program
+        :type config: dict
+        :raise ValueError: If a required key is missing
+        :raise ValueError: If an unknown key is present
+        :raise KeyError: If the section is missing
+        :return: None
+        :rtype: None
+        """
+        self._config = {}
+        section = 'remote_write'
+        try:
+            for key in self.REQUIRED_CONFIG_KEYS:
+                if key not in config[section].keys():
+                    raise ValueError(f'{key} key is missing but is required!')
+
+            for key in config[section].keys():
+                if (key not in self.REQUIRED_CONFIG_KEYS and
+                        key not in self.OPTIONAL_CONFIG_KEYS):
+                    raise ValueError(
+                        f'{key} key is invalid and must be removed!')
+
+        except KeyError as e:
+            raise KeyError(f'{section} section is missing!') from e
+
+        self._config = config[section]
+
+    @property
+    def url(self) -> str:
+        """
+        url.getter
+
+        :return: The URL of the remote_write receiver
+        :rtype: str
+        """
+        return self._url
+
+    @url.setter
+    def url(self, url) -> None:
+        """
+        url.setter
+
+        :param url: An http:// or https:// URL
+        :type url: str
+        :raise ValueError: If url is not an http:// or https:// URL
+        :return: None
+        :rtype: None
+        """
+        parts = urllib.parse.urlsplit(url) if isinstance(url, str) else None
+        if (parts is None or parts.scheme not in ('http', 'https') or
+                not parts.hostname):
+            raise ValueError(f'{url} is not an http:// or https:// URL!')
+        self._url = url
+        self._path = parts.path or '/'
+        if parts.query:
+            self._path = f'{self._path}?{parts.query}'
+
+    @property
+    def batch_size(self) -> int:
+        """
+        batch_size.getter
+
+        :return: The maximum number of series per request
+        :rtype: int
+        """
+        return self._batch_size
+
+    @batch_size.setter
+    def batch_size(self, batch_size) -> None:
+        """
+        batch_size.setter
+
+        :param batch_size: A positive number of series
+        :type batch_size: int
+        :raise ValueError: If batch_size is not a positive integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(batch_size, int) or
+                isinstance(batch_size, bool) or batch_size < 1):
+            raise ValueError(f'{batch_size} is not a positive integer!')
+        self._batch_size = batch_size
+
+    @property
+    def connections(self) -> int:
+        """
+        connections.getter
+
+        :return: The maximum number of requests in flight at a time
+        :rtype: int
+        """
+        return self._connections
+
+    @connections.setter
+    def connections(self, connections) -> None:
+        """
+        connections.setter
+
+        :param connections: A positive number of connections
+        :type connections: int
+        :raise ValueError: If connections is not a positive integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(connections, int) or
+                isinstance(connections, bool) or connections < 1):
+            raise ValueError(f'{connections} is not a positive integer!')
+        self._connections = connections
+
+    @property
+    def timeout(self) -> float:
+        """
+        timeout.getter
+
+        :return: The number of seconds a request may take
+        :rtype: float
+        """
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout) -> None:
+        """
+        timeout.setter
+
+        :param timeout: A positive number of seconds
+        :type timeout: float
+        :raise ValueError: If timeout is not a positive number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(timeout, (int, float)) or
+                isinstance(timeout, bool) or timeout <= 0):
+            raise ValueError(f'{timeout} is not a positive number!')
+        self._timeout = timeout
+
+    @property
+    def max_queue(self) -> int:
+        """
+        max_queue.getter
+
+        :return: The maximum number of requests spooled for a retry
+        :rtype: int
+        """
+        return self._max_queue
+
+    @max_queue.setter
+    def max_queue(self, max_queue) -> None:
+        """
+        max_queue.setter
+
+        :param max_queue: A number of requests, 0 to never retry
+        :type max_queue: int
+        :raise ValueError: If max_queue is not a non-negative integer
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(max_queue, int) or
+                isinstance(max_queue, bool) or max_queue < 0):
+            raise ValueError(f'{max_queue} is not a non-negative integer!')
+        self._max_queue = max_queue
+
+    @property
+    def labels(self) -> dict:
+        """
+        labels.getter
+
+        :return: The labels added to every series
+        :rtype: dict
+        """
+        return self._labels
+
+    @labels.setter
+    def labels(self, labels) -> None:
+        """
+        labels.setter
+
+        :param labels: Label values keyed by label name, e.g. the instance
+        and the site the series come from
+        :type labels: dict
+        :raise ValueError: If labels is not a dictionary of strings
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(labels, dict) or
+                not all(isinstance(name, str) and isinstance(value, str) and
+                        name.isidentifier() and not name.startswith('__')
+                        for name, value in labels.items())):
+            raise ValueError(f'{labels} is not a dictionary of labels!')
+        self._labels = labels
+
+    @staticmethod
+    def compress(data: bytes) -> bytes:
+        """
+        Compress a request in the snappy block format
+
+        Without python-snappy the data is written as literals, which every
+        snappy decoder accepts but which is not any smaller
+
+        :param data: The serialized WriteRequest
+        :type data: bytes
+        :return: The compressed request
+        :rtype: bytes
+        """
+        if snappy is not None:
+            return snappy.compress(data)
+        compressed = bytearray(WriteRequest.varint(len(data)))
+        if data:
+            # A literal of up to 2^32 bytes, with its length - 1 in 4 bytes
+            compressed.append(63 << 2)
+            compressed += (len(data) - 1).to_bytes(4, 'little')
+            compressed += data
+        return bytes(compressed)
+
+    def _send(self, payload: bytes) -> bool:
+        """
+        POST one compressed request
+
+        :param payload: The compressed request
+        :type payload: bytes
+        :return: True if the request was accepted or can never be, False if
+        it should be sent again later
+        :rtype: bool
+        """
+        try:
+            status, body = self._pool.request(
+                'POST', self._path, payload, self.HEADERS)
+
+        except (OSError, http.client.HTTPException) as e:
+            print(f'remote_write to {self.url} failed: {e}')
+            return False
+
+        if 200 <= status < 300:
+            return True
+        if status == 429 or status >= 500:
+            print(f'remote_write to {self.url} failed: {status}')
+            return False
+        print(f'remote_write to {self.url} rejected a request: '
+              f'{status} {body[:200]!r}')
+        return True
+
+    def _send_all(self, payloads: list) -> list:
+        """
+        POST compressed requests concurrently over the pool
+
+        :param payloads: The compressed requests
+        :type payloads: list
+        :return: Whether each request is done, see _send()
+        :rtype: list
+        """
+        if not payloads:
+            return []
+        workers = min(len(payloads), self.connections)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._send, payloads))
+
+    def _spooled(self) -> list:
+        """
+        List the spooled requests, oldest first
+
+        :return: The paths of the spooled requests
+        :rtype: list
+        """
+        try:
+            names = os.listdir(self.spool_directory)
+        except FileNotFoundError:
+            return []
+        return [
+            os.path.join(self.spool_directory, name)
+            for name in sorted(names) if name.endswith('.bin')
+        ]
+
+    def _spool(self, payloads: list) -> None:
+        """
+        Spool requests for a later push, dropping the oldest beyond
+        max_queue
+
+        :param payloads: The compressed requests, oldest first
+        :type payloads: list
+        :return: None
+        :rtype: None
+        """
+        if not self.max_queue:
+            self.dropped += len(payloads)
+            return
+        os.makedirs(self.spool_directory, mode=0o755, exist_ok=True)
+        for payload in payloads:
+            # Names sort in the order the requests were spooled
+            self._sequence += 1
+            name = f'{time.time_ns():020d}-{self._sequence:06d}.bin'
+            AtomicFile(os.path.join(self.spool_directory, name)).write(
+                payload)
+        spooled = self._spooled()
+        for filename in spooled[:max(len(spooled) - self.max_queue, 0)]:
+            os.unlink(filename)
+            self.dropped += 1
+
+    def push(self, requests: list) -> bool:
+        """
+        Push the spooled requests, then new requests, spooling the new
+        requests if the receiver cannot take them
+
+        :param requests: The WriteRequests to push
+        :type requests: list
+        :raise OSError: If a request could not be spooled
+        :return: True if every request was pushed, False if any is spooled
+        :rtype: bool
+        """
+        payloads = [
+            self.compress(request.encode()) for request in requests
+            if len(request)
+        ]
+        # Older samples first, and none at all while the receiver is down
+        spooled = self._spooled()
+        for start in range(0, len(spooled), self.connections):
+            filenames = spooled[start:start + self.connections]
+            retried = []
+            for filename in filenames:
+                with open(filename, 'rb') as file:
+                    retried.append(file.read())
+            done = self._send_all(retried)
+            for filename, sent in zip(filenames, done):
+                if sent:
+                    os.unlink(filename)
+            if not all(done):
+                self._spool(payloads)
+                return False
+
+        done = self._send_all(payloads)
+        self._spool([
+            payload for payload, sent in zip(payloads, done) if not sent])
+        return all(done)
+
+    def close(self) -> None:
+        """
+        Close every pooled connection
+
+        :return: None
+        :rtype: None
+        """
+        self._pool.close()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+ReplayBackend() class file
+"""
+
+import asyncio
+import os
+import random
+import re
+
+from src.classes.hop import Hop
+from src.classes.mtr import MTR
+from src.classes.probe_backend import ProbeBackend
+from src.classes.trace import Trace
+from src.constants import constants
+
+
+class ReplayBackend(ProbeBackend):
+    """
+    Trace by replaying recorded mtr output instead of touching the network,
+    so a run can be reproduced offline or load tested with any number of
+    targets.
+
+    Recordings are read from a directory and named after the IP Address and
+    the mtr mode they were captured with, e.g. 1.1.1.1.json, 8.8.8.8.report
+    or 9.9.9.9.raw. IP Addresses without a recording of their own use a
+    recording named default, if one exists.
+    """
+
+    name = 'replay'
+
+    REQUIRED_CONFIG_KEYS = [
+        'directory'
+    ]
+
+    OPTIONAL_CONFIG_KEYS = [
+        'latency', 'jitter', 'failure_rate', 'timeout_rate', 'seed'
+    ]
+
+    EXTENSIONS = {
+        'report': 'report',
+        'txt': 'report',
+        'json': 'json',
+        'raw': 'raw'
+    }
+
+    def __init__(self, config: dict) -> None:
+        self.latency = 0.0
+        self.jitter = 0.0
+        self.failure_rate = 0.0
+        self.timeout_rate = 0.0
+        self.seed = None
+        self.config = config
+        for key, value in self.config.items():
+            setattr(self, key, value)
+        self.random = random.Random(self.seed)
+        self.recordings = {}
+        self.hop_stats = None
+
+    @property
+    def config(self) -> dict:
+        """
+        config.getter
+
+        :return: A dictionary containing the replay section of the current
+        configuration
+        :rtype: dict
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        """
+        config.setter
+
+        :param config: A configuration of the current program
+        :type config: dict
+        :raise ValueError: If a required key is missing
+        :raise ValueError: If an unknown key is present
+        :raise KeyError: If a required section is missing
+        :return: None
+        :rtype: None
+        """
+        self._config = {}
+        section = 'replay'
+        try:
+            # Ensure required configuration to operate is present
+            for key in self.REQUIRED_CONFIG_KEYS:
+                if key not in config[section].keys():
+                    raise ValueError(f'{key} key is missing but is required!')
+
+            # Ensure there aren't any unknown keys that could hurt
+            # the operation
+            for key in config[section].keys():
+                if (key not in self.REQUIRED_CONFIG_KEYS and
+                        key not in self.OPTIONAL_CONFIG_KEYS):
+                    raise ValueError(
+                        f'{key} key is invalid and must be removed!')
+
+        except KeyError as e:
+            raise KeyError(
+                f'{section} section is missing but is required!') from e
+
+        self._config = config[section]
+
+    @property
+    def directory(self) -> str:
+        """
+        directory.getter
+
+        :return: The full path to the directory of recordings
+        :rtype: str
+        """
+        return self._directory
+
+    @directory.setter
+    def directory(self, directory) -> None:
+        """
+        directory.setter
+
+        :param directory: A relative or absolute path to a directory
+        :type directory: str
+        :raise ValueError: If directory is not a string or not a directory
+        :return: None
+        :rtype: None
+        """
+        if not isinstance(directory, str):
+            raise ValueError(f'{directory} is not a string!')
+        directory = os.path.realpath(directory)
+        if not os.path.isdir(directory):
+            raise ValueError(f'{directory} is not a directory!')
+        self._directory = directory
+
+    @property
+    def latency(self) -> float:
+        """
+        latency.getter
+
+        :return: The base number of seconds each replayed trace takes
+        :rtype: float
+        """
+        return self._latency
+
+    @latency.setter
+    def latency(self, latency) -> None:
+        """
+        latency.setter
+
+        :param latency: The base number of seconds each replayed trace takes
+        :type latency: float
+        :raise ValueError: If latency is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(latency, (int, float)) or
+                isinstance(latency, bool) or latency < 0):
+            raise ValueError(f'{latency} is not a non-negative number!')
+        self._latency = latency
+
+    @property
+    def jitter(self) -> float:
+        """
+        jitter.getter
+
+        :return: The maximum random number of seconds added to the latency
+        :rtype: float
+        """
+        return self._jitter
+
+    @jitter.setter
+    def jitter(self, jitter) -> None:
+        """
+        jitter.setter
+
+        :param jitter: The maximum random number of seconds added to the
+        latency
+        :type jitter: float
+        :raise ValueError: If jitter is not a non-negative number
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(jitter, (int, float)) or
+                isinstance(jitter, bool) or jitter < 0):
+            raise ValueError(f'{jitter} is not a non-negative number!')
+        self._jitter = jitter
+
+    @property
+    def failure_rate(self) -> float:
+        """
+        failure_rate.getter
+
+        :return: The fraction of traces that fail
+        :rtype: float
+        """
+        return self._failure_rate
+
+    @failure_rate.setter
+    def failure_rate(self, failure_rate) -> None:
+        """
+        failure_rate.setter
+
+        :param failure_rate: The fraction of traces that fail
+        :type failure_rate: float
+        :raise ValueError: If failure_rate is not between 0 and 1
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(failure_rate, (int, float)) or
+                isinstance(failure_rate, bool) or not 0 <= failure_rate <= 1):
+            raise ValueError(f'{failure_rate} is not a rate between 0 and 1!')
+        self._failure_rate = failure_rate
+
+    @property
+    def timeout_rate(self) -> float:
+        """
+        timeout_rate.getter
+
+        :return: The fraction of traces that hang until timed out
+        :rtype: float
+        """
+        return self._timeout_rate
+
+    @timeout_rate.setter
+    def timeout_rate(self, timeout_rate) -> None:
+        """
+        timeout_rate.setter
+
+        :param timeout_rate: The fraction of traces that hang until timed out
+        :type timeout_rate: float
+        :raise ValueError: If timeout_rate is not between 0 and 1
+        :return: None
+        :rtype: None
+        """
+        if (not isinstance(timeout_rate, (int, float)) or
+                isinstance(timeout_rate, bool) or not 0 <= timeout_rate <= 1):
+            raise ValueError(f'{timeout_rate} is not a rate between 0 and 1!')
+        self._timeout_rate = timeout_rate
+
+    def find_recording(self, ip: str) -> tuple:
+        """
+        Find and read the recording for an IP Address, falling back to the
+        default recording. Recordings are cached after the first read.
+
+        :param ip: The IPv4 Address
+        :type ip: str
+        :return: The mtr mode and output of the recording, or None if there
+        is no recording for the IP Address
+        :rtype: tuple
+        """
+        for name in (ip, 'default'):
+            if name in self.recordings:
+                return self.recordings[name]
+
+            for extension, mode in self.EXTENSIONS.items():
+                filename = os.path.join(self.directory, f'{name}.{extension}')
+                try:
+                    with open(filename, 'rb') as file:
+                        self.recordings[name] = (mode, file.read())
+                    return self.recordings[name]
+                except FileNotFoundError:
+                    continue
+        return None
+
+    @staticmethod
+    def parse_recording(recording: tuple) -> MTR:
+        """
+        Parse a recording the same way a live mtr run is parsed
+
+        :param recording: The mtr mode and output of the recording
+        :type recording: tuple
+        :return: The parsed MTR, or None if the recording could not be parsed
+        :rtype: MTR
+        """
+        mtr = MTR('')
+        mtr.mode, mtr.mtr_output = recording
+        if not mtr.parse_mtr_stdout():
+            return None
+        return mtr
+
+    def index_hops(self) -> Trace:
+        """
+        Read every recording in the directory and index the statistics of
+        each hop by IP Address. The index is built once.
+
+        :return: The statistics of every recorded hop, keyed by IP Address
+        :rtype: Trace
+        """
+        if self.hop_stats is not None:
+            return self.hop_stats
+
+        self.hop_stats = Trace()
+        for filename in sorted(os.listdir(self.directory)):
+            name, _, extension = filename.rpartition('.')
+            if extension not in self.EXTENSIONS:
+                continue
+            recording = self.find_recording(name)
+            mtr = self.parse_recording(recording) if recording else None
+            if mtr is not None:
+                self.hop_stats.update(mtr.trace)
+        return self.hop_stats
+
+    async def _delay(self) -> bool:
+        """
+        Wait for the synthetic latency and inject hangs and failures
+
+        :return: True if the replay should succeed, False if a failure was
+        injected
+        :rtype: bool
+        """
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.random.random() < self.timeout_rate:
+            # Hang like a stuck mtr until the engine gives up on us
+            await asyncio.Event().wait()
+
+        return self.random.random() >= self.failure_rate
+
+    async def trace(self, ip: str, first_ttl: int = 1, max_ttl: int = 0,
+                    hops: list = None) -> Trace:
+        """
+        Replay the recording for an IP Address after the synthetic latency,
+        failing or hanging at the configured rates
+
+        :param ip: The IPv4 Address to trace
+        :type ip: str
+        :param first_ttl: The first hop of the recording to replay
+        :type first_ttl: int
+        :param max_ttl: The last hop of the recording to replay, 0 for all
+        :type max_ttl: int
+        :param hops: If given, a (hop index, host) tuple is appended to it
+        for every hop in order
+        :type hops: list
+        :raise ValueError: If the string is not in IPv4 Address format
+        :return: The trace, or an empty Trace() if there is no recording or
+        a failure was injected
+        :rtype: Trace
+        """
+        if not re.match(MTR.IP4_PATTERN, ip):
+            raise ValueError(f'{ip} is not a valid IPv4 Address!')
+
+        if not await self._delay():
+            return Trace()
+
+        recording = self.find_recording(ip)
+        if recording is None:
+            return Trace()
+
+        mtr = self.parse_recording(recording)
+        if mtr is None:
+            return Trace()
+
+        wanted = [
+            (hop, host) for hop, host in mtr.hops
+            if hop >= first_ttl and (not max_ttl or hop <= max_ttl)
+        ]
+        if hops is not None:
+            hops.extend(wanted)
+        return mtr.trace.subset(host for _, host in wanted)
+
+    async def ping(self, ips: list) -> Trace:
+        """
+        Replay the recorded statistics of every IP Address after the
+        synthetic latency. IP Addresses that were never recorded are
+        reported as not answering.
+
+        :param ips: The IPv4 Addresses to ping
+        :type ips: list
+        :return: The same statistics as a trace, keyed by IP Address, or an
+        empty Trace() if a failure was injected
+        :rtype: Trace
+        """
+        if not await self._delay():
+            return Trace()
+
+        hop_stats = self.index_hops()
+        trace = Trace()
+        for ip in ips:
+            if ip in hop_stats:
+                trace.add(hop_stats[ip])
+            else:
+                trace.add(Hop(ip, 100.0, constants.MTR_REPORT_CYCLES))
+        return trace
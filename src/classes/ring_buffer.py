@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+RingBuffer() class file
+"""
+
+import mmap
+import os
+import struct
+
+from src.classes.trace import Trace
+
+
+class RingBuffer:
+    """
+    Keep the per-hop totals of the last few runs in a fixed-size,
+    memory-mapped file so rolling windows, such as the loss over the last 15
+    minutes, can be computed without asking Prometheus.
+
+    The file holds a header and one slot per run. Each slot stores its hops
+    as columns: the packed IP Addresses, then the probes sent, the replies
+    received and the sum of their round-trip times. Appending a run
+    overwrites the oldest slot, and reads cast the mapped columns in place
+    instead of copying them. Runs with more than max_hops hops only keep
+    their first max_hops hops.
+    """
+
+    MAGIC = b'PSRING01'
+
+    # magic, runs, max_hops, next slot, filled slots
+    HEADER = struct.Struct('<8sIIII')
+    HEADER_SIZE = 32
+
+    # timestamp, number of hops
+    SLOT_HEADER = struct.Struct('<dI4x')
+
+    def __init__(self, filename: str, runs: int, max_hops: int) -> None:
+        if runs < 1:
+            raise ValueError(f'{runs} is not a positive integer!')
+        if max_hops < 1:
+            raise ValueError(f'{max_hops} is not a positive integer!')
+        self.filename = filename
+        self.runs = runs
+        self.max_hops = max_hops
+        # Pad the IP column so the float columns after it stay aligned
+        self.ips_size = (4 * max_hops + 7) // 8 * 8
+        self.column_size = 8 * max_hops
+        self.slot_size = (
+            self.SLOT_HEADER.size + self.ips_size + 3 * self.column_size)
+        self.size = self.HEADER_SIZE + runs * self.slot_size
+        self._file = None
+        self._mmap = None
+
+    def open(self) -> bool:
+        """
+        Map the ring buffer file, creating it if it is missing or was
+        created with a different number of runs or hops
+
+        :return: True if the file is mapped, False if it could not be
+        :rtype: bool
+        """
+        try:
+            self._file = os.fdopen(
+                os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644),
+                'r+b')
+            header = self._file.read(self.HEADER.size)
+            expected = (self.MAGIC, self.runs, self.max_hops)
+            if (len(header) != self.HEADER.size or
+                    self.HEADER.unpack(header)[:3] != expected or
+                    os.fstat(self._file.fileno()).st_size != self.size):
+                self._file.truncate(0)
+                self._file.truncate(self.size)
+                self._file.seek(0)
+                self._file.write(self.HEADER.pack(*expected, 0, 0))
+                self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), self.size)
+            return True
+
+        except OSError as e:
+            print(e)
+            self.close()
+            return False
+
+    def close(self) -> None:
+        """
+        Unmap and close the ring buffer file
+
+        :return: None
+        :rtype: None
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'RingBuffer':
+        if not self.open():
+            raise OSError(f'Unable to open {self.filename}!')
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.HEADER.unpack_from(self._mmap, 0)[4]
+
+    def append(self, timestamp: float, ips, sent, received, mean) -> None:
+        """
+        Store a run in the oldest slot
+
+        :param timestamp: When the run finished
+        :type timestamp: float
+        :param ips: The packed IP Address of every hop
+        :type ips: array
+        :param sent: The probes sent to every hop
+        :type sent: array
+        :param received: The replies received from every hop
+        :type received: array
+        :param mean: The mean round-trip time of every hop
+        :type mean: array
+        :return: None
+        :rtype: None
+        """
+        head, count = self.HEADER.unpack_from(self._mmap, 0)[3:]
+        hops = min(len(ips), self.max_hops)
+        offset = self.HEADER_SIZE + head * self.slot_size
+        self.SLOT_HEADER.pack_into(self._mmap, offset, timestamp, hops)
+        offset += self.SLOT_HEADER.size
+        # Columns are in native byte order so reads can cast them in place
+        struct.pack_into(f'={hops}I', self._mmap, offset, *ips[:hops])
+        offset += self.ips_size
+        for column in (sent, received):
+            struct.pack_into(
+                f'={hops}d', self._mmap, offset, *column[:hops])
+            offset += self.column_size
+        struct.pack_into(
+            f'={hops}d', self._mmap, offset,
+            *(mean[row] * received[row] for row in range(hops)))
+        self.HEADER.pack_into(
+            self._mmap, 0, self.MAGIC, self.runs, self.max_hops,
+            (head + 1) % self.runs, min(count + 1, self.runs))
+
+    def window(self, seconds: float, now: float) -> dict:
+        """
+        Merge every run that finished in the last seconds seconds
+
+        :param seconds: The length of the window
+        :type seconds: float
+        :param now: The end of the window
+        :type now: float
+        :return: The loss and average round-trip time of every hop in the
+        window, keyed by IP Address
+        :rtype: dict
+        """
+        head, count = self.HEADER.unpack_from(self._mmap, 0)[3:]
+        totals = {}
+        with memoryview(self._mmap) as view:
+            for age in range(count):
+                slot = (head - 1 - age) % self.runs
+                offset = self.HEADER_SIZE + slot * self.slot_size
+                timestamp, hops = self.SLOT_HEADER.unpack_from(view, offset)
+                if timestamp <= now - seconds:
+                    break
+                offset += self.SLOT_HEADER.size
+                columns = [view[offset:offset + 4 * hops].cast('I')]
+                offset += self.ips_size
+                for _ in range(3):
+                    columns.append(
+                        view[offset:offset + 8 * hops].cast('d'))
+                    offset += self.column_size
+                for values in zip(*columns):
+                    total = totals.setdefault(values[0], [0.0, 0.0, 0.0])
+                    total[0] += values[1]
+                    total[1] += values[2]
+                    total[2] += values[3]
+                for column in columns:
+                    column.release()
+
+        stats = {}
+        for packed, (sent, received, rtt) in totals.items():
+            stats[Trace.unpack_ip(packed)] = {
+                'loss': round((sent - received) / sent * 100, 1)
+                if sent else 0.0,
+                'average': round(rtt / received, 1) if received else 0.0
+            }
+        return stats
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+RouteCache() class file
+"""
+
+import time
+
+from src.classes.state_file import StateFile
+
+
+class RouteCache:
+    """
+    Remember the hops discovered on the route to each target for ttl seconds.
+
+    While a route is cached its hops can be pinged directly instead of
+    tracing the whole route again. The cache is kept in a small JSON file so
+    it survives between runs.
+    """
+
+    def __init__(self, filename: str, ttl: float) -> None:
+        self.filename = filename
+        self.ttl = ttl
+        self.routes = {}
+
+    def load(self) -> bool:
+        """
+        Read the cache file into self.routes
+
+        :return: True if the cache was loaded or no cache file exists yet,
+        False if the file could not be read or is not valid JSON
+        :rtype: bool
+        """
+        data = StateFile(self.filename).load()
+        if data is None:
+            return False
+        self.routes = data.get('routes', {})
+        return True
+
+    def save(self) -> bool:
+        """
+        Write self.routes to the cache file
+
+        :return: True if the file was written, False if it could not be
+        :rtype: bool
+        """
+        return StateFile(self.filename).save({'routes': self.routes})
+
+    def store(self, target: str, hops: list) -> None:
+        """
+        Cache the route to a target discovered by a full trace
+
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :param hops: The (hop index, host) tuples of the trace
+        :type hops: list
+        :return: None
+        :rtype: None
+        """
+        answered = [(hop, host) for hop, host in sorted(hops)
+                    if host != '???']
+        self.routes[target] = {
+            'hops': [host for _, host in answered],
+            'ttls': [hop for hop, _ in answered],
+            'discovered_at': time.time()
+        }
+
+    def is_fresh(self, target: str) -> bool:
+        """
+        Determine if the route to a target is cached and younger than ttl
+
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :return: True if the cached route can be used
+        :rtype: bool
+        """
+        route = self.routes.get(target)
+        if not route or not route['hops']:
+            return False
+        return time.time() - route['discovered_at'] < self.ttl
+
+    def hosts(self, target: str) -> list:
+        """
+        Return the hops that answered on the cached route to a target
+
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :return: The IP Addresses of the hops in order
+        :rtype: list
+        """
+        return self.routes.get(target, {}).get('hops', [])
+
+    def numbered_hosts(self, target: str) -> list:
+        """
+        Return the hops that answered on the cached route to a target with
+        their hop numbers
+
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :return: The (hop index, host) tuples of the hops in order. Routes
+        cached without hop numbers are numbered from 1
+        :rtype: list
+        """
+        route = self.routes.get(target, {})
+        hosts = route.get('hops', [])
+        ttls = route.get('ttls') or range(1, len(hosts) + 1)
+        return list(zip(ttls, hosts))
+
+    def has_changed(self, target: str, trace: dict) -> bool:
+        """
+        Determine if pinging the cached hops suggests the route changed,
+        which is the case when a hop that used to answer no longer does
+
+        :param target: The IPv4 Address of the target
+        :type target: str
+        :param trace: The ping results of the cached hops, keyed by IP
+        Address
+        :type trace: Trace
+        :return: True if the route should be traced again
+        :rtype: bool
+        """
+        for host in self.hosts(target):
+            if host not in trace or trace[host].loss >= 100:
+                return True
+        return False
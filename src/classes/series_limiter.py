@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+SeriesLimiter() class file
+"""
+
+import heapq
+
+from src.classes.trace import Trace
+
+
+class SeriesLimiter:
+    """
+    Bound the number of hops, and so series, written per run.
+
+    With top_hops set, only the top_hops hops of each trace with the highest
+    rank_by statistic, e.g. the lossiest hops, are kept, and a hop of the
+    run is written if it is in the top of at least one trace. With
+    max_series set, hops are kept in order of their rank_by statistic while
+    their series fit, and a hop whose series do not fit is dropped without
+    stopping cheaper hops ranked below it from being kept. The number of
+    series dropped for each reason is kept in self.dropped.
+    """
+
+    RANK_BY = [
+        'loss', 'average', 'worst'
+    ]
+
+    def __init__(self, top_hops: int = 0, rank_by: str = 'loss',
+                 max_series: int = 0) -> None:
+        if rank_by not in self.RANK_BY:
+            raise ValueError(f'{rank_by} is not a valid statistic!')
+        self.top_hops = top_hops
+        self.rank_by = rank_by
+        self.max_series = max_series
+        self.seen = set()
+        self.kept = set()
+        self.dropped = {'top_hops': 0, 'max_series': 0}
+
+    def add(self, trace: Trace) -> None:
+        """
+        Keep the top hops of a completed trace
+
+        :param trace: A completed trace
+        :type trace: Trace
+        :return: None
+        :rtype: None
+        """
+        if not self.top_hops:
+            return
+        column = getattr(trace, self.rank_by)
+        rows = heapq.nlargest(
+            self.top_hops, range(len(trace)), key=column.__getitem__)
+        self.seen.update(trace.ips)
+        self.kept.update(trace.ips[row] for row in rows)
+
+    def select(self, traces: Trace, costs: dict, fixed: int = 0) -> set:
+        """
+        Choose the hops to write
+
+        :param traces: The merged traces of the run, used to rank its hops
+        :type traces: Trace
+        :param costs: The number of series of every hop that could be
+        written, keyed by IP Address. Hops that are not in traces, such as
+        hops only kept in a histogram, rank last
+        :type costs: dict
+        :param fixed: The number of series written regardless of hops
+        :type fixed: int
+        :return: The IP Addresses of the hops to write
+        :rtype: set
+        """
+        selected = dict(costs)
+        if self.top_hops:
+            for packed in self.seen - self.kept:
+                ip = Trace.unpack_ip(packed)
+                self.dropped['top_hops'] += selected.pop(ip, 0)
+
+        if self.max_series:
+            column = getattr(traces, self.rank_by)
+            ranked = sorted(
+                range(len(traces)), key=column.__getitem__, reverse=True)
+            order = [Trace.unpack_ip(traces.ips[row]) for row in ranked]
+            order.extend(selected)
+            budget = self.max_series - fixed
+            kept = {}
+            for ip in order:
+                if ip not in selected or ip in kept:
+                    continue
+                cost = selected[ip]
+                if cost > budget:
+                    # Cheaper hops ranked lower may still fit
+                    continue
+                budget -= cost
+                kept[ip] = cost
+            self.dropped['max_series'] += (
+                sum(selected.values()) - sum(kept.values()))
+            selected = kept
+
+        return set(selected)
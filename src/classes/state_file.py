@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+StateFile() class file
+"""
+
+import json
+
+from src.classes.atomic_file import AtomicFile
+
+
+class StateFile:
+    """
+    Keep the state carried over between runs in a JSON file.
+
+    The file is replaced atomically through AtomicFile(), so a run killed
+    while saving leaves the state of the run before it, and is left alone if
+    the state did not change.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+
+    def load(self) -> dict:
+        """
+        Read the state file
+
+        :return: The state, an empty dictionary if no state file exists yet,
+        or None if the file could not be read or is not a JSON object
+        :rtype: dict
+        """
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+
+        except FileNotFoundError:
+            return {}
+
+        except (OSError, json.JSONDecodeError) as e:
+            print(e)
+            return None
+
+        if not isinstance(data, dict):
+            print(f'{self.filename} does not hold a JSON object!')
+            return None
+        return data
+
+    def save(self, data: dict) -> bool:
+        """
+        Write the state to the state file
+
+        :param data: The state, serializable to JSON
+        :type data: dict
+        :return: True if the file was written or already held the state,
+        False if it could not be written
+        :rtype: bool
+        """
+        try:
+            AtomicFile(self.filename).write(json.dumps(data).encode('utf-8'))
+            return True
+
+        except OSError as e:
+            print(e)
+            return False
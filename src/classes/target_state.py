@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+TargetState() class file
+"""
+
+from src.classes.state_file import StateFile
+
+
+class TargetState:
+    """
+    Remember when each target was last traced successfully. The state is kept
+    in a small JSON file so it survives between runs, which lets a target that
+    times out keep reporting when it last succeeded.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.last_success = {}
+
+    def load(self) -> bool:
+        """
+        Read the state file into self.last_success
+
+        :return: True if the state was loaded or no state file exists yet,
+        False if the file could not be read or is not valid JSON
+        :rtype: bool
+        """
+        data = StateFile(self.filename).load()
+        if data is None:
+            return False
+        self.last_success = data.get('last_success', {})
+        return True
+
+    def save(self) -> bool:
+        """
+        Write self.last_success to the state file
+
+        :return: True if the file was written, False if it could not be
+        :rtype: bool
+        """
+        return StateFile(self.filename).save(
+            {'last_success': self.last_success})
+
+    def record_success(self, ip: str, timestamp: float) -> None:
+        """
+        Record a successful trace of a target
+
+        :param ip: The IPv4 Address of the target
+        :type ip: str
+        :param timestamp: The unix time the trace completed
+        :type timestamp: float
+        :return: None
+        :rtype: None
+        """
+        self.last_success[ip] = timestamp
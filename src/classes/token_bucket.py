@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+TokenBucket() class file
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket that refills at a fixed rate up to a fixed
+    capacity. Callers await acquire() and are released in the order they
+    asked, so a shared bucket paces every caller against one global budget.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0:
+            raise ValueError(f'{rate} is not a positive rate!')
+        if capacity <= 0:
+            raise ValueError(f'{capacity} is not a positive capacity!')
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self) -> None:
+        """
+        Add the tokens earned since the last refill, up to the capacity
+
+        :return: None
+        :rtype: None
+        """
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float) -> None:
+        """
+        Wait until the given number of tokens are available and take them.
+        Requests larger than the capacity are clamped to the capacity so they
+        can never wait forever.
+
+        :param tokens: The number of tokens to take
+        :type tokens: float
+        :return: None
+        :rtype: None
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
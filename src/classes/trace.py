@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Trace() class file
+"""
+
+from array import array
+from collections.abc import Mapping
+import socket
+
+from src.classes.hop import Hop
+
+
+class Trace(Mapping):
+    """
+    The per-hop statistics of one or more traces, stored as one array per
+    statistic with the IP Address of each row packed into a 32-bit integer.
+    A row costs 60 bytes instead of a dictionary per hop.
+
+    A Trace reads like a dictionary of Hop() records keyed by IP Address, in
+    the order the hops were added. Combining traces appends their rows, so a
+    combined Trace can hold several rows for the same IP Address; looking an
+    IP Address up returns its first row, and hops() returns every row.
+
+    Backends that keep every reply, rather than only a summary, also fill
+    in self.samples with an array of round-trip times per IP Address.
+
+    Hops probed once for every target, whose rows are copied into the trace
+    of each target, are listed in self.shared as packed IP Addresses, so
+    their probes are only counted once per run.
+
+    Hops that never answered have no row, so the position of a row is not
+    its hop number. Traces of a route keep the hop number (TTL) of each
+    packed IP Address in self.ttls, see set_ttls() and ttl().
+    """
+
+    STATS = Hop.STATS
+
+    __slots__ = ('ips', 'samples', 'shared', 'ttls', '_index') + STATS
+
+    def __init__(self) -> None:
+        self.ips = array('I')
+        for name in self.STATS:
+            setattr(self, name, array('d'))
+        self.samples = {}
+        self.shared = frozenset()
+        self.ttls = {}
+        self._index = None
+
+    @staticmethod
+    def pack_ip(ip: str) -> int:
+        """
+        Pack an IPv4 Address into a 32-bit integer
+
+        :param ip: An IPv4 Address
+        :type ip: str
+        :raise ValueError: If the string is not a valid IPv4 Address
+        :return: The IPv4 Address as an integer
+        :rtype: int
+        """
+        try:
+            return int.from_bytes(socket.inet_aton(ip), 'big')
+        except (OSError, TypeError) as e:
+            raise ValueError(f'{ip} is not a valid IPv4 Address!') from e
+
+    @staticmethod
+    def unpack_ip(packed: int) -> str:
+        """
+        Unpack a 32-bit integer into an IPv4 Address
+
+        :param packed: An IPv4 Address packed by pack_ip()
+        :type packed: int
+        :return: The IPv4 Address
+        :rtype: str
+        """
+        return socket.inet_ntoa(packed.to_bytes(4, 'big'))
+
+    def __getitem__(self, ip: str) -> Hop:
+        try:
+            row = self.find(self.pack_ip(ip))
+        except ValueError as e:
+            raise KeyError(ip) from e
+        if row is None:
+            raise KeyError(ip)
+        return self.row(row)
+
+    def __iter__(self):
+        return map(self.unpack_ip, self.ips)
+
+    def __len__(self) -> int:
+        return len(self.ips)
+
+    def __repr__(self) -> str:
+        return f'Trace({list(self.hops())!r})'
+
+    def find(self, packed: int) -> int:
+        """
+        Find the first row of a packed IP Address. The index behind this is
+        built on the first lookup and kept up to date by append().
+
+        :param packed: An IPv4 Address packed by pack_ip()
+        :type packed: int
+        :return: The index of the row, or None if the IP Address is not
+        present
+        :rtype: int
+        """
+        if self._index is None:
+            self._index = {}
+            for row, ip in enumerate(self.ips):
+                self._index.setdefault(ip, row)
+        return self._index.get(packed)
+
+    def append(self, ip: str, loss: float, sent: float, last: float,
+               average: float, best: float, worst: float,
+               stdev: float) -> None:
+        """
+        Add a row for a hop
+
+        :param ip: The IPv4 Address of the hop
+        :type ip: str
+        :raise ValueError: If the string is not a valid IPv4 Address
+        :return: None
+        :rtype: None
+        """
+        packed = self.pack_ip(ip)
+        if self._index is not None:
+            self._index.setdefault(packed, len(self.ips))
+        self.ips.append(packed)
+        self.loss.append(loss)
+        self.sent.append(sent)
+        self.last.append(last)
+        self.average.append(average)
+        self.best.append(best)
+        self.worst.append(worst)
+        self.stdev.append(stdev)
+
+    def put(self, ip: str, loss: float, sent: float, last: float,
+            average: float, best: float, worst: float, stdev: float) -> None:
+        """
+        Set the statistics of a hop like a dictionary would, replacing the
+        row of the IP Address if it is already present
+
+        :param ip: The IPv4 Address of the hop
+        :type ip: str
+        :raise ValueError: If the string is not a valid IPv4 Address
+        :return: None
+        :rtype: None
+        """
+        row = self.find(self.pack_ip(ip))
+        if row is None:
+            self.append(ip, loss, sent, last, average, best, worst, stdev)
+            return
+        self.loss[row] = loss
+        self.sent[row] = sent
+        self.last[row] = last
+        self.average[row] = average
+        self.best[row] = best
+        self.worst[row] = worst
+        self.stdev[row] = stdev
+
+    def add(self, hop: Hop) -> None:
+        """
+        Add a row for a Hop() record
+
+        :param hop: The hop to add
+        :type hop: Hop
+        :raise ValueError: If the hop IP is not a valid IPv4 Address
+        :return: None
+        :rtype: None
+        """
+        self.append(hop.ip, *(getattr(hop, name) for name in self.STATS))
+
+    def extend(self, other: 'Trace') -> None:
+        """
+        Append every row of another trace, keeping rows for the same IP
+        Address
+
+        :param other: The trace to append
+        :type other: Trace
+        :return: None
+        :rtype: None
+        """
+        self.ips.extend(other.ips)
+        for name in self.STATS:
+            getattr(self, name).extend(getattr(other, name))
+        for ip, samples in other.samples.items():
+            self.samples.setdefault(ip, array('d')).extend(samples)
+        for packed, ttl in other.ttls.items():
+            self.ttls.setdefault(packed, ttl)
+        self._index = None
+
+    def update(self, other: 'Trace') -> None:
+        """
+        Merge another trace like dict.update(), replacing the row of any IP
+        Address already present
+
+        :param other: The trace to merge
+        :type other: Trace
+        :return: None
+        :rtype: None
+        """
+        for hop in other.hops():
+            self.put(hop.ip, *(getattr(hop, name) for name in self.STATS))
+        for ip, samples in other.samples.items():
+            self.samples[ip] = array('d', samples)
+        self.ttls.update(other.ttls)
+
+    def subset(self, ips) -> 'Trace':
+        """
+        Return the first row of each IP Address present, in the order given
+
+        :param ips: The IPv4 Addresses to keep
+        :type ips: iterable
+        :return: A new trace holding only those hops
+        :rtype: Trace
+        """
+        trace = Trace()
+        for ip in ips:
+            if ip in self:
+                trace.add(self[ip])
+                if ip in self.samples:
+                    trace.samples[ip] = array('d', self.samples[ip])
+                packed = self.pack_ip(ip)
+                if packed in self.ttls:
+                    trace.ttls[packed] = self.ttls[packed]
+        return trace
+
+    def copy(self) -> 'Trace':
+        """
+        Return a copy of the trace
+
+        :return: A new trace holding the same rows
+        :rtype: Trace
+        """
+        trace = Trace()
+        trace.extend(self)
+        return trace
+
+    def set_ttls(self, hops: list) -> None:
+        """
+        Record the hop number of every IP Address of the route, keeping the
+        first hop of an IP Address that appears more than once
+
+        :param hops: The (hop index, host) tuples of the trace, where hosts
+        that never answered are '???'
+        :type hops: list
+        :return: None
+        :rtype: None
+        """
+        for ttl, host in hops:
+            try:
+                self.ttls.setdefault(self.pack_ip(host), int(ttl))
+            except ValueError:
+                continue
+
+    def ttl(self, row: int) -> int:
+        """
+        Return the hop number of a row
+
+        :param row: The index of the row
+        :type row: int
+        :return: The hop number recorded by set_ttls(), or the position of
+        the row counted from 1 if none was recorded
+        :rtype: int
+        """
+        return self.ttls.get(self.ips[row], row + 1)
+
+    def row(self, row: int) -> Hop:
+        """
+        Return a single row as a Hop() record
+
+        :param row: The index of the row
+        :type row: int
+        :return: The hop stored in that row
+        :rtype: Hop
+        """
+        return Hop(
+            self.unpack_ip(self.ips[row]),
+            *(getattr(self, name)[row] for name in self.STATS))
+
+    def hops(self):
+        """
+        Iterate over every row, including repeated IP Addresses
+
+        :return: A generator of Hop() records in row order
+        :rtype: generator
+        """
+        return (self.row(row) for row in range(len(self.ips)))
+
+    def to_dict(self) -> dict:
+        """
+        Return the trace as a dictionary of statistic dictionaries keyed by
+        IP Address
+
+        :return: The first row of each IP Address as a dictionary
+        :rtype: dict
+        """
+        return {ip: self[ip].to_dict() for ip in self}
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+TraceAccumulator() class file
+"""
+
+from array import array
+from itertools import chain
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.classes.trace import Trace
+
+
+class TraceAccumulator:
+    """
+    Merge traces into one set of statistics per hop as each trace completes,
+    keeping a fixed number of values per unique hop instead of every trace.
+
+    Each trace only summarises its own replies, so the summaries are merged
+    the way the replies themselves would have been: the number of replies is
+    recovered from sent and loss, means are weighted by replies, variances
+    are pooled with Welford's update for merging batches (Chan et al.), and
+    best and worst are the true minimum and maximum.
+
+    Hops marked as shared by the probe engine were probed once for every
+    target, so they are only merged from the first trace that holds them.
+
+    add_many() merges a whole batch of traces at once. With NumPy installed,
+    the rows of the batch are grouped by hop with one sort and each group
+    is reduced with np.add.reduceat(), so the work done in Python grows
+    with the number of unique hops rather than the number of rows.
+    """
+
+    def __init__(self) -> None:
+        self.ips = array('I')
+        self.sent = array('d')
+        self.received = array('d')
+        self.mean = array('d')
+        self.m2 = array('d')
+        self.best = array('d')
+        self.worst = array('d')
+        self.last = array('d')
+        self._index = {}
+        self._shared = set()
+
+    def __len__(self) -> int:
+        return len(self.ips)
+
+    def _row(self, packed: int) -> int:
+        """
+        Find or create the row of a packed IP Address
+
+        :param packed: An IPv4 Address packed by Trace.pack_ip()
+        :type packed: int
+        :return: The index of the row
+        :rtype: int
+        """
+        row = self._index.get(packed)
+        if row is None:
+            row = self._index[packed] = len(self.ips)
+            self.ips.append(packed)
+            self.sent.append(0.0)
+            self.received.append(0.0)
+            self.mean.append(0.0)
+            self.m2.append(0.0)
+            self.best.append(math.inf)
+            self.worst.append(-math.inf)
+            self.last.append(0.0)
+        return row
+
+    def add(self, trace: Trace) -> None:
+        """
+        Merge every hop of a trace into the running statistics
+
+        :param trace: A completed trace
+        :type trace: Trace
+        :return: None
+        :rtype: None
+        """
+        for hop in range(len(trace)):
+            packed = trace.ips[hop]
+            if packed in trace.shared:
+                if packed in self._shared:
+                    continue
+                self._shared.add(packed)
+            row = self._row(packed)
+            sent = trace.sent[hop]
+            received = round(sent * (100 - trace.loss[hop]) / 100)
+            self.sent[row] += sent
+            if not received:
+                continue
+
+            count = self.received[row]
+            total = count + received
+            delta = trace.average[hop] - self.mean[row]
+            stdev = trace.stdev[hop]
+            self.mean[row] += delta * received / total
+            self.m2[row] += (
+                stdev * stdev * (received - 1) +
+                delta * delta * count * received / total)
+            self.received[row] = total
+            self.best[row] = min(self.best[row], trace.best[hop])
+            self.worst[row] = max(self.worst[row], trace.worst[hop])
+            self.last[row] = trace.last[hop]
+
+    def add_many(self, traces: list) -> None:
+        """
+        Merge every hop of a batch of traces into the running statistics,
+        with the same result as calling add() on each trace in turn
+
+        :param traces: Completed traces
+        :type traces: list
+        :return: None
+        :rtype: None
+        """
+        traces = [trace for trace in traces if len(trace)]
+        if np is None or not traces:
+            for trace in traces:
+                self.add(trace)
+            return
+
+        ips = array('I')
+        columns = {name: array('d') for name in Trace.STATS}
+        for trace in traces:
+            ips.extend(trace.ips)
+            for name, column in columns.items():
+                column.extend(getattr(trace, name))
+        ips = np.frombuffer(ips, dtype=np.uint32).astype(np.int64)
+        stats = {
+            name: np.frombuffer(column, dtype=np.float64)
+            for name, column in columns.items()
+        }
+
+        # Drop the shared hops already merged, keeping the first row of each
+        rows = np.repeat(np.arange(len(traces), dtype=np.int64),
+                         [len(trace) for trace in traces])
+        shared = np.fromiter(
+            chain.from_iterable(trace.shared for trace in traces),
+            dtype=np.int64)
+        if len(shared):
+            owners = np.repeat(np.arange(len(traces), dtype=np.int64),
+                               [len(trace.shared) for trace in traces])
+            is_shared = np.isin((rows << 32) | ips, (owners << 32) | shared)
+            positions = np.flatnonzero(is_shared)
+            _, first = np.unique(ips[positions], return_index=True)
+            first = positions[first]
+            keep = ~is_shared
+            keep[first] = ~np.isin(
+                ips[first], np.fromiter(self._shared, dtype=np.int64))
+            self._shared.update(ips[first].tolist())
+            ips = ips[keep]
+            stats = {name: column[keep] for name, column in stats.items()}
+        if not len(ips):
+            return
+
+        # Group the rows by hop, keeping the order they came in
+        order = np.argsort(ips, kind='stable')
+        ips = ips[order]
+        stats = {name: column[order] for name, column in stats.items()}
+        starts = np.flatnonzero(np.diff(ips, prepend=-1))
+
+        sent = stats['sent']
+        received = np.round(sent * (100 - stats['loss']) / 100)
+        answered = received > 0
+        weights = np.add.reduceat(received, starts)
+        totals = np.add.reduceat(received * stats['average'], starts)
+        means = np.divide(totals, weights, out=np.zeros_like(totals),
+                          where=weights > 0)
+        delta = stats['average'] - np.repeat(means, np.diff(
+            np.append(starts, len(ips))))
+        stdev = stats['stdev']
+        m2s = np.add.reduceat(np.where(
+            answered,
+            stdev * stdev * (received - 1) + received * delta * delta,
+            0.0), starts)
+        bests = np.minimum.reduceat(
+            np.where(answered, stats['best'], math.inf), starts)
+        worsts = np.maximum.reduceat(
+            np.where(answered, stats['worst'], -math.inf), starts)
+        lasts = np.maximum.reduceat(
+            np.where(answered, np.arange(len(ips)), -1), starts)
+
+        # Merge each group like add() merges one row. New hops get their
+        # rows in the order they were first seen
+        sents = np.add.reduceat(sent, starts).tolist()
+        groups = list(zip(
+            ips[starts].tolist(), sents, weights.tolist(), means.tolist(),
+            m2s.tolist(), bests.tolist(), worsts.tolist(),
+            stats['last'][lasts].tolist()))
+        for group in np.argsort(order[starts], kind='stable').tolist():
+            packed, sent, received, mean, m2, best, worst, last = \
+                groups[group]
+            row = self._row(packed)
+            self.sent[row] += sent
+            if not received:
+                continue
+
+            count = self.received[row]
+            total = count + received
+            delta = mean - self.mean[row]
+            self.mean[row] += delta * received / total
+            self.m2[row] += m2 + delta * delta * count * received / total
+            self.received[row] = total
+            self.best[row] = min(self.best[row], best)
+            self.worst[row] = max(self.worst[row], worst)
+            self.last[row] = last
+
+    def to_trace(self, digits: int = None) -> Trace:
+        """
+        Return the merged statistics, one row per hop in the order each hop
+        was first seen. sent is the total number of probes sent to the hop.
+
+        :param digits: The number of decimal places to round to, or None to
+        not round
+        :type digits: int
+        :return: The merged statistics
+        :rtype: Trace
+        """
+        def rounded(value: float) -> float:
+            return value if digits is None else round(value, digits)
+
+        trace = Trace()
+        for row, packed in enumerate(self.ips):
+            sent = self.sent[row]
+            received = self.received[row]
+            loss = 0.0
+            if sent:
+                loss = (sent - received) / sent * 100
+            stdev = 0.0
+            if received > 1:
+                stdev = math.sqrt(max(self.m2[row], 0) / (received - 1))
+            best = self.best[row] if received else 0.0
+            worst = self.worst[row] if received else 0.0
+            trace.append(
+                Trace.unpack_ip(packed), rounded(loss), sent,
+                rounded(self.last[row]), rounded(self.mean[row]),
+                rounded(best), rounded(worst), rounded(stdev))
+        return trace
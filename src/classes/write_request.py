@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+WriteRequest() class file
+"""
+
+import struct
+
+
+class WriteRequest:
+    """
+    Encode a Prometheus remote_write WriteRequest protobuf by hand.
+
+    The message only needs four small types, so they are written field by
+    field instead of depending on protobuf:
+
+        WriteRequest { repeated TimeSeries timeseries = 1; }
+        TimeSeries { repeated Label labels = 1; repeated Sample samples = 2; }
+        Label { string name = 1; string value = 2; }
+        Sample { double value = 1; int64 timestamp = 2; }
+
+    Every series is encoded as it is added, with one sample. Encoded labels
+    are cached, as most label pairs, such as stat="loss", repeat on every
+    hop.
+    """
+
+    def __init__(self) -> None:
+        self.timeseries = []
+        self._labels = {}
+
+    def __len__(self) -> int:
+        return len(self.timeseries)
+
+    @staticmethod
+    def varint(value: int) -> bytes:
+        """
+        Encode a non-negative integer as a protobuf varint
+
+        :param value: The integer
+        :type value: int
+        :return: The varint
+        :rtype: bytes
+        """
+        encoded = bytearray()
+        while value > 0x7f:
+            encoded.append(value & 0x7f | 0x80)
+            value >>= 7
+        encoded.append(value)
+        return bytes(encoded)
+
+    @classmethod
+    def field(cls, tag: int, data: bytes) -> bytes:
+        """
+        Encode a length-delimited field
+
+        :param tag: The field number and wire type, e.g. 0x0a for field 1
+        :type tag: int
+        :param data: The content of the field
+        :type data: bytes
+        :return: The field
+        :rtype: bytes
+        """
+        return bytes((tag,)) + cls.varint(len(data)) + data
+
+    def _label(self, name: str, value: str) -> bytes:
+        """
+        Encode one label as a field of a TimeSeries
+
+        :param name: The label name
+        :type name: str
+        :param value: The label value
+        :type value: str
+        :return: The field
+        :rtype: bytes
+        """
+        label = self._labels.get((name, value))
+        if label is None:
+            label = self.field(0x0a, (
+                self.field(0x0a, name.encode('utf-8')) +
+                self.field(0x12, value.encode('utf-8'))))
+            self._labels[(name, value)] = label
+        return label
+
+    def add(self, name: str, labels: dict, value: float,
+            timestamp: float) -> None:
+        """
+        Add a series with a single sample
+
+        :param name: The metric name
+        :type name: str
+        :param labels: The labels of the series, without __name__
+        :type labels: dict
+        :param value: The value of the sample
+        :type value: float
+        :param timestamp: The time of the sample in seconds since the epoch
+        :type timestamp: float
+        :return: None
+        :rtype: None
+        """
+        labels = {'__name__': name, **labels}
+        # Receivers require the labels sorted by name
+        series = b''.join([
+            self._label(key, labels[key]) for key in sorted(labels)])
+        sample = (b'\x09' + struct.pack('<d', value) +
+                  b'\x10' + self.varint(int(timestamp * 1000)))
+        self.timeseries.append(
+            self.field(0x0a, series + self.field(0x12, sample)))
+
+    def encode(self) -> bytes:
+        """
+        Encode the WriteRequest
+
+        :return: The serialized message
+        :rtype: bytes
+        """
+        return b''.join(self.timeseries)
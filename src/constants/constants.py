@@ -10,3 +10,128 @@ ARGPARSE_AUTHOR = 'Benjamin Owen'
 ARGPARSE_REPO = 'https://github.com/benowe1717/ping-stats'
 
 CONFIG_FILE = 'src/configs/config.yaml'
+
+# mtr
+MTR_CONCURRENCY = 64
+MTR_REPORT_CYCLES = 4
+MTR_MAX_HOPS = 30
+# Used to price a single mtr run against the packets-per-second budget, as
+# mtr sends one probe per hop per cycle
+MTR_PACKETS_PER_PROBE = MTR_REPORT_CYCLES * MTR_MAX_HOPS
+# A budget of 0 packets per second disables pacing
+MTR_PACKETS_PER_SECOND = 0
+MTR_JITTER = 0.0
+# 'auto' uses --json when the installed mtr supports it, else --report
+MTR_MODE = 'auto'
+# Timeouts are in seconds, 0 disables them
+MTR_TIMEOUT = 60
+MTR_DEADLINE = 0
+# 'auto' uses the in-process ICMP prober when ICMP sockets are permitted,
+# else the mtr binary
+MTR_BACKEND = 'mtr'
+
+# The in-process ICMP prober, in seconds
+ICMP_INTERVAL = 1.0
+ICMP_REPLY_TIMEOUT = 2.0
+ICMP_PING_TTL = 64
+
+TARGET_STATE_FILE = 'data/target_state.json'
+HOP_TOPOLOGY_FILE = 'data/hop_topology.json'
+HOP_TOPOLOGY_MAX_AGE = 3600
+ROUTE_CACHE_FILE = 'data/route_cache.json'
+ROUTE_CACHE_TTL = 900
+
+# Round-trip time sketches per hop, exported as a histogram
+HOP_SKETCHES_FILE = 'data/hop_sketches.json'
+# Hops not seen for this many seconds are dropped, 0 keeps them forever
+HOP_SKETCHES_MAX_AGE = 7 * 24 * 3600
+HOP_SKETCHES_RELATIVE_ACCURACY = 0.01
+HOP_SKETCHES_MAX_BINS = 1024
+# Upper bounds of the histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+
+# The per-hop totals of the last runs, used for the rolling windows
+RING_BUFFER_FILE = 'data/ring_buffer.bin'
+RING_BUFFER_RUNS = 32
+# Runs with more hops than this only keep their first hops
+RING_BUFFER_MAX_HOPS = 4096
+# Rolling windows, in seconds, keyed by their window label
+ROLLING_WINDOWS = {'1m': 60, '5m': 300, '15m': 900}
+
+# The HTTP exporter mode, started with --serve
+EXPORTER_LISTEN_ADDRESS = ''
+EXPORTER_PORT = 9934
+# Seconds from the start of one probe cycle to the start of the next
+EXPORTER_INTERVAL = 60
+
+# Cardinality limits, 0 disables each of them
+TOP_HOPS = 0
+TOP_HOPS_BY = 'loss'
+MAX_SERIES = 0
+MAX_IDLE_RUNS = 0
+
+# The shard of targets that are not in any of the shard_groups
+DEFAULT_SHARD = 'default'
+# The maximum number of shard files written at the same time
+SHARD_WRITERS = 8
+
+# The format of the metrics, the Prometheus text format or OpenMetrics
+OUTPUT_FORMAT = 'prometheus'
+OUTPUT_FORMATS = ['prometheus', 'openmetrics']
+# The OpenMetrics family and help text of every statistic
+OPENMETRICS_STATS = {
+    'loss': ('ping_stats_loss_percent', 'Probes to the hop that were lost'),
+    'sent': ('ping_stats_sent', 'Probes sent to the hop'),
+    'last': ('ping_stats_last_ms', 'Round-trip time of the last probe'),
+    'average': ('ping_stats_average_ms', 'Mean round-trip time'),
+    'best': ('ping_stats_best_ms', 'Lowest round-trip time'),
+    'worst': ('ping_stats_worst_ms', 'Highest round-trip time'),
+    'stdev': ('ping_stats_stdev_ms', 'Standard deviation of round-trip time')
+}
+OPENMETRICS_TARGET_STATS = {
+    'timed_out': (
+        'ping_stats_target_timed_out',
+        'Whether the trace to the target timed out'),
+    'last_success_timestamp': (
+        'ping_stats_target_last_success_timestamp_seconds',
+        'When the trace to the target last completed')
+}
+OPENMETRICS_WINDOW_STATS = {
+    'loss': (
+        'ping_stats_window_loss_percent',
+        'Probes to the hop that were lost over the window'),
+    'average': (
+        'ping_stats_window_average_ms',
+        'Mean round-trip time over the window')
+}
+
+# Pushing to a Prometheus remote_write receiver, from the remote_write
+# section
+REMOTE_WRITE_BATCH_SIZE = 2000
+REMOTE_WRITE_CONNECTIONS = 4
+REMOTE_WRITE_TIMEOUT = 30
+# Requests spooled while the receiver is down, pushed again oldest first
+REMOTE_WRITE_SPOOL = 'data/remote_write'
+REMOTE_WRITE_MAX_QUEUE = 1000
+
+# Pushing to a Prometheus Pushgateway, from the pushgateway section
+PUSHGATEWAY_JOB = 'ping_stats'
+PUSHGATEWAY_CONNECTIONS = 4
+PUSHGATEWAY_TIMEOUT = 30
+# The digests of the groups pushed, so unchanged groups are not pushed again
+PUSHGATEWAY_STATE_FILE = 'data/pushgateway.json'
+
+# The history of every run, from the history section
+HISTORY_FILE = 'data/history.sqlite3'
+HISTORY_RETENTION = 30 * 24 * 3600
+# The default window of the query subcommand
+QUERY_WINDOW = '1h'
+
+# The columnar export of every run, from the export section
+EXPORT_DIRECTORY = 'data/export'
+# Partition by 'day' or 'hour', in UTC
+EXPORT_PARTITION = 'day'
+# 'auto' writes Parquet when pyarrow is installed, else gzipped CSV
+EXPORT_FORMAT = 'auto'
+EXPORT_FORMATS = ['auto', 'parquet', 'csv']
+EXPORT_ROW_GROUP_SIZE = 128 * 1024
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the AtomicFile() class
+"""
+
+import os
+import stat
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.classes.atomic_file import AtomicFile
+
+
+class TestAtomicFile(unittest.TestCase):
+    """
+    Unit Tests for the AtomicFile() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'ping_stats.prom')
+        self.file = AtomicFile(self.filename)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.filename
+        del self.file
+        return super().tearDown()
+
+    def read(self) -> bytes:
+        """Return the content of the file"""
+        with open(self.filename, 'rb') as file:
+            return file.read()
+
+    def test_write(self) -> None:
+        """Assert the file is created readable by others"""
+        self.assertTrue(self.file.write(b'a 1\n'))
+        self.assertEqual(self.read(), b'a 1\n')
+        mode = stat.S_IMODE(os.stat(self.filename).st_mode)
+        self.assertEqual(mode, 0o644)
+        self.assertEqual(os.listdir(self.directory.name), ['ping_stats.prom'])
+
+    def test_replace(self) -> None:
+        """Assert new content replaces the file with a new inode"""
+        self.file.write(b'a 1\n')
+        inode = os.stat(self.filename).st_ino
+        self.assertTrue(self.file.write(b'a 2\n'))
+        self.assertEqual(self.read(), b'a 2\n')
+        self.assertNotEqual(os.stat(self.filename).st_ino, inode)
+
+    def test_unchanged(self) -> None:
+        """Assert identical content is not written again"""
+        self.file.write(b'a 1\n')
+        inode = os.stat(self.filename).st_ino
+        self.assertFalse(self.file.write(b'a 1\n'))
+        self.assertEqual(os.stat(self.filename).st_ino, inode)
+
+    def test_unchanged_existing_file(self) -> None:
+        """Assert a file written by an earlier run is compared too"""
+        with open(self.filename, 'wb') as file:
+            file.write(b'a 1\n')
+        self.assertFalse(AtomicFile(self.filename).write(b'a 1\n'))
+        self.assertTrue(AtomicFile(self.filename).write(b'a 2\n'))
+
+    @patch('src.classes.atomic_file.os.replace', side_effect=OSError)
+    def test_failed_replace(self, mock) -> None:
+        """Assert a failed rename leaves the file and no temporary file"""
+        with open(self.filename, 'wb') as file:
+            file.write(b'a 1\n')
+        with self.assertRaises(OSError):
+            self.file.write(b'a 2\n')
+        self.assertTrue(mock.called)
+        self.assertEqual(self.read(), b'a 1\n')
+        self.assertEqual(os.listdir(self.directory.name), ['ping_stats.prom'])
+        # The failed content is not remembered as written
+        mock.side_effect = None
+        self.file.write(b'a 2\n')
+        self.assertEqual(mock.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
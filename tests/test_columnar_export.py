@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the ColumnarExport() class
+"""
+
+import asyncio
+import csv
+import glob
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from src.classes import columnar_export
+from src.classes.columnar_export import ColumnarExport
+from src.classes.replay_backend import ReplayBackend
+from src.classes.trace import Trace
+
+# 2024-05-01 23:59:00 and 2024-05-02 00:01:00 UTC
+MAY_1 = 1714607940.0
+MAY_2 = 1714608060.0
+
+
+class TestColumnarExport(unittest.TestCase):
+    """
+    Unit Tests for the ColumnarExport() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = {
+            'export': {
+                'enabled': True,
+                'directory': self.directory.name,
+                'format': 'csv',
+                'row_group_size': 5
+            }
+        }
+        self.export = ColumnarExport(self.config)
+        self.trace = Trace()
+        self.trace.append('10.10.28.1', 0.0, 4, 5.0, 6.0, 5.0, 8.0, 1.0)
+        self.trace.append('1.1.1.1', 50.0, 4, 20.0, 20.0, 15.0, 25.0, 4.0)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.config
+        del self.export
+        del self.trace
+        return super().tearDown()
+
+    def parts(self, pattern: str = '*.csv.gz') -> list:
+        """List the part files of every partition"""
+        return sorted(glob.glob(
+            os.path.join(self.directory.name, '*', pattern)))
+
+    def read(self, filename: str) -> list:
+        """Read a gzipped CSV part file"""
+        with gzip.open(filename, 'rt', encoding='utf-8') as file:
+            return list(csv.DictReader(io.StringIO(file.read())))
+
+    def test_defaults(self) -> None:
+        """Assert the export section is optional and disabled"""
+        export = ColumnarExport({'mtr': {'ips': ['127.0.0.1']}})
+        self.assertFalse(export.enabled)
+        self.assertEqual(export.partition, 'day')
+        self.assertIn(export.format, ['parquet', 'csv'])
+
+    def test_invalid_config(self) -> None:
+        """Assert raise ValueError on unknown keys or invalid values"""
+        for key, value in (('unknown', 1), ('enabled', 1),
+                           ('directory', ''), ('partition', 'week'),
+                           ('format', 'json'), ('row_group_size', 0)):
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(ValueError):
+                    ColumnarExport({'export': {key: value}})
+
+    @unittest.skipIf(columnar_export.pq is not None, 'pyarrow is installed')
+    def test_parquet_without_pyarrow(self) -> None:
+        """Assert parquet is refused and auto falls back to CSV"""
+        with self.assertRaises(ValueError):
+            ColumnarExport({'export': {'format': 'parquet'}})
+        self.assertEqual(
+            ColumnarExport({'export': {'format': 'auto'}}).format, 'csv')
+
+    def test_add(self) -> None:
+        """Assert a trace adds one row per hop, column by column"""
+        self.export.add(MAY_1, '1.1.1.1', self.trace)
+        self.assertEqual(len(self.export), 2)
+        self.assertEqual(list(self.export.columns['hop']), [1, 2])
+        self.assertEqual(self.export.columns['hop_ip'],
+                         ['10.10.28.1', '1.1.1.1'])
+        self.assertEqual(list(self.export.columns['loss']), [0.0, 50.0])
+
+    def test_add_unanswered_hop(self) -> None:
+        """Assert hops are exported with their TTL, not their row"""
+        backend = ReplayBackend(
+            {'replay': {'directory': 'tests/fixtures/replay'}})
+        trace = asyncio.run(backend.trace('1.1.1.1'))
+        self.export.add(MAY_1, '1.1.1.1', trace)
+        self.assertEqual(self.export.columns['hop_ip'],
+                         ['10.10.28.1', '192.168.1.254', '1.1.1.1'])
+        self.assertEqual(list(self.export.columns['hop']), [1, 2, 4])
+
+    def test_partition_of(self) -> None:
+        """Assert runs are partitioned by UTC day or hour"""
+        self.assertEqual(self.export.partition_of(MAY_1), 'date=2024-05-01')
+        self.export.partition = 'hour'
+        self.assertEqual(self.export.partition_of(MAY_2),
+                         'date=2024-05-02/hour=00')
+
+    def test_stage(self) -> None:
+        """Assert runs are staged until their partition is full"""
+        self.export.add(MAY_1, '1.1.1.1', self.trace)
+        self.assertTrue(self.export.write(MAY_1))
+        self.assertEqual(len(self.export), 0)
+        self.assertEqual(self.parts(), [])
+
+        self.export.add(MAY_1, '1.1.1.1', self.trace)
+        self.export.add(MAY_1, '8.8.8.8', self.trace)
+        self.assertTrue(self.export.write(MAY_1))
+        parts = self.parts()
+        self.assertEqual(len(parts), 1)
+        self.assertIn('date=2024-05-01', parts[0])
+        rows = self.read(parts[0])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(list(rows[0]), ColumnarExport.COLUMNS)
+        self.assertEqual(rows[-1]['target'], '8.8.8.8')
+        self.assertEqual(float(rows[-1]['worst']), 25.0)
+
+    def test_partition_over(self) -> None:
+        """Assert a partition is compacted once the next one starts"""
+        self.export.add(MAY_1, '1.1.1.1', self.trace)
+        self.assertTrue(self.export.write(MAY_1))
+        self.export.add(MAY_2, '1.1.1.1', self.trace)
+        self.assertTrue(self.export.write(MAY_2))
+        parts = self.parts()
+        self.assertEqual(len(parts), 1)
+        self.assertIn('date=2024-05-01', parts[0])
+        self.assertEqual(len(self.read(parts[0])), 2)
+
+    def test_nothing_to_write(self) -> None:
+        """Assert a run without traces writes nothing"""
+        self.assertTrue(self.export.write(MAY_1))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    @unittest.skipIf(columnar_export.pq is None, 'pyarrow is not installed')
+    def test_parquet(self) -> None:
+        """Assert Parquet parts hold every staged run"""
+        self.config['export']['format'] = 'parquet'
+        export = ColumnarExport(self.config)
+        for target in ('1.1.1.1', '8.8.8.8', '9.9.9.9'):
+            export.add(MAY_1, target, self.trace)
+            self.assertTrue(export.write(MAY_1))
+        parts = self.parts('*.parquet')
+        self.assertEqual(len(parts), 1)
+        table = columnar_export.pq.read_table(parts[0])
+        self.assertEqual(table.num_rows, 6)
+        self.assertEqual(table.column_names, ColumnarExport.COLUMNS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the ConnectionPool() class
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import unittest
+
+from src.classes.connection_pool import ConnectionPool
+
+
+class Echo(BaseHTTPRequestHandler):
+    """Answer with the client port, closing the connection if asked to"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        """Send the client port of the connection"""
+        body = str(self.client_address[1]).encode('ascii')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path == '/close':
+            # Drop the connection without telling the client
+            self.close_connection = True
+
+    def log_message(self, *args) -> None:
+        """Requests are not logged"""
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+    Unit Tests for the ConnectionPool() class
+    """
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Echo)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address[:2]
+        self.pool = ConnectionPool(f'http://{host}:{port}', 5)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+        del self.server
+        del self.thread
+        del self.pool
+        return super().tearDown()
+
+    def test_reuse(self) -> None:
+        """Assert requests reuse one keep-alive connection"""
+        status, first = self.pool.request('GET', '/')
+        self.assertEqual(status, 200)
+        _, second = self.pool.request('GET', '/')
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_reconnect(self) -> None:
+        """Assert a connection closed by the server is replaced"""
+        _, first = self.pool.request('GET', '/close')
+        _, second = self.pool.request('GET', '/')
+        self.assertNotEqual(first, second)
+
+    def test_unreachable(self) -> None:
+        """Assert a server that is down raises OSError"""
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertRaises(OSError):
+            self.pool.request('GET', '/')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the DDSketch() class
+"""
+
+import random
+import unittest
+
+from src.classes.dd_sketch import DDSketch
+
+
+class TestDDSketch(unittest.TestCase):
+    """
+    Unit Tests for the DDSketch() class
+    """
+
+    def setUp(self) -> None:
+        rand = random.Random(1)
+        self.values = [rand.lognormvariate(3, 1) for _ in range(10000)]
+        self.sketch = DDSketch(0.01)
+        for value in self.values:
+            self.sketch.add(value)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.sketch
+        del self.values
+        return super().tearDown()
+
+    def test_invalid_relative_accuracy(self) -> None:
+        """Assert raise ValueError when the accuracy is not below 1"""
+        with self.assertRaises(ValueError):
+            DDSketch(1)
+
+    def test_quantiles_within_accuracy(self) -> None:
+        """Assert quantiles are within the relative accuracy"""
+        values = sorted(self.values)
+        for q in (0.5, 0.9, 0.95, 0.99, 0.999):
+            expected = values[int(q * (len(values) - 1))]
+            with self.subTest(q=q):
+                self.assertLessEqual(
+                    abs(self.sketch.quantile(q) - expected) / expected, 0.01)
+        self.assertEqual(self.sketch.quantile(0), min(values))
+        self.assertEqual(self.sketch.quantile(1), max(values))
+
+    def test_empty(self) -> None:
+        """Assert an empty sketch has no quantiles"""
+        self.assertIsNone(DDSketch().quantile(0.5))
+
+    def test_zero(self) -> None:
+        """Assert values at or below zero are counted"""
+        sketch = DDSketch()
+        sketch.add(0.0, 3)
+        sketch.add(10.0)
+        self.assertEqual(sketch.quantile(0.5), 0.0)
+        self.assertEqual(sketch.count_le(0), 3)
+        self.assertEqual(sketch.count_le(10), 4)
+
+    def test_bounded_bins(self) -> None:
+        """Assert the number of bins never exceeds max_bins"""
+        sketch = DDSketch(0.01, 64)
+        for value in self.values:
+            sketch.add(value)
+        self.assertLessEqual(len(sketch.bins), 64)
+        self.assertEqual(sketch.count, len(self.values))
+        values = sorted(self.values)
+        self.assertLessEqual(
+            abs(sketch.quantile(0.99) - values[9899]) / values[9899], 0.01)
+
+    def test_merge(self) -> None:
+        """Assert merging sketches equals one sketch of every value"""
+        first, second = DDSketch(0.01), DDSketch(0.01)
+        for index, value in enumerate(self.values):
+            (first if index % 2 else second).add(value)
+        first.merge(second)
+        self.assertEqual(first.bins, self.sketch.bins)
+        self.assertEqual(first.count, self.sketch.count)
+        self.assertAlmostEqual(first.sum, self.sketch.sum)
+
+    def test_merge_different_accuracy(self) -> None:
+        """Assert raise ValueError when the accuracies differ"""
+        with self.assertRaises(ValueError):
+            self.sketch.merge(DDSketch(0.02))
+
+    def test_count_le(self) -> None:
+        """Assert bucket counts are within the relative accuracy"""
+        expected = sum(1 for value in self.values if value <= 20)
+        self.assertLessEqual(
+            abs(self.sketch.count_le(20) - expected),
+            sum(1 for value in self.values if 20 < value <= 20 * 1.02))
+
+    def test_round_trip(self) -> None:
+        """Assert a sketch survives to_dict() and from_dict()"""
+        sketch = DDSketch.from_dict(self.sketch.to_dict())
+        self.assertEqual(sketch.bins, self.sketch.bins)
+        self.assertEqual(sketch.quantile(0.99), self.sketch.quantile(0.99))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the HistoryStore() class
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.classes.history_store import HistoryStore
+from src.classes.mtr import MTR
+from src.classes.trace import Trace
+
+
+class TestHistoryStore(unittest.TestCase):
+    """
+    Unit Tests for the HistoryStore() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = {
+            'history': {
+                'enabled': True,
+                'filename': os.path.join(self.directory.name, 'h.sqlite3'),
+                'retention': 3600
+            }
+        }
+        self.store = HistoryStore(self.config)
+        self.assertTrue(self.store.open())
+        self.trace = Trace()
+        self.trace.append('10.10.28.1', 0.0, 4, 5.0, 6.0, 5.0, 8.0, 1.0)
+        self.trace.append('1.1.1.1', 50.0, 4, 20.0, 20.0, 15.0, 25.0, 4.0)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.directory.cleanup()
+        del self.directory
+        del self.config
+        del self.store
+        del self.trace
+        return super().tearDown()
+
+    def test_defaults(self) -> None:
+        """Assert the history section is optional and disabled"""
+        store = HistoryStore({'mtr': {'ips': ['127.0.0.1']}})
+        self.assertFalse(store.enabled)
+        self.assertEqual(store.filename, 'data/history.sqlite3')
+
+    def test_invalid_config(self) -> None:
+        """Assert raise ValueError on unknown keys or invalid values"""
+        for key, value in (('unknown', 1), ('enabled', 'yes'),
+                           ('filename', ''), ('retention', 0)):
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(ValueError):
+                    HistoryStore({'history': {key: value}})
+
+    def test_wal(self) -> None:
+        """Assert the database is in WAL mode"""
+        mode = self.store.connection.execute('PRAGMA journal_mode')
+        self.assertEqual(mode.fetchone()[0], 'wal')
+
+    def test_rows(self) -> None:
+        """Assert every hop of a trace becomes a row in hop order"""
+        self.assertEqual(HistoryStore.rows(100.0, '1.1.1.1', self.trace), [
+            (100.0, '1.1.1.1', 1, '10.10.28.1', 0.0, 4, 5.0, 6.0, 5.0,
+             8.0, 1.0),
+            (100.0, '1.1.1.1', 2, '1.1.1.1', 50.0, 4, 20.0, 20.0, 15.0,
+             25.0, 4.0)
+        ])
+
+    def test_rows_unanswered_hop(self) -> None:
+        """Assert hops after one that never answered keep their TTL"""
+        mtr = MTR('')
+        mtr.mode = 'json'
+        mtr.mtr_output = json.dumps({'report': {'hubs': [
+            {'count': count, 'host': host, 'Loss%': loss, 'Snt': 4,
+             'Last': 1.0, 'Avg': 1.0, 'Best': 1.0, 'Wrst': 1.0, 'StDev': 0.0}
+            for count, host, loss in ((1, '10.10.28.1', 0.0),
+                                      (2, '???', 100.0),
+                                      (3, '1.1.1.1', 0.0))
+        ]}}).encode('utf-8')
+        self.assertTrue(mtr.parse_mtr_stdout())
+        rows = HistoryStore.rows(100.0, '1.1.1.1', mtr.trace)
+        self.assertEqual([row[2:4] for row in rows],
+                         [(1, '10.10.28.1'), (3, '1.1.1.1')])
+
+    def test_aggregate(self) -> None:
+        """Assert hops are aggregated over the window, lossiest first"""
+        other = Trace()
+        other.append('10.10.28.1', 100.0, 4, 0.0, 0.0, 0.0, 0.0, 0.0)
+        self.assertTrue(self.store.insert(
+            HistoryStore.rows(1000.0, '1.1.1.1', self.trace) +
+            HistoryStore.rows(1010.0, '8.8.8.8', other), 1010.0))
+        hops = self.store.aggregate(900.0)
+        # Equal loss is ordered by IP Address
+        self.assertEqual([hop['hop_ip'] for hop in hops],
+                         ['1.1.1.1', '10.10.28.1'])
+        gateway = hops[1]
+        self.assertEqual(gateway['runs'], 2)
+        self.assertEqual(gateway['sent'], 8)
+        self.assertEqual(gateway['loss'], 50.0)
+        # Unanswered probes count towards neither average nor best
+        self.assertEqual(gateway['average'], 6.0)
+        self.assertEqual(gateway['best'], 5.0)
+        self.assertEqual(gateway['last_seen'], 1010.0)
+
+        self.assertEqual(len(self.store.aggregate(1005.0)), 1)
+        self.assertEqual(len(self.store.aggregate(900.0, until=1005.0)), 2)
+        self.assertEqual(
+            [hop['runs'] for hop in self.store.aggregate(
+                900.0, target='8.8.8.8')], [1])
+        self.assertEqual(
+            [hop['hop_ip'] for hop in self.store.aggregate(
+                900.0, hop='1.1.1.1')], ['1.1.1.1'])
+
+    def test_retention(self) -> None:
+        """Assert rows older than retention are deleted on insert"""
+        self.store.insert(HistoryStore.rows(0.0, '1.1.1.1', self.trace), 0.0)
+        self.store.insert(
+            HistoryStore.rows(5000.0, '1.1.1.1', self.trace), 5000.0)
+        count = self.store.connection.execute('SELECT COUNT(*) FROM hops')
+        self.assertEqual(count.fetchone()[0], 2)
+
+    def test_plan(self) -> None:
+        """Assert every window is read through an index"""
+        for hop, target, index in ((None, None, 'hops_ts'),
+                                   ('1.1.1.1', None, 'hops_hop_ip_ts'),
+                                   (None, '1.1.1.1', 'hops_target_ts')):
+            with self.subTest(hop=hop, target=target):
+                plan = ' '.join(self.store.plan(0.0, hop=hop, target=target))
+                self.assertIn(f'USING INDEX {index}', plan)
+                self.assertNotIn('SCAN hops ', f'{plan} ')
+
+
+if __name__ == '__main__':
+    unittest.main()
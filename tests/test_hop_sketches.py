@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the HopSketches() class
+"""
+
+from array import array
+import os
+import tempfile
+import unittest
+
+from src.classes.hop_sketches import HopSketches
+from src.classes.trace import Trace
+
+
+class TestHopSketches(unittest.TestCase):
+    """
+    Unit Tests for the HopSketches() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'sketches.json')
+        self.sketches = HopSketches(self.filename, 3600)
+        self.trace = Trace()
+        self.trace.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+        self.trace.append('192.168.1.254', 100.0, 4, 0.0, 0.0, 0.0, 0.0, 0.0)
+        self.trace.append('1.1.1.1', 0.0, 4, 12.1, 13.0, 11.8, 15.2, 1.5)
+        self.trace.samples['1.1.1.1'] = array('d', [11.8, 12.1, 13.0, 15.2])
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.filename
+        del self.sketches
+        del self.trace
+        return super().tearDown()
+
+    def test_add(self) -> None:
+        """Assert every sample is added, or the last reply without them"""
+        self.sketches.add(self.trace, 100)
+        self.assertEqual(
+            sorted(self.sketches.sketches), ['1.1.1.1', '10.10.28.1'])
+        self.assertEqual(self.sketches.sketches['1.1.1.1'].count, 4)
+        self.assertEqual(self.sketches.sketches['10.10.28.1'].count, 1)
+        self.assertEqual(self.sketches.updated['1.1.1.1'], 100)
+
+    def test_save_and_load(self) -> None:
+        """Assert sketches keep counting across runs"""
+        self.sketches.add(self.trace)
+        self.assertTrue(self.sketches.save())
+        sketches = HopSketches(self.filename, 3600)
+        self.assertTrue(sketches.load())
+        sketches.add(self.trace)
+        self.assertEqual(sketches.sketches['1.1.1.1'].count, 8)
+
+    def test_load_invalid_file(self) -> None:
+        """Assert an invalid sketch file is reported and ignored"""
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            file.write('{"sketches": {"1.1.1.1": {}}}')
+        self.assertFalse(self.sketches.load())
+        self.assertEqual(self.sketches.sketches, {})
+
+    def test_prune(self) -> None:
+        """Assert hops not seen for max_age seconds are dropped"""
+        self.sketches.add(self.trace, 100)
+        self.sketches.prune(100 + 3600)
+        self.assertEqual(len(self.sketches.sketches), 2)
+        self.sketches.prune(100 + 3601)
+        self.assertEqual(self.sketches.sketches, {})
+        self.assertEqual(self.sketches.updated, {})
+
+    def test_prune_idle_runs(self) -> None:
+        """Assert hops not seen in the last max_idle_runs runs are dropped"""
+        sketches = HopSketches(self.filename, 0, max_idle_runs=2)
+        sketches.start_run()
+        sketches.add(self.trace, 100)
+        sketches.start_run()
+        sketches.add(self.trace.subset(['1.1.1.1']), 200)
+        sketches.prune()
+        self.assertEqual(len(sketches.sketches), 2)
+        sketches.start_run()
+        sketches.prune()
+        self.assertEqual(sorted(sketches.sketches), ['1.1.1.1'])
+        self.assertTrue(sketches.save())
+        sketches = HopSketches(self.filename, 0, max_idle_runs=2)
+        self.assertTrue(sketches.load())
+        sketches.start_run()
+        sketches.prune()
+        self.assertEqual(sketches.sketches, {})
+
+    def test_subset(self) -> None:
+        """Assert a subset shares the sketches of the hops it keeps"""
+        self.sketches.add(self.trace, 100)
+        subset = self.sketches.subset(['1.1.1.1', '8.8.8.8'])
+        self.assertEqual(list(subset.sketches), ['1.1.1.1'])
+        self.assertIs(
+            subset.sketches['1.1.1.1'], self.sketches.sketches['1.1.1.1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
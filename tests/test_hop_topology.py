@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the HopTopology() class
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from src.classes.hop_topology import HopTopology
+
+
+class TestHopTopology(unittest.TestCase):
+    """
+    Unit Tests for the HopTopology() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'topology.json')
+        self.topology = HopTopology(self.filename, 3600)
+        self.topology.learn('1.1.1.1', [
+            (1, '10.10.28.1'), (2, '192.168.1.254'), (3, '1.1.1.1')])
+        self.topology.learn('8.8.8.8', [
+            (1, '10.10.28.1'), (2, '192.168.1.254'), (4, '8.8.8.8')])
+        self.topology.learned_at = time.time()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.filename
+        del self.topology
+        return super().tearDown()
+
+    def test_learn_fills_missing_hops(self) -> None:
+        """Assert hops missing from a trace are stored as unknown"""
+        self.assertEqual(
+            self.topology.paths['8.8.8.8'],
+            ['10.10.28.1', '192.168.1.254', '???', '8.8.8.8'])
+
+    def test_shared_prefix(self) -> None:
+        """Assert the hops every route starts with are found"""
+        self.assertEqual(
+            self.topology.shared_prefix(['1.1.1.1', '8.8.8.8']),
+            ['10.10.28.1', '192.168.1.254'])
+
+    def test_shared_prefix_stops_at_unknown_hop(self) -> None:
+        """Assert a hop that did not answer ends the shared prefix"""
+        self.topology.learn('9.9.9.9', [(2, '192.168.1.254'), (3, '9.9.9.9')])
+        self.assertEqual(
+            self.topology.shared_prefix(['1.1.1.1', '9.9.9.9']), [])
+
+    def test_shared_prefix_leaves_a_hop_per_target(self) -> None:
+        """Assert a target on the shared route is still probed itself"""
+        self.topology.learn('10.10.28.1', [(1, '10.10.28.1')])
+        self.assertEqual(
+            self.topology.shared_prefix(['1.1.1.1', '10.10.28.1']), [])
+
+    def test_shared_prefix_single_target(self) -> None:
+        """Assert nothing is shared with only one route"""
+        self.assertEqual(self.topology.shared_prefix(['1.1.1.1']), [])
+
+    def test_is_fresh(self) -> None:
+        """Assert routes are only trusted when known and recent"""
+        self.assertTrue(self.topology.is_fresh(['1.1.1.1', '8.8.8.8']))
+        self.assertFalse(self.topology.is_fresh(['1.1.1.1', '9.9.9.9']))
+        self.topology.learned_at -= 3600
+        self.assertFalse(self.topology.is_fresh(['1.1.1.1']))
+
+    def test_save_and_load(self) -> None:
+        """Assert routes survive between runs"""
+        self.assertTrue(self.topology.save())
+        topology = HopTopology(self.filename, 3600)
+        self.assertTrue(topology.load())
+        self.assertEqual(topology.paths, self.topology.paths)
+        self.assertEqual(topology.learned_at, self.topology.learned_at)
+
+    def test_forget(self) -> None:
+        """Assert forgetting routes forces them to be relearned"""
+        self.topology.forget()
+        self.assertFalse(self.topology.is_fresh(['1.1.1.1']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the IcmpBackend() class
+"""
+
+import asyncio
+import socket
+import struct
+import unittest
+
+from unittest.mock import patch
+
+from src.classes.icmp_backend import IcmpBackend
+
+
+def ip_header(protocol: int = 1) -> bytes:
+    """Build a minimal 20 byte IPv4 header"""
+    return struct.pack(
+        '!BBHHHBBH4s4s', 0x45, 0, 0, 0, 0, 64, protocol, 0,
+        socket.inet_aton('10.10.28.1'), socket.inet_aton('10.10.28.2'))
+
+
+class FakeSocket:
+    """A socket that returns, or raises, queued results in order"""
+
+    def __init__(self, received: list, errors: list = None) -> None:
+        self.received = received
+        self.errors = errors or []
+
+    @staticmethod
+    def _next(results: list):
+        """Return or raise the next result, then would block"""
+        result = results.pop(0) if results else BlockingIOError()
+        if isinstance(result, OSError):
+            raise result
+        return result
+
+    def recvfrom(self, size: int) -> tuple:
+        """Return the next reply"""
+        return self._next(self.received)
+
+    def recvmsg(self, size: int, ancsize: int, flags: int) -> tuple:
+        """Return the next queued error"""
+        return self._next(self.errors)
+
+    def close(self) -> None:
+        """Nothing to close"""
+
+
+class TestIcmpBackend(unittest.TestCase):
+    """
+    Unit Tests for the IcmpBackend() class
+    """
+
+    def setUp(self) -> None:
+        self.backend = IcmpBackend(cycles=2, interval=0.01, reply_timeout=1)
+        self.backend.identifier = 0x1234
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.backend.close()
+        del self.backend
+        return super().tearDown()
+
+    def test_checksum(self) -> None:
+        """Assert a packet including its checksum sums to zero"""
+        packet = self.backend.build_packet(7)
+        self.assertEqual(self.backend.checksum(packet), 0)
+
+    def test_build_packet(self) -> None:
+        """Assert an echo request carries the identifier and sequence"""
+        packet = self.backend.build_packet(7)
+        icmp_type, code, _, identifier, sequence = struct.unpack(
+            '!BBHHH', packet[:8])
+        self.assertEqual((icmp_type, code), (8, 0))
+        self.assertEqual((identifier, sequence), (0x1234, 7))
+
+    def test_parse_reply_datagram(self) -> None:
+        """Assert an echo reply on a datagram socket is matched"""
+        reply = struct.pack('!BBHHH', 0, 0, 0, 0x9999, 7)
+        self.assertEqual(self.backend.parse_reply(reply), (0, 7))
+
+    def test_parse_reply_raw(self) -> None:
+        """Assert an echo reply on a raw socket must carry our identifier"""
+        self.backend.raw = True
+        reply = ip_header() + struct.pack('!BBHHH', 0, 0, 0, 0x1234, 7)
+        self.assertEqual(self.backend.parse_reply(reply), (0, 7))
+        other = ip_header() + struct.pack('!BBHHH', 0, 0, 0, 0x9999, 7)
+        self.assertIsNone(self.backend.parse_reply(other))
+
+    def test_parse_reply_raw_time_exceeded(self) -> None:
+        """Assert a time exceeded quoting our probe is matched"""
+        self.backend.raw = True
+        packet = ip_header() + struct.pack('!BBHI', 11, 0, 0, 0)
+        packet += ip_header() + self.backend.build_packet(42)
+        self.assertEqual(self.backend.parse_reply(packet), (11, 42))
+
+    def test_parse_reply_truncated(self) -> None:
+        """Assert truncated packets are ignored"""
+        self.backend.raw = True
+        self.assertIsNone(self.backend.parse_reply(b''))
+        self.assertIsNone(self.backend.parse_reply(ip_header() + b'\x0b'))
+
+    def test_parse_error(self) -> None:
+        """Assert a time exceeded from the error queue is matched"""
+        extended_error = struct.pack('=IBBBBII', 113, 2, 11, 0, 0, 0, 0)
+        offender = struct.pack(
+            '=HH4s8x', socket.AF_INET, 0, socket.inet_aton('10.10.28.1'))
+        ancdata = [
+            (socket.SOL_IP, self.backend.IP_RECVERR, extended_error + offender)
+        ]
+        self.assertEqual(
+            self.backend.parse_error(self.backend.build_packet(42), ancdata),
+            ('10.10.28.1', 11, 42))
+
+    def test_parse_error_not_icmp(self) -> None:
+        """Assert errors that did not come from ICMP are ignored"""
+        extended_error = struct.pack('=IBBBBII', 111, 1, 0, 0, 0, 0, 0)
+        ancdata = [
+            (socket.SOL_IP, self.backend.IP_RECVERR,
+             extended_error + bytes(16))
+        ]
+        self.assertIsNone(
+            self.backend.parse_error(self.backend.build_packet(42), ancdata))
+
+    def pending(self, loop: asyncio.AbstractEventLoop,
+                sequence: int) -> asyncio.Future:
+        """Register an outstanding probe"""
+        future = loop.create_future()
+        self.backend.pending[sequence] = (future, 0.0)
+        return future
+
+    def test_on_readable_error_queue(self) -> None:
+        """
+        Assert an ICMP error reported through recv() is read from the error
+        queue, and the replies behind it still are
+        """
+        extended_error = struct.pack('=IBBBBII', 113, 2, 11, 0, 0, 0, 0)
+        offender = struct.pack(
+            '=HH4s8x', socket.AF_INET, 0, socket.inet_aton('10.10.28.1'))
+        ancdata = [
+            (socket.SOL_IP, self.backend.IP_RECVERR, extended_error + offender)
+        ]
+        reply = struct.pack('!BBHHH', 0, 0, 0, 0x1234, 43)
+        self.backend.sock = FakeSocket(
+            [OSError(113, 'No route to host'), (reply, ('1.1.1.1', 0))],
+            [(self.backend.build_packet(42), ancdata, 0, None)])
+        loop = asyncio.new_event_loop()
+        try:
+            first = self.pending(loop, 42)
+            second = self.pending(loop, 43)
+            self.backend._on_readable()
+            self.assertEqual(first.result()[::2], ('10.10.28.1', 11))
+            self.assertEqual(second.result()[::2], ('1.1.1.1', 0))
+        finally:
+            loop.close()
+
+    def test_on_readable_socket_error(self) -> None:
+        """
+        Assert a socket error fails every outstanding probe instead of
+        reading forever
+        """
+        self.backend.sock = FakeSocket(
+            [OSError(100, 'Network is down')] * 1000)
+        loop = asyncio.new_event_loop()
+        try:
+            futures = [self.pending(loop, sequence) for sequence in (1, 2)]
+            with patch('builtins.print'):
+                self.backend._on_readable()
+            self.assertEqual([future.result() for future in futures],
+                             [None, None])
+            self.assertEqual(self.backend.pending, {})
+            self.assertEqual(len(self.backend.sock.received), 999)
+        finally:
+            loop.close()
+
+    def test_trace_invalid_ip(self) -> None:
+        """Assert raise ValueError when the IP is not IPv4"""
+        with self.assertRaises(ValueError):
+            asyncio.run(self.backend.trace('fe80::1'))
+
+    def test_trace_loopback(self) -> None:
+        """Assert loopback is reached in a single hop"""
+        try:
+            self.backend.open()
+        except OSError:
+            self.skipTest('ICMP sockets are not permitted')
+
+        async def trace() -> dict:
+            await self.backend.start()
+            try:
+                return await self.backend.trace('127.0.0.1')
+            finally:
+                await self.backend.stop()
+
+        trace = asyncio.run(trace())
+        self.assertEqual(list(trace), ['127.0.0.1'])
+        self.assertEqual(trace['127.0.0.1'].sent, 2)
+        self.assertEqual(trace['127.0.0.1'].loss, 0.0)
+
+    def test_ping_loopback(self) -> None:
+        """Assert loopback answers a direct ping"""
+        try:
+            self.backend.open()
+        except OSError:
+            self.skipTest('ICMP sockets are not permitted')
+
+        async def ping() -> dict:
+            await self.backend.start()
+            try:
+                return await self.backend.ping(['127.0.0.1'])
+            finally:
+                await self.backend.stop()
+
+        trace = asyncio.run(ping())
+        self.assertEqual(list(trace), ['127.0.0.1'])
+        self.assertEqual(trace['127.0.0.1'].loss, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
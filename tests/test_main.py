@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the functions of main.py
+"""
+
+import os
+import tempfile
+import unittest
+
+from main import (
+    limit_series, render_openmetrics, render_prometheus, split_shards,
+    write_prometheus_file
+)
+from src.classes.cycle_result import CycleResult
+from src.classes.hop_sketches import HopSketches
+from src.classes.series_limiter import SeriesLimiter
+from src.classes.trace import Trace
+
+# 2024-05-01 23:59:00 UTC
+NOW = 1714607940.0
+
+
+class TestMain(unittest.TestCase):
+    """
+    Unit Tests for the functions of main.py
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = {
+            'prometheus': {
+                'filepath': self.directory.name,
+                'filename': 'ping-stats.prom',
+                'histogram_buckets': [1, 10, 20]
+            }
+        }
+        self.trace = Trace()
+        self.trace.append('10.10.28.1', 0.0, 4, 5.0, 6.0, 5.0, 8.0, 1.0)
+        self.trace.append('1.1.1.1', 25.0, 4, 12.0, 13.0, 11.5, 15.0, 1.5)
+        self.targets = {
+            '1.1.1.1': {'timed_out': 0, 'last_success_timestamp': NOW - 10},
+            '8.8.8.8': {'timed_out': 1}
+        }
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.config
+        del self.trace
+        del self.targets
+        return super().tearDown()
+
+    def sketches(self) -> HopSketches:
+        """Build the sketches of every hop of the trace"""
+        sketches = HopSketches('unused.json', 0)
+        sketches.add(self.trace, NOW)
+        return sketches
+
+    def openmetrics(self) -> list:
+        """Render a full cycle in the OpenMetrics format"""
+        self.config['prometheus']['format'] = 'openmetrics'
+        result = CycleResult(
+            self.trace, self.targets, self.sketches(),
+            windows={'1m': {'1.1.1.1': {'loss': 25.0, 'average': 13.0}}},
+            dropped={'top_hops': 0, 'max_series': 7},
+            timestamps={'10.10.28.1': NOW, '1.1.1.1': NOW + 1.5},
+            completed={'1.1.1.1': NOW + 2.25})
+        return render_openmetrics(self.config, result).decode().splitlines()
+
+    def test_openmetrics_families(self) -> None:
+        """Assert every family is declared once with HELP then TYPE"""
+        lines = self.openmetrics()
+        types = {}
+        for index, line in enumerate(lines):
+            if line.startswith('# TYPE '):
+                _, _, name, kind = line.split(' ')
+                self.assertNotIn(name, types)
+                self.assertTrue(lines[index - 1].startswith(f'# HELP {name} '))
+                types[name] = kind
+        self.assertEqual(types['ping_stats_loss_percent'], 'gauge')
+        self.assertEqual(types['ping_stats_rtt_ms'], 'histogram')
+        self.assertEqual(
+            types['ping_stats_target_last_success_timestamp_seconds'],
+            'gauge')
+        self.assertEqual(types['ping_stats_window_average_ms'], 'gauge')
+        self.assertEqual(types['ping_stats_dropped_series'], 'gauge')
+        # Every sample follows the declaration of its family
+        family = None
+        for line in lines:
+            if line.startswith('# TYPE '):
+                family = line.split(' ')[2]
+            elif not line.startswith('#'):
+                self.assertTrue(line.startswith(family), line)
+
+    def test_openmetrics_eof(self) -> None:
+        """Assert the exposition ends with a single # EOF"""
+        lines = self.openmetrics()
+        self.assertEqual(lines[-1], '# EOF')
+        self.assertEqual(lines.count('# EOF'), 1)
+        self.assertNotIn('', lines)
+
+    def test_openmetrics_timestamps(self) -> None:
+        """
+        Assert hops are timestamped with when they were last seen, targets
+        with when they finished, and targets that timed out are not
+        """
+        lines = self.openmetrics()
+        self.assertIn(
+            'ping_stats_loss_percent{ip_addr="10.10.28.1"} 0.0 1714607940.000',
+            lines)
+        self.assertIn(
+            'ping_stats_average_ms{ip_addr="1.1.1.1"} 13.0 1714607941.500',
+            lines)
+        self.assertIn(
+            'ping_stats_target_timed_out{target="1.1.1.1"} 0 1714607942.250',
+            lines)
+        self.assertIn('ping_stats_target_timed_out{target="8.8.8.8"} 1', lines)
+        self.assertIn(
+            'ping_stats_window_loss_percent{ip_addr="1.1.1.1", window="1m"} '
+            '25.0', lines)
+
+    def test_openmetrics_histogram(self) -> None:
+        """
+        Assert the buckets are written with float le labels, then +Inf,
+        _count and _sum
+        """
+        lines = self.openmetrics()
+        name = 'ping_stats_rtt_ms'
+        labels = 'ip_addr="1.1.1.1"'
+        start = lines.index(f'{name}_bucket{{{labels}, le="1.0"}} 0 {NOW:.3f}')
+        self.assertEqual(lines[start:start + 6], [
+            f'{name}_bucket{{{labels}, le="1.0"}} 0 {NOW:.3f}',
+            f'{name}_bucket{{{labels}, le="10.0"}} 0 {NOW:.3f}',
+            f'{name}_bucket{{{labels}, le="20.0"}} 1 {NOW:.3f}',
+            f'{name}_bucket{{{labels}, le="+Inf"}} 1 {NOW:.3f}',
+            f'{name}_count{{{labels}}} 1 {NOW:.3f}',
+            f'{name}_sum{{{labels}}} 12.0 {NOW:.3f}'
+        ])
+
+    def routes(self) -> tuple:
+        """Build the traces of two targets sharing their gateway"""
+        first = Trace()
+        first.append('10.10.28.1', 0.0, 4, 5.0, 6.0, 5.0, 8.0, 1.0)
+        first.append('1.1.1.1', 25.0, 4, 12.0, 13.0, 11.5, 15.0, 1.5)
+        second = Trace()
+        second.append('10.10.28.1', 0.0, 4, 5.0, 6.0, 5.0, 8.0, 1.0)
+        second.append('8.8.8.8', 10.0, 4, 20.0, 21.0, 19.5, 22.0, 1.0)
+        return first, second
+
+    def windows(self) -> dict:
+        """Build the rolling windows of every hop of the trace"""
+        return {
+            window: {
+                ip: {'loss': 0.0, 'average': 1.0} for ip in self.trace
+            }
+            for window in ('1m', '5m', '15m')
+        }
+
+    def series(self, result: CycleResult) -> int:
+        """Count the series written for a cycle, in every file"""
+        return sum(
+            len(render_prometheus(self.config, group).splitlines())
+            for group in split_shards(result).values())
+
+    def test_limit_series_sharded(self) -> None:
+        """
+        Assert a hop costs its series in every shard it is written to, and
+        a hop that does not fit does not stop cheaper hops from being kept
+        """
+        first, second = self.routes()
+        self.trace = first.copy()
+        self.trace.update(second)
+        self.targets = {
+            '1.1.1.1': {'timed_out': 0, 'last_success_timestamp': NOW},
+            '8.8.8.8': {'timed_out': 0}
+        }
+        result = CycleResult(
+            self.trace, self.targets, self.sketches(), self.windows(),
+            shards={
+                'a': CycleResult(first, {'1.1.1.1': self.targets['1.1.1.1']}),
+                'b': CycleResult(second, {'8.8.8.8': self.targets['8.8.8.8']})
+            })
+        # The gateway costs 7 series in each shard, 6 in the histogram and
+        # 6 in the windows; the targets cost 7 + 6 + 6. With the 3 target
+        # and 2 dropped series, only the targets fit in 45
+        limiter = SeriesLimiter(max_series=45)
+        limit_series(self.config, limiter, result)
+        self.assertEqual(list(result.traces), ['1.1.1.1', '8.8.8.8'])
+        self.assertEqual(list(result.shards['a'].traces), ['1.1.1.1'])
+        self.assertEqual(list(result.shards['b'].traces), ['8.8.8.8'])
+        self.assertEqual(
+            sorted(result.sketches.sketches), ['1.1.1.1', '8.8.8.8'])
+        self.assertEqual(
+            sorted(result.windows['15m']), ['1.1.1.1', '8.8.8.8'])
+        self.assertEqual(result.dropped, {'top_hops': 0, 'max_series': 26})
+        self.assertEqual(self.series(result), 43)
+
+    def test_limit_series_histogram(self) -> None:
+        """
+        Assert hops outside the top of every trace are dropped from the
+        histogram too, and the series written match the costs counted
+        """
+        first, second = self.routes()
+        self.trace = first.copy()
+        self.trace.update(second)
+        self.config['prometheus']['histogram'] = True
+        result = CycleResult(self.trace, self.targets, self.sketches())
+        limiter = SeriesLimiter(top_hops=1, max_series=100)
+        limiter.add(first)
+        limiter.add(second)
+        limit_series(self.config, limiter, result)
+        self.assertEqual(list(result.traces), ['1.1.1.1', '8.8.8.8'])
+        self.assertEqual(
+            sorted(result.sketches.sketches), ['1.1.1.1', '8.8.8.8'])
+        # 7 stats, 3 buckets, +Inf, _sum and _count
+        self.assertEqual(result.dropped, {'top_hops': 13, 'max_series': 0})
+        self.assertEqual(self.series(result), 3 + 2 + 2 * 13)
+
+    def test_limit_series_max_series(self) -> None:
+        """Assert only the target and dropped series are left if no hop fits"""
+        result = CycleResult(self.trace, self.targets, self.sketches())
+        limiter = SeriesLimiter(max_series=17)
+        limit_series(self.config, limiter, result)
+        self.assertEqual(list(result.traces), [])
+        self.assertEqual(result.sketches.sketches, {})
+        self.assertEqual(result.dropped['max_series'], 26)
+        self.assertEqual(self.series(result), 5)
+
+
+    def shards(self) -> CycleResult:
+        """Build a cycle with one shard per target"""
+        first, second = self.routes()
+        return CycleResult(
+            sketches=self.sketches(), dropped={'top_hops': 0, 'max_series': 0},
+            shards={
+                '0': CycleResult(first, {'1.1.1.1': self.targets['1.1.1.1']}),
+                '1': CycleResult(second, {'8.8.8.8': self.targets['8.8.8.8']})
+            })
+
+    def read(self, name: str) -> str:
+        """Read a file written to the temporary directory"""
+        with open(os.path.join(self.directory.name, name),
+                  encoding='utf-8') as file:
+            return file.read()
+
+    def test_write_prometheus_file_sharded(self) -> None:
+        """
+        Assert every shard is written to its own file, and the series that
+        are not per target to the main file
+        """
+        self.config['prometheus']['shards'] = 2
+        result = self.shards()
+        self.assertTrue(write_prometheus_file(self.config, result))
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ['ping-stats.0.prom', 'ping-stats.1.prom', 'ping-stats.prom'])
+        for shard, group in split_shards(result).items():
+            name = f'ping-stats.{shard}.prom' if shard else 'ping-stats.prom'
+            self.assertEqual(
+                self.read(name),
+                render_prometheus(self.config, group, shard).decode())
+        self.assertIn('target="1.1.1.1"', self.read('ping-stats.0.prom'))
+        self.assertNotIn('target="', self.read('ping-stats.prom'))
+
+    def test_write_prometheus_file_stale_shards(self) -> None:
+        """
+        Assert the files of shards that are no longer configured are
+        removed, and other files are left alone
+        """
+        for name in ('ping-stats.2.prom', 'ping-stats.dns.prom',
+                     'other.0.prom'):
+            with open(os.path.join(self.directory.name, name), 'w',
+                      encoding='utf-8') as file:
+                file.write('ping_stats_target_timed_out{target="9.9.9.9"} 0\n')
+        self.config['prometheus']['shards'] = 2
+        self.assertTrue(write_prometheus_file(self.config, self.shards()))
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ['other.0.prom', 'ping-stats.0.prom', 'ping-stats.1.prom',
+             'ping-stats.prom'])
+        # Without shards, every shard file goes
+        del self.config['prometheus']['shards']
+        result = CycleResult(self.trace, self.targets)
+        self.assertTrue(write_prometheus_file(self.config, result))
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ['other.0.prom', 'ping-stats.prom'])
+
+    def test_write_prometheus_file_failed(self) -> None:
+        """Assert stale shard files are kept if any file failed to write"""
+        stale = os.path.join(self.directory.name, 'ping-stats.2.prom')
+        with open(stale, 'w', encoding='utf-8'):
+            pass
+        os.mkdir(os.path.join(self.directory.name, 'ping-stats.1.prom'))
+        self.config['prometheus']['shards'] = 2
+        self.assertFalse(write_prometheus_file(self.config, self.shards()))
+        self.assertTrue(os.path.exists(stale))
+
+
+    def test_write_prometheus_file_unchanged(self) -> None:
+        """
+        Assert a run only replaces the shard files whose series changed. A
+        target that succeeded gets a new last_success_timestamp, while the
+        file of a target that kept timing out is left alone
+        """
+        self.config['prometheus']['shards'] = 2
+        first, _ = self.routes()
+        dropped = {'top_hops': 0, 'max_series': 0}
+        inodes = []
+        for now in (NOW, NOW + 60):
+            self.targets['1.1.1.1']['last_success_timestamp'] = now
+            result = CycleResult(dropped=dropped, shards={
+                '0': CycleResult(first, {'1.1.1.1': self.targets['1.1.1.1']}),
+                '1': CycleResult(None, {'8.8.8.8': self.targets['8.8.8.8']})
+            })
+            self.assertTrue(write_prometheus_file(self.config, result))
+            inodes.append({
+                name: os.stat(os.path.join(self.directory.name, name)).st_ino
+                for name in os.listdir(self.directory.name)
+            })
+        self.assertEqual(inodes[0]['ping-stats.prom'],
+                         inodes[1]['ping-stats.prom'])
+        self.assertNotEqual(inodes[0]['ping-stats.0.prom'],
+                            inodes[1]['ping-stats.0.prom'])
+        self.assertEqual(inodes[0]['ping-stats.1.prom'],
+                         inodes[1]['ping-stats.1.prom'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the MetricsServer() class
+"""
+
+import gzip
+import http.client
+import unittest
+
+from src.classes.metrics_handler import MetricsHandler
+from src.classes.metrics_server import MetricsServer
+
+
+class TestMetricsServer(unittest.TestCase):
+    """
+    Unit Tests for the MetricsServer() class
+    """
+
+    def setUp(self) -> None:
+        self.config = {
+            'exporter': {
+                'listen_address': '127.0.0.1',
+                'port': 0,
+                'interval': 30
+            }
+        }
+        self.server = MetricsServer(self.config)
+        self.body = b'ping_stats{ip_addr="1.1.1.1", stat="loss"} 0.0\n'
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        del self.config
+        del self.server
+        del self.body
+        return super().tearDown()
+
+    def get(self, path: str, headers: dict = None,
+            method: str = 'GET') -> tuple:
+        """Scrape the running server and return the response and body"""
+        connection = http.client.HTTPConnection(
+            *self.server.server_address, timeout=5)
+        try:
+            connection.request(method, path, headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_defaults(self) -> None:
+        """Assert the exporter section is optional"""
+        server = MetricsServer({'mtr': {'ips': ['127.0.0.1']}})
+        self.assertEqual(server.listen_address, '')
+        self.assertEqual(server.port, 9934)
+        self.assertEqual(server.interval, 60)
+
+    def test_invalid_config(self) -> None:
+        """Assert raise ValueError on unknown keys or invalid values"""
+        for key, value in (('unknown', 1), ('port', 70000), ('port', '80'),
+                           ('interval', 0), ('listen_address', None)):
+            config = {'exporter': {key: value}}
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(ValueError):
+                    MetricsServer(config)
+
+    def test_no_cycle_yet(self) -> None:
+        """Assert scrapes fail until the first cycle has been rendered"""
+        self.assertTrue(self.server.start())
+        response, _ = self.get('/metrics')
+        self.assertEqual(response.status, 503)
+
+    def test_metrics(self) -> None:
+        """Assert /metrics serves the last update"""
+        self.assertTrue(self.server.start())
+        self.server.update(self.body)
+        response, body = self.get('/metrics')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, self.body)
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(
+            response.getheader('Content-Type'),
+            'text/plain; version=0.0.4; charset=utf-8')
+        self.server.update(b'')
+        _, body = self.get('/metrics?name[]=ping_stats')
+        self.assertEqual(body, b'')
+
+    def test_metrics_openmetrics(self) -> None:
+        """Assert OpenMetrics are served with their own content type"""
+        self.assertTrue(self.server.start())
+        self.server.update(self.body + b'# EOF\n', 'openmetrics')
+        response, _ = self.get('/metrics')
+        self.assertTrue(response.getheader('Content-Type').startswith(
+            'application/openmetrics-text; version=1.0.0'))
+
+    def test_metrics_gzip(self) -> None:
+        """Assert /metrics is compressed when the scraper accepts gzip"""
+        self.assertTrue(self.server.start())
+        self.server.update(self.body)
+        response, body = self.get(
+            '/metrics', {'Accept-Encoding': 'deflate, gzip;q=1.0'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(gzip.decompress(body), self.body)
+
+    def test_metrics_gzip_refused(self) -> None:
+        """Assert /metrics is not compressed when gzip has a q-value of 0"""
+        self.assertTrue(self.server.start())
+        self.server.update(self.body)
+        response, body = self.get(
+            '/metrics', {'Accept-Encoding': 'deflate, gzip;q=0'})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(body, self.body)
+
+    def test_accepts_gzip(self) -> None:
+        """Assert gzip is only accepted with a q-value above 0"""
+        for accept, expected in (('', False), ('gzip', True),
+                                 ('deflate, gzip;q=0.5', True),
+                                 ('gzip;q=0', False), ('GZIP; Q=0.0', False),
+                                 ('gzip;q=0.000', False), ('*', True),
+                                 ('*;q=0', False), ('gzip;q=1, *;q=0', True),
+                                 ('gzip;q=0, *', False), ('x-gzip', True),
+                                 ('gzip;q=x', False), ('deflate', False)):
+            with self.subTest(accept=accept):
+                self.assertEqual(
+                    MetricsHandler.accepts_gzip(accept), expected)
+
+    def test_head(self) -> None:
+        """Assert HEAD sends the headers of /metrics without the body"""
+        self.assertTrue(self.server.start())
+        self.server.update(self.body)
+        response, body = self.get('/metrics', method='HEAD')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(
+            response.getheader('Content-Length'), str(len(self.body)))
+        self.assertEqual(body, b'')
+
+    def test_not_found(self) -> None:
+        """Assert every other path is not found"""
+        self.assertTrue(self.server.start())
+        self.server.update(self.body)
+        response, _ = self.get('/')
+        self.assertEqual(response.status, 404)
+
+    def test_start_failed(self) -> None:
+        """Assert a port that is already bound is reported"""
+        self.assertTrue(self.server.start())
+        self.config['exporter']['port'] = self.server.server_address[1]
+        server = MetricsServer(self.config)
+        self.assertFalse(server.start())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,14 +3,90 @@
 Unit Tests for the MTR() class
 """
 
-from subprocess import CalledProcessError, CompletedProcess
+import asyncio
+import glob
+import random
+import re
+from subprocess import CalledProcessError, CompletedProcess, TimeoutExpired
 import unittest
 
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from src.classes.mtr import MTR
 
 
+def parse_report_lines(mtr_stdout: str) -> tuple:
+    """
+    The line by line --report parser MTR.parse_mtr_report() replaced, kept
+    as the reference the fast parser must agree with
+    """
+    trace = {}
+    hops = []
+    prematch = re.compile(MTR.IP4_PATTERN.split('^', maxsplit=1)[-1])
+    pattern = re.compile(
+        r"""^\s+(?P<hop>\d{1,2})\.\|\-+\s+(?P<ip_addr>\d+\.\d+\.\d+\.\d+)\s+
+        (?P<loss>\d+\.\d+)\%\s+(?P<sent>\d+)\s+(?P<last>\d+\.\d+)\s+
+        (?P<average>\d+\.\d+)\s+(?P<best>\d+\.\d+)\s+
+        (?P<worst>\d+\.\d+)\s+(?P<stdev>\d+\.\d+)$""", re.X
+    )
+    for line in mtr_stdout.split('\n'):
+        if not re.search(prematch, line):
+            continue
+        matches = re.match(pattern, line)
+        if not matches:
+            continue
+        hops.append((int(matches['hop']), matches['ip_addr']))
+        trace[matches['ip_addr']] = {
+            'loss': float(matches['loss']),
+            'sent': int(matches['sent']),
+            'last': float(matches['last']),
+            'average': float(matches['average']),
+            'best': float(matches['best']),
+            'worst': float(matches['worst']),
+            'stdev': float(matches['stdev'])
+        }
+    return trace, hops
+
+
+def generate_report(rand: random.Random) -> str:
+    """
+    Generate --report output, including the malformed and unusual lines a
+    parser has to skip
+    """
+    lines = [
+        'Start: 2025-01-23T16:48:05-0500',
+        'HOST: benjaminz-thinkpad          Loss%   Snt   Last   Avg  Best  '
+        'Wrst StDev'
+    ]
+    for hop in range(1, rand.randint(1, 120)):
+        ip = '.'.join(str(rand.randint(0, 255)) for _ in range(4))
+        if rand.random() < 0.1:
+            ip = rand.choice(['???', 'one.one.one.one', '10.0.0.1'])
+        stats = [rand.uniform(0, 999) for _ in range(5)]
+        columns = [
+            f'{hop:3}.|--', f'{ip:<26}', f'{rand.uniform(0, 100):5.1f}%',
+            f'{rand.randint(1, 99):5}', *(f'{stat:6.1f}' for stat in stats)
+        ]
+        variant = rand.random()
+        if variant < 0.05:
+            columns[2] = columns[2].rstrip('%')
+        elif variant < 0.1:
+            columns.append('extra')
+        elif variant < 0.15:
+            columns.pop()
+        separator = '\t' if rand.random() < 0.05 else ' '
+        line = separator.join(columns)
+        if rand.random() < 0.05:
+            line = line.lstrip()
+        if rand.random() < 0.05:
+            line += '\r'
+        lines.append(line)
+        if rand.random() < 0.05:
+            lines.append(rand.choice(['', '   ', '\t']))
+    ending = '\n' if rand.random() < 0.8 else ''
+    return '\n'.join(lines) + ending
+
+
 class TestMTR(unittest.TestCase):
     """
     Unit Tests for the MTR() class
@@ -59,6 +135,54 @@ class TestMTR(unittest.TestCase):
         self.mtr.ip = self.ip
         self.assertEqual(self.mtr.ip, self.ip)
 
+    def test_set_mode_fails(self) -> None:
+        """
+        Assert raises ValueError when an unsupported mode is used
+        """
+        with self.assertRaises(ValueError):
+            self.mtr.mode = 'xml'
+
+    def test_build_command_json(self) -> None:
+        """Assert json mode asks mtr for --json instead of --report"""
+        self.mtr.ip = self.ip
+        self.mtr.mode = 'json'
+        cmd = self.mtr._build_command()
+        self.assertIn('--json', cmd)
+        self.assertNotIn('--report', cmd)
+
+    def test_build_command_ttl_range(self) -> None:
+        """Assert a TTL range is passed to mtr only when set"""
+        self.mtr.ip = self.ip
+        self.assertNotIn('--first-ttl', self.mtr._build_command())
+        self.mtr.first_ttl = 3
+        self.mtr.max_ttl = 5
+        cmd = self.mtr._build_command()
+        self.assertEqual(cmd[cmd.index('--first-ttl') + 1], '3')
+        self.assertEqual(cmd[cmd.index('--max-ttl') + 1], '5')
+        self.assertEqual(cmd[-1], self.ip)
+
+    @patch('src.classes.mtr.subprocess.run')
+    def test_supports_json(self, mock) -> None:
+        """Assert --json support is read from the help text"""
+        mock.return_value = CompletedProcess(**{
+            'returncode': 0,
+            'args': '/usr/bin/mtr --help',
+            'stdout': b'  -j, --json                output json\n',
+            'stderr': b'',
+        })
+        self.assertTrue(self.mtr.supports_json())
+
+    @patch('src.classes.mtr.subprocess.run')
+    def test_supports_json_missing(self, mock) -> None:
+        """Assert an old mtr without --json is detected"""
+        mock.return_value = CompletedProcess(**{
+            'returncode': 0,
+            'args': '/usr/bin/mtr --help',
+            'stdout': b'  -r, --report              output using report\n',
+            'stderr': b'',
+        })
+        self.assertFalse(self.mtr.supports_json())
+
     @patch('src.classes.mtr.subprocess.run', side_effect=CalledProcessError(
         **{
             'returncode': 1,
@@ -96,6 +220,100 @@ class TestMTR(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual(self.mtr.mtr_stdout, 'Start\n')
 
+    @patch('src.classes.mtr.subprocess.run', side_effect=TimeoutExpired(
+        cmd='/usr/bin/mtr --report --report-cycles 4 1.1.1.1', timeout=5))
+    def test_run_mtr_timed_out(self, mock):
+        """Mock a subprocess.run call that times out"""
+        self.mtr.ip = self.ip
+        self.mtr.timeout = 5
+        result = self.mtr.run_mtr()
+        self.assertEqual(mock.call_args.kwargs['timeout'], 5)
+        self.assertFalse(result)
+        self.assertTrue(self.mtr.timed_out)
+        self.assertEqual(self.mtr.error['timeout'], 5)
+
+    @patch('src.classes.mtr.asyncio.create_subprocess_exec')
+    def test_run_mtr_async_timed_out(self, mock):
+        """Assert a hung mtr is killed once the timeout passes"""
+        async def hang():
+            await asyncio.sleep(10)
+
+        async def wait():
+            process.returncode = -9
+            return -9
+
+        process = MagicMock()
+        process.returncode = None
+        process.communicate = hang
+        process.wait = wait
+        mock.return_value = process
+        self.mtr.ip = self.ip
+        self.mtr.timeout = 0.01
+        result = asyncio.run(self.mtr.run_mtr_async())
+        self.assertFalse(result)
+        self.assertTrue(self.mtr.timed_out)
+        self.assertTrue(process.kill.called)
+
+    @patch('src.classes.mtr.asyncio.create_subprocess_exec')
+    def test_run_mtr_async(self, mock):
+        """Mock an asyncio subprocess that is successful"""
+        process = MagicMock()
+        process.returncode = 0
+        process.communicate = AsyncMock(return_value=(b'Start\n', b''))
+        mock.return_value = process
+        self.mtr.ip = self.ip
+        result = asyncio.run(self.mtr.run_mtr_async())
+        self.assertTrue(mock.called)
+        self.assertTrue(result)
+        self.assertEqual(self.mtr.mtr_stdout, 'Start\n')
+
+    @patch('src.classes.mtr.asyncio.create_subprocess_exec')
+    def test_run_mtr_async_failed(self, mock):
+        """Mock an asyncio subprocess that exits with a non-zero code"""
+        process = MagicMock()
+        process.returncode = 1
+        process.communicate = AsyncMock(
+            return_value=(b'', b'/usr/bin/mtr: unrecognized option'))
+        mock.return_value = process
+        self.mtr.ip = self.ip
+        result = asyncio.run(self.mtr.run_mtr_async())
+        self.assertFalse(result)
+        self.assertEqual(self.mtr.mtr_stdout, '')
+        self.assertEqual(self.mtr.error['returncode'], 1)
+        self.assertEqual(
+            self.mtr.error['stderr'], '/usr/bin/mtr: unrecognized option')
+
+    @patch('src.classes.mtr.asyncio.create_subprocess_exec')
+    def test_run_mtr_async_raw(self, mock):
+        """Assert raw mode streams records into a trace"""
+        async def stdout():
+            for line in [b'h 0 10.10.28.1\n', b'p 0 5800 1\n',
+                         b'p 0 16800 2\n']:
+                yield line
+
+        process = MagicMock()
+        process.returncode = 0
+        process.stdout = stdout()
+        process.stderr.read = AsyncMock(return_value=b'')
+        process.wait = AsyncMock(return_value=0)
+        mock.return_value = process
+        self.mtr.ip = self.ip
+        self.mtr.mode = 'raw'
+        self.assertTrue(asyncio.run(self.mtr.run_mtr_async()))
+        self.assertTrue(self.mtr.parse_mtr_stdout())
+        self.assertEqual(self.mtr.trace['10.10.28.1'].loss, 50.0)
+        self.assertEqual(self.mtr.trace['10.10.28.1'].worst, 16.8)
+        self.assertEqual(
+            list(self.mtr.samples['10.10.28.1']), [5.8, 16.8])
+
+    def test_parse_raw_output(self):
+        """Assert buffered raw output is parsed when nothing was streamed"""
+        self.mtr.mode = 'raw'
+        self.mtr.mtr_stdout = 'h 0 10.10.28.1\np 0 5800 1\n'
+        self.assertTrue(self.mtr.parse_mtr_stdout())
+        self.assertEqual(self.mtr.hops, [(1, '10.10.28.1')])
+        self.assertEqual(self.mtr.trace['10.10.28.1'].best, 5.8)
+
     def test_parse_output_no_matching_lines(self):
         """If no regex matches, ensure we get an empty result"""
         output = 'This does not work\n'
@@ -114,7 +332,7 @@ HOST: benjaminz-thinkpad          Loss%   Snt   Last   Avg  Best  Wrst StDev\n
         """
         self.mtr.mtr_stdout = output
         self.mtr.parse_mtr_stdout()
-        self.assertEqual(self.mtr.trace, {
+        self.assertEqual(self.mtr.trace.to_dict(), {
             '10.10.28.1': {
                 'loss': 0.0,
                 'sent': 4,
@@ -140,7 +358,9 @@ HOST: benjaminz-thinkpad          Loss%   Snt   Last   Avg  Best  Wrst StDev\n
         """
         self.mtr.mtr_stdout = output
         self.mtr.parse_mtr_stdout()
-        self.assertEqual(self.mtr.trace, {
+        self.assertEqual(
+            self.mtr.hops, [(1, '10.10.28.1'), (2, '192.168.1.254')])
+        self.assertEqual(self.mtr.trace.to_dict(), {
             '10.10.28.1': {
                 'loss': 0.0,
                 'sent': 4,
@@ -160,6 +380,96 @@ HOST: benjaminz-thinkpad          Loss%   Snt   Last   Avg  Best  Wrst StDev\n
             }
         })
 
+    def test_parse_json_output(self):
+        """Assert json output keeps hop indexes and unreachable hops"""
+        self.mtr.mode = 'json'
+        self.mtr.mtr_stdout = """{"report": {
+            "mtr": {"src": "thinkpad", "dst": "1.1.1.1", "tests": 4},
+            "hubs": [
+                {"count": 1, "host": "10.10.28.1", "Loss%": 0.0, "Snt": 4,
+                 "Last": 5.8, "Avg": 11.9, "Best": 5.8, "Wrst": 16.8,
+                 "StDev": 5.6},
+                {"count": 2, "host": "???", "Loss%": 100.0, "Snt": 4,
+                 "Last": 0.0, "Avg": 0.0, "Best": 0.0, "Wrst": 0.0,
+                 "StDev": 0.0},
+                {"count": "100", "host": "1.1.1.1", "Loss%": 25.0,
+                 "Snt": 4, "Last": 8.5, "Avg": 10.9, "Best": 8.5,
+                 "Wrst": 14.4, "StDev": 2.6}
+            ]}}"""
+        self.assertTrue(self.mtr.parse_mtr_stdout())
+        self.assertEqual(
+            self.mtr.hops, [(1, '10.10.28.1'), (2, '???'), (100, '1.1.1.1')])
+        self.assertEqual(
+            [self.mtr.trace.ttl(row) for row in range(len(self.mtr.trace))],
+            [1, 100])
+        self.assertEqual(self.mtr.trace.to_dict(), {
+            '10.10.28.1': {
+                'loss': 0.0,
+                'sent': 4,
+                'last': 5.8,
+                'average': 11.9,
+                'best': 5.8,
+                'worst': 16.8,
+                'stdev': 5.6
+            }, '1.1.1.1': {
+                'loss': 25.0,
+                'sent': 4,
+                'last': 8.5,
+                'average': 10.9,
+                'best': 8.5,
+                'worst': 14.4,
+                'stdev': 2.6
+            }
+        })
+
+    def test_parse_json_output_invalid(self):
+        """Assert invalid json output fails to parse"""
+        self.mtr.mode = 'json'
+        self.mtr.mtr_stdout = 'mtr: Failed to resolve host\n'
+        self.assertFalse(self.mtr.parse_mtr_stdout())
+        self.assertEqual(self.mtr.trace, {})
+
+
+class TestReportParser(unittest.TestCase):
+    """
+    Equivalence tests between MTR.parse_mtr_report() and the line by line
+    parser it replaced
+    """
+
+    def assertEquivalent(self, output: str) -> None:
+        """Assert both parsers produce the same trace and hops"""
+        mtr = MTR('/usr/bin/mtr')
+        mtr.mtr_stdout = output
+        self.assertTrue(mtr.parse_mtr_stdout())
+        self.assertEqual(
+            (mtr.trace.to_dict(), mtr.hops), parse_report_lines(output))
+
+    def test_fixtures(self) -> None:
+        """Assert the recorded reports are parsed identically"""
+        for filename in glob.glob('tests/fixtures/replay/*.report'):
+            with open(filename, 'r', encoding='utf-8') as file:
+                output = file.read()
+            with self.subTest(filename=filename):
+                self.assertEquivalent(output)
+
+    def test_generated_corpus(self) -> None:
+        """Assert generated reports are parsed identically"""
+        rand = random.Random(1)
+        for index in range(500):
+            output = generate_report(rand)
+            with self.subTest(index=index):
+                self.assertEquivalent(output)
+
+    def test_bytes(self) -> None:
+        """Assert the bytes mtr printed are parsed without decoding first"""
+        mtr = MTR('/usr/bin/mtr')
+        mtr.mtr_output = (
+            b'  1.|-- 10.10.28.1                 0.0%     4    5.8  11.9'
+            b'   5.8  16.8   5.6\n')
+        self.assertTrue(mtr.parse_mtr_stdout())
+        self.assertEqual(mtr.hops, [(1, '10.10.28.1')])
+        self.assertEqual(mtr.trace['10.10.28.1'].worst, 16.8)
+
 
 if __name__ == '__main__':
     unittest.main()
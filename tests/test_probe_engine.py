@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the ProbeEngine() class
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from unittest.mock import patch
+
+from src.classes.icmp_backend import IcmpBackend
+from src.classes.mtr_backend import MtrBackend
+from src.classes.probe_backend import ProbeBackend
+from src.classes.probe_engine import ProbeEngine
+from src.classes.replay_backend import ReplayBackend
+from src.classes.hop import Hop
+from src.classes.trace import Trace
+from src.classes.trace_accumulator import TraceAccumulator
+
+
+class FakeBackend(ProbeBackend):
+    """
+    A probe backend that returns canned traces after an optional delay
+    """
+
+    name = 'fake'
+
+    ROUTE = ['10.10.28.1', '192.168.1.254']
+
+    SENT = 10
+
+    def __init__(self, delays: dict = None) -> None:
+        self.delays = delays or {}
+        self.traced = []
+        self.calls = []
+        self.pinged = []
+        self.lost = []
+        self.running = 0
+        self.peak = 0
+        self.started = False
+        self.stopped = False
+
+    async def start(self) -> None:
+        self.started = True
+
+    async def stop(self) -> None:
+        self.stopped = True
+
+    async def trace(self, ip: str, first_ttl: int = 1, max_ttl: int = 0,
+                    hops: list = None) -> dict:
+        self.traced.append(ip)
+        self.calls.append((ip, first_ttl, max_ttl))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(ip, 0.01))
+        finally:
+            self.running -= 1
+        if ip == '0.0.0.0':
+            return Trace()
+
+        route = self.ROUTE + [ip] if ip not in self.ROUTE else self.ROUTE
+        wanted = [
+            (hop, host) for hop, host in enumerate(route, 1)
+            if hop >= first_ttl and (not max_ttl or hop <= max_ttl)
+        ]
+        if hops is not None:
+            hops.extend(wanted)
+        trace = Trace()
+        for hop, host in wanted:
+            trace.add(Hop(host, float(hop), self.SENT))
+        return trace
+
+    async def ping(self, ips: list) -> dict:
+        self.pinged.append(list(ips))
+        trace = Trace()
+        for ip in ips:
+            trace.add(Hop(ip, 100.0 if ip in self.lost else 0.0, self.SENT))
+        return trace
+
+
+class TestProbeEngine(unittest.TestCase):
+    """
+    Unit Tests for the ProbeEngine() class
+    """
+
+    def setUp(self) -> None:
+        self.config = {
+            'mtr': {
+                'ips': ['1.1.1.1', '8.8.8.8', '9.9.9.9'],
+                'mode': 'report'
+            }
+        }
+        self.mtr_binary = '/usr/bin/mtr'
+        self.engine = ProbeEngine(self.config)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.engine
+        del self.mtr_binary
+        del self.config
+        return super().tearDown()
+
+    def test_missing_config_section(self) -> None:
+        """
+        Assert raise KeyError when 'mtr' key is missing in config dict
+        """
+        with self.assertRaises(KeyError):
+            ProbeEngine({'prometheus': {}})
+
+    def test_missing_config_key(self) -> None:
+        """
+        Assert raise ValueError when the ips key is missing
+        """
+        with self.assertRaises(ValueError):
+            ProbeEngine({'mtr': {'concurrency': 2}})
+
+    def test_invalid_key_in_config(self) -> None:
+        """
+        Assert raise ValueError when an unknown key exists in config dict
+        """
+        self.config['mtr'].update({'invalid': 'something'})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_invalid_concurrency(self) -> None:
+        """
+        Assert raise ValueError when concurrency is not a positive integer
+        """
+        self.config['mtr'].update({'concurrency': 0})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_invalid_packets_per_second(self) -> None:
+        """
+        Assert raise ValueError when packets_per_second is negative
+        """
+        self.config['mtr'].update({'packets_per_second': -1})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_invalid_jitter(self) -> None:
+        """
+        Assert raise ValueError when jitter is not a number
+        """
+        self.config['mtr'].update({'jitter': 'soon'})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_invalid_mode(self) -> None:
+        """
+        Assert raise ValueError when mode is not supported
+        """
+        self.config['mtr'].update({'mode': 'xml'})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_invalid_timeout(self) -> None:
+        """
+        Assert raise ValueError when timeout is negative
+        """
+        self.config['mtr'].update({'timeout': -5})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_invalid_backend(self) -> None:
+        """
+        Assert raise ValueError when backend is not supported
+        """
+        self.config['mtr'].update({'backend': 'carrier-pigeon'})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    @patch('src.classes.probe_engine.MTR.supports_json')
+    def test_resolve_mode_auto_json(self, mock) -> None:
+        """Assert auto resolves to json when mtr supports it"""
+        mock.return_value = True
+        self.engine.mode = 'auto'
+        self.assertEqual(self.engine.resolve_mode(self.mtr_binary), 'json')
+
+    @patch('src.classes.probe_engine.MTR.supports_json')
+    def test_resolve_mode_auto_report(self, mock) -> None:
+        """Assert auto falls back to report when mtr lacks --json"""
+        mock.return_value = False
+        self.engine.mode = 'auto'
+        self.assertEqual(self.engine.resolve_mode(self.mtr_binary), 'report')
+
+    @patch('src.classes.probe_engine.MTR.supports_json')
+    def test_resolve_mode_configured(self, mock) -> None:
+        """Assert a configured mode is used without probing mtr"""
+        self.assertEqual(self.engine.resolve_mode(self.mtr_binary), 'report')
+        self.assertFalse(mock.called)
+
+    def test_create_backend_mtr(self) -> None:
+        """Assert the mtr backend is used by default"""
+        backend = self.engine.create_backend(self.config, self.mtr_binary)
+        self.assertIsInstance(backend, MtrBackend)
+        self.assertEqual(backend.mode, 'report')
+
+    def test_create_backend_mtr_missing(self) -> None:
+        """Assert no backend is usable without an mtr binary"""
+        self.assertIsNone(self.engine.create_backend(self.config, ''))
+
+    @patch('src.classes.probe_engine.IcmpBackend.open')
+    def test_create_backend_icmp(self, mock) -> None:
+        """Assert the icmp backend is used when its socket opens"""
+        self.engine.backend = 'icmp'
+        backend = self.engine.create_backend(self.config, '')
+        self.assertTrue(mock.called)
+        self.assertIsInstance(backend, IcmpBackend)
+
+    @patch('src.classes.probe_engine.IcmpBackend.open',
+           side_effect=PermissionError)
+    def test_create_backend_icmp_not_permitted(self, mock) -> None:
+        """Assert the icmp backend fails when sockets are not permitted"""
+        self.engine.backend = 'icmp'
+        self.assertIsNone(
+            self.engine.create_backend(self.config, self.mtr_binary))
+        self.assertTrue(mock.called)
+
+    @patch('src.classes.probe_engine.IcmpBackend.open',
+           side_effect=PermissionError)
+    def test_create_backend_auto_falls_back(self, mock) -> None:
+        """Assert auto falls back to mtr when sockets are not permitted"""
+        self.engine.backend = 'auto'
+        backend = self.engine.create_backend(self.config, self.mtr_binary)
+        self.assertTrue(mock.called)
+        self.assertIsInstance(backend, MtrBackend)
+
+    def test_create_backend_replay(self) -> None:
+        """Assert the replay backend reads its own config section"""
+        self.engine.backend = 'replay'
+        self.config['replay'] = {'directory': 'tests/fixtures/replay'}
+        backend = self.engine.create_backend(self.config, '')
+        self.assertIsInstance(backend, ReplayBackend)
+
+    def test_create_backend_replay_missing_section(self) -> None:
+        """Assert raise KeyError when the replay section is missing"""
+        self.engine.backend = 'replay'
+        with self.assertRaises(KeyError):
+            self.engine.create_backend(self.config, '')
+
+    def test_default_concurrency(self) -> None:
+        """Assert the default concurrency is used when not configured"""
+        self.assertEqual(self.engine.concurrency, 64)
+
+    def test_run(self) -> None:
+        """Assert every IP is traced and handed to the callback"""
+        backend = FakeBackend()
+        results = {}
+        self.engine.run(backend, results.__setitem__)
+        self.assertTrue(backend.started)
+        self.assertTrue(backend.stopped)
+        self.assertEqual(sorted(backend.traced), sorted(self.engine.ips))
+        self.assertEqual(list(results['1.1.1.1']),
+                         ['10.10.28.1', '192.168.1.254', '1.1.1.1'])
+        self.assertEqual(sorted(self.engine.completed), self.engine.ips)
+
+    def test_run_failed_trace(self) -> None:
+        """Assert a failed trace is reported as an empty dictionary"""
+        self.engine.ips = ['0.0.0.0']
+        results = {}
+        self.engine.run(FakeBackend(), results.__setitem__)
+        self.assertEqual(results, {'0.0.0.0': {}})
+        self.assertEqual(self.engine.completed, {})
+
+    @patch('src.classes.probe_engine.TokenBucket.acquire')
+    def test_run_paced(self, mock_acquire) -> None:
+        """Assert every probe draws from the packet budget when set"""
+        self.config['mtr'].update({'packets_per_second': 100})
+        engine = ProbeEngine(self.config)
+        engine.run(FakeBackend(), lambda ip, trace: None)
+        self.assertEqual(mock_acquire.call_count, 3)
+
+    @patch('src.classes.probe_engine.TokenBucket.acquire')
+    def test_run_unpaced(self, mock_acquire) -> None:
+        """Assert no budget is drawn from by default"""
+        self.engine.run(FakeBackend(), lambda ip, trace: None)
+        self.assertFalse(mock_acquire.called)
+
+    def test_run_deadline(self) -> None:
+        """Assert probes still running at the deadline are cancelled"""
+        self.config['mtr'].update({'deadline': 0.05})
+        engine = ProbeEngine(self.config)
+        backend = FakeBackend({'9.9.9.9': 10})
+        results = {}
+        engine.run(backend, results.__setitem__)
+        self.assertEqual(sorted(results), ['1.1.1.1', '8.8.8.8'])
+        self.assertEqual(engine.timed_out, {'9.9.9.9'})
+        self.assertEqual(backend.running, 0)
+
+    def test_run_probe_timed_out(self) -> None:
+        """Assert a probe that outlives its timeout is recorded"""
+        self.config['mtr'].update({'timeout': 0.05})
+        engine = ProbeEngine(self.config)
+        results = {}
+        engine.run(FakeBackend({'8.8.8.8': 10}), results.__setitem__)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results['8.8.8.8'], {})
+        self.assertEqual(engine.timed_out, {'8.8.8.8'})
+        self.assertEqual(sorted(engine.completed), ['1.1.1.1', '9.9.9.9'])
+
+    def test_invalid_shared_hops(self) -> None:
+        """
+        Assert raise ValueError when shared_hops is not a boolean
+        """
+        self.config['mtr'].update({'shared_hops': 'yes'})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_run_shared_hops(self) -> None:
+        """Assert shared hops are learned, then probed once and fanned out"""
+        self.config['mtr'].update({'shared_hops': True})
+        engine = ProbeEngine(self.config)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'topology.json')
+            with patch('src.classes.probe_engine.constants.HOP_TOPOLOGY_FILE',
+                       filename):
+                backend = FakeBackend()
+                first = {}
+                engine.run(backend, first.__setitem__)
+                self.assertEqual(
+                    sorted(backend.calls),
+                    [(ip, 1, 0) for ip in self.engine.ips])
+
+                backend = FakeBackend()
+                second = {}
+                engine.run(backend, second.__setitem__)
+                self.assertEqual(
+                    sorted(backend.calls),
+                    [('1.1.1.1', 3, 0), ('192.168.1.254', 1, 2),
+                     ('8.8.8.8', 3, 0), ('9.9.9.9', 3, 0)])
+        self.assertEqual(first, second)
+
+    def test_run_shared_hops_sent_once(self) -> None:
+        """Assert shared hops count the probes sent to them once per run"""
+        self.config['mtr'].update({'shared_hops': True})
+        engine = ProbeEngine(self.config)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'topology.json')
+            with patch('src.classes.probe_engine.constants.HOP_TOPOLOGY_FILE',
+                       filename):
+                engine.run(FakeBackend(), lambda ip, trace: None)
+                accumulator = TraceAccumulator()
+                traces = []
+
+                def on_result(ip: str, trace: Trace) -> None:
+                    traces.append(trace)
+                    accumulator.add(trace)
+
+                engine.run(FakeBackend(), on_result)
+        self.assertEqual(len(traces), 3)
+        merged = accumulator.to_trace()
+        for ip in FakeBackend.ROUTE:
+            with self.subTest(ip=ip):
+                self.assertTrue(all(
+                    Trace.pack_ip(ip) in trace.shared for trace in traces))
+                self.assertEqual(merged[ip].sent, FakeBackend.SENT)
+        self.assertEqual(merged['1.1.1.1'].sent, FakeBackend.SENT)
+
+    def test_run_shared_hops_route_changed(self) -> None:
+        """Assert a route change is detected and relearned"""
+        self.config['mtr'].update({'shared_hops': True})
+        engine = ProbeEngine(self.config)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'topology.json')
+            with patch('src.classes.probe_engine.constants.HOP_TOPOLOGY_FILE',
+                       filename):
+                engine.run(FakeBackend(), lambda ip, trace: None)
+                backend = FakeBackend()
+                backend.ROUTE = ['10.10.28.1', '172.16.0.1']
+                engine.run(backend, lambda ip, trace: None)
+                self.assertIn(('1.1.1.1', 1, 0), backend.calls)
+
+    def test_invalid_route_cache_ttl(self) -> None:
+        """
+        Assert raise ValueError when route_cache_ttl is negative
+        """
+        self.config['mtr'].update({'route_cache_ttl': -1})
+        with self.assertRaises(ValueError):
+            ProbeEngine(self.config)
+
+    def test_run_route_cache(self) -> None:
+        """Assert cached routes are pinged in one batch instead of traced"""
+        self.config['mtr'].update({'route_cache': True})
+        engine = ProbeEngine(self.config)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'routes.json')
+            with patch('src.classes.probe_engine.constants.ROUTE_CACHE_FILE',
+                       filename):
+                backend = FakeBackend()
+                engine.run(backend, lambda ip, trace: None)
+                self.assertEqual(len(backend.calls), 3)
+                self.assertEqual(backend.pinged, [])
+
+                backend = FakeBackend()
+                second = {}
+                engine.run(backend, second.__setitem__)
+        self.assertEqual(backend.calls, [])
+        self.assertEqual(len(backend.pinged), 1)
+        self.assertEqual(
+            sorted(backend.pinged[0]),
+            ['1.1.1.1', '10.10.28.1', '192.168.1.254', '8.8.8.8', '9.9.9.9'])
+        self.assertEqual(
+            list(second['1.1.1.1']),
+            ['10.10.28.1', '192.168.1.254', '1.1.1.1'])
+        accumulator = TraceAccumulator()
+        for trace in second.values():
+            accumulator.add(trace)
+        self.assertEqual(
+            accumulator.to_trace()['10.10.28.1'].sent, FakeBackend.SENT)
+
+    def test_run_route_cache_hop_lost(self) -> None:
+        """Assert a target is traced again once a cached hop stops answering"""
+        self.config['mtr'].update({'route_cache': True})
+        engine = ProbeEngine(self.config)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'routes.json')
+            with patch('src.classes.probe_engine.constants.ROUTE_CACHE_FILE',
+                       filename):
+                engine.run(FakeBackend(), lambda ip, trace: None)
+                backend = FakeBackend()
+                backend.lost = ['8.8.8.8']
+                engine.run(backend, lambda ip, trace: None)
+        self.assertEqual(backend.calls, [('8.8.8.8', 1, 0)])
+
+    def test_run_route_cache_without_ping(self) -> None:
+        """Assert every target is traced when the backend cannot ping"""
+        self.config['mtr'].update({'route_cache': True})
+        engine = ProbeEngine(self.config)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'routes.json')
+            with patch('src.classes.probe_engine.constants.ROUTE_CACHE_FILE',
+                       filename):
+                engine.run(FakeBackend(), lambda ip, trace: None)
+                backend = FakeBackend()
+                backend.ping = ProbeBackend.ping.__get__(backend)
+                engine.run(backend, lambda ip, trace: None)
+        self.assertEqual(len(backend.calls), 3)
+
+    def test_run_respects_concurrency(self) -> None:
+        """Assert no more than concurrency probes run at the same time"""
+        self.config['mtr'].update({'concurrency': 2})
+        engine = ProbeEngine(self.config)
+        backend = FakeBackend()
+        engine.run(backend, lambda ip, trace: None)
+        self.assertEqual(backend.peak, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the PromRenderer() class
+"""
+
+import unittest
+
+from src.classes.prom_renderer import PromRenderer
+
+
+class TestPromRenderer(unittest.TestCase):
+    """
+    Unit Tests for the PromRenderer() class
+    """
+
+    def setUp(self) -> None:
+        self.renderer = PromRenderer()
+        self.series = [
+            'ping_stats{ip_addr="1.1.1.1", stat="loss"}',
+            'ping_stats{ip_addr="1.1.1.1", stat="sent"}'
+        ]
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.renderer
+        del self.series
+        return super().tearDown()
+
+    def test_render(self) -> None:
+        """Assert every series is written with its value"""
+        self.renderer.begin()
+        self.renderer.add(('ping_stats', '1.1.1.1'), (0.0, 4), self.series)
+        self.assertEqual(
+            self.renderer.finish(),
+            b'ping_stats{ip_addr="1.1.1.1", stat="loss"} 0.0\n'
+            b'ping_stats{ip_addr="1.1.1.1", stat="sent"} 4\n')
+
+    def test_cached_series(self) -> None:
+        """Assert a known group only formats its values"""
+        self.renderer.begin()
+        self.renderer.add(('ping_stats', '1.1.1.1'), (0.0, 4), self.series)
+        self.renderer.finish()
+        self.renderer.begin()
+        # The series are not read again, so they may be anything
+        self.renderer.add(('ping_stats', '1.1.1.1'), (25.0, 8), None)
+        self.assertEqual(
+            self.renderer.finish(),
+            b'ping_stats{ip_addr="1.1.1.1", stat="loss"} 25.0\n'
+            b'ping_stats{ip_addr="1.1.1.1", stat="sent"} 8\n')
+
+    def test_forget_unrendered(self) -> None:
+        """Assert groups missing from a render are dropped from the cache"""
+        self.renderer.begin()
+        self.renderer.add(('ping_stats', '1.1.1.1'), (0.0, 4), self.series)
+        self.renderer.finish()
+        self.renderer.begin()
+        self.assertEqual(self.renderer.finish(), b'')
+        self.renderer.begin()
+        with self.assertRaises(TypeError):
+            self.renderer.add(('ping_stats', '1.1.1.1'), (0.0, 4), None)
+
+    def test_timestamp(self) -> None:
+        """Assert a timestamp follows every value of a group"""
+        self.renderer.begin()
+        self.renderer.comment('# TYPE ping_stats gauge')
+        self.renderer.add(
+            ('ping_stats', '1.1.1.1'), (0.0, 4), self.series, 1700000000.25)
+        self.renderer.add(('ping_stats', '1.1.1.1'), (0.0, 4), self.series)
+        self.assertEqual(
+            self.renderer.finish(),
+            b'# TYPE ping_stats gauge\n'
+            b'ping_stats{ip_addr="1.1.1.1", stat="loss"} 0.0 1700000000.250\n'
+            b'ping_stats{ip_addr="1.1.1.1", stat="sent"} 4 1700000000.250\n'
+            b'ping_stats{ip_addr="1.1.1.1", stat="loss"} 0.0\n'
+            b'ping_stats{ip_addr="1.1.1.1", stat="sent"} 4\n')
+
+    def test_escape(self) -> None:
+        """Assert a % in a label is written as is"""
+        self.renderer.begin()
+        self.renderer.add(('target', 'a%rb'), (1,), ['ping_stats{x="a%rb"}'])
+        self.assertEqual(self.renderer.finish(), b'ping_stats{x="a%rb"} 1\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
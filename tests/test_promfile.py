@@ -4,6 +4,7 @@ Unit Tests for the PromFile() class
 """
 
 import os
+import tempfile
 import unittest
 
 from unittest.mock import patch
@@ -20,7 +21,6 @@ class TestPromFile(unittest.TestCase):
         self.config = {
             'prometheus': {
                 'filepath': './data/var/prometheus',
-                'temp_filepath': 'data/tmp/prometheus',
                 'filename': 'ping-stats.prom'
             }
         }
@@ -68,7 +68,7 @@ class TestPromFile(unittest.TestCase):
         with self.assertRaises(ValueError):
             PromFile(self.config)
 
-    def test_valid_config_no_temp_filename(self) -> None:
+    def test_valid_config(self) -> None:
         """
         Assert config is valid when all required keys are passed
         """
@@ -80,40 +80,112 @@ class TestPromFile(unittest.TestCase):
             self.promfile.filename,
             self.config['prometheus']['filename']
         )
-        self.assertEqual(
-            self.promfile.temp_filepath,
-            os.path.realpath(self.config['prometheus']['temp_filepath'])
-        )
-        self.assertEqual(
-            self.promfile.temp_filename,
-            self.config['prometheus']['filename']
-        )
 
-    def test_valid_config_temp_filename_given(self) -> None:
+    def test_deprecated_config_keys(self) -> None:
         """
-        Assert config is valid when all required keys are passed and the
-        optional temp_filename key is passed
+        Assert the deprecated temp_filepath and temp_filename keys are
+        accepted but ignored
         """
         self.config['prometheus'].update({
+            'temp_filepath': 'data/tmp/prometheus',
             'temp_filename': 'temp-ping-stats.prom'
         })
         promfile = PromFile(self.config)
+        self.assertFalse(hasattr(promfile, 'temp_filepath'))
+        self.assertFalse(hasattr(promfile, 'temp_filename'))
+
+    def test_histogram_defaults(self) -> None:
+        """Assert the histogram is disabled with the default buckets"""
+        self.assertFalse(self.promfile.histogram)
+        self.assertEqual(self.promfile.histogram_buckets[0], 1)
+        self.assertFalse(self.promfile.rolling)
+
+    def test_invalid_histogram_buckets(self) -> None:
+        """
+        Assert raise ValueError when histogram_buckets is not a list of
+        increasing positive numbers
+        """
+        for buckets in ([], [5, 1], [1, 1], [0, 1], ['1'], 10):
+            self.config['prometheus'].update({'histogram_buckets': buckets})
+            with self.subTest(buckets=buckets):
+                with self.assertRaises(ValueError):
+                    PromFile(self.config)
+
+    def test_invalid_limits(self) -> None:
+        """Assert raise ValueError on invalid cardinality limits"""
+        for key, value in (('top_hops', -1), ('top_hops', True),
+                           ('max_series', 1.5), ('max_idle_runs', '3'),
+                           ('top_hops_by', 'stdev')):
+            config = {'prometheus': {**self.config['prometheus'], key: value}}
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(ValueError):
+                    PromFile(config)
+
+    def test_shard_of(self) -> None:
+        """Assert targets are sharded by hash or by group"""
+        self.assertFalse(self.promfile.sharded)
+        self.assertIsNone(self.promfile.shard_of('1.1.1.1'))
+        self.config['prometheus'].update({'shards': 4})
+        promfile = PromFile(self.config)
+        self.assertTrue(promfile.sharded)
+        shard = promfile.shard_of('1.1.1.1')
+        self.assertIn(shard, ['0', '1', '2', '3'])
+        self.assertEqual(PromFile(self.config).shard_of('1.1.1.1'), shard)
+        self.config['prometheus'].update(
+            {'shard_groups': {'dns': ['1.1.1.1', '8.8.8.8']}})
+        promfile = PromFile(self.config)
+        self.assertEqual(promfile.shard_of('8.8.8.8'), 'dns')
+        self.assertEqual(promfile.shard_of('9.9.9.9'), 'default')
+
+    def test_shard_filename(self) -> None:
+        """Assert shard files are named after the main file"""
         self.assertEqual(
-            promfile.filepath,
-            os.path.realpath(self.config['prometheus']['filepath'])
-        )
-        self.assertEqual(
-            promfile.filename,
-            self.config['prometheus']['filename']
-        )
-        self.assertEqual(
-            promfile.temp_filepath,
-            os.path.realpath(self.config['prometheus']['temp_filepath'])
-        )
-        self.assertEqual(
-            promfile.temp_filename,
-            self.config['prometheus']['temp_filename']
-        )
+            self.promfile.shard_filename('dns'),
+            os.path.join(self.promfile.filepath,
+                         os.path.splitext(self.promfile.filename)[0] +
+                         '.dns' +
+                         os.path.splitext(self.promfile.filename)[1]))
+
+    def test_shard_filenames(self) -> None:
+        """Assert only files named like shard files are found"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.config['prometheus']['filepath'] = directory
+            promfile = PromFile(self.config)
+            for name in ('ping-stats.prom', 'ping-stats.0.prom',
+                         'ping-stats.dns.prom', 'ping-stats.0.json',
+                         'other.0.prom', '.ping-stats.0.prom.tmp'):
+                with open(os.path.join(directory, name), 'w',
+                          encoding='utf-8'):
+                    pass
+            self.assertEqual(promfile.shard_filenames(), [
+                promfile.shard_filename('0'), promfile.shard_filename('dns')
+            ])
+
+    def test_invalid_shards(self) -> None:
+        """Assert raise ValueError on invalid shard settings"""
+        for key, value in (('shards', -1), ('shards', '2'),
+                           ('shard_groups', ['1.1.1.1']),
+                           ('shard_groups', {'a/b': ['1.1.1.1']}),
+                           ('shard_groups', {'dns': '1.1.1.1'})):
+            config = {'prometheus': {**self.config['prometheus'], key: value}}
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(ValueError):
+                    PromFile(config)
+
+    def test_format(self) -> None:
+        """Assert the format defaults to the Prometheus text format"""
+        self.assertEqual(self.promfile.format, 'prometheus')
+        self.config['prometheus'].update({'format': 'openmetrics'})
+        self.assertEqual(PromFile(self.config).format, 'openmetrics')
+        self.config['prometheus'].update({'format': 'json'})
+        with self.assertRaises(ValueError):
+            PromFile(self.config)
+
+    def test_invalid_rolling(self) -> None:
+        """Assert raise ValueError when rolling is not a boolean"""
+        self.config['prometheus'].update({'rolling': 'yes'})
+        with self.assertRaises(ValueError):
+            PromFile(self.config)
 
     @patch('src.classes.promfile.os.mkdir', side_effect=FileNotFoundError)
     def test_create_filepath_failed_missing_parent_directory(
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Pushgateway() class
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import tempfile
+import threading
+import unittest
+
+from main import render_prometheus
+from src.classes.cycle_result import CycleResult
+from src.classes.pushgateway import Pushgateway
+from src.classes.trace import Trace
+
+
+class Gateway(BaseHTTPRequestHandler):
+    """A stand-in Pushgateway that records every request"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_PUT(self) -> None:
+        """Record the group and answer with the status of the server"""
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append(('PUT', self.path, body))
+        self.server.connections.add(self.client_address)
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_DELETE(self) -> None:
+        """Record the deleted group"""
+        self.server.requests.append(('DELETE', self.path, None))
+        self.send_response(202)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        """Requests are not logged"""
+
+
+class TestPushgateway(unittest.TestCase):
+    """
+    Unit Tests for the Pushgateway() class
+    """
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Gateway)
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.status = 200
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        handle, self.state_file = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        os.unlink(self.state_file)
+        host, port = self.server.server_address[:2]
+        self.config = {
+            'pushgateway': {
+                'url': f'http://{host}:{port}/',
+                'instance': 'probe-1',
+                'connections': 2
+            }
+        }
+        self.gateway = Pushgateway(self.config, self.state_file)
+        self.groups = {
+            None: b'ping_stats_rtt_ms_count{ip_addr="1.1.1.1"} 4\n',
+            'dns': b'ping_stats{ip_addr="1.1.1.1", stat="loss", '
+                   b'shard="dns"} 0.0\n',
+            'web': b'ping_stats{ip_addr="2.2.2.2", stat="loss", '
+                   b'shard="web"} 0.0\n'
+        }
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.gateway.close()
+        self.server.shutdown()
+        self.server.server_close()
+        if os.path.exists(self.state_file):
+            os.unlink(self.state_file)
+        del self.server
+        del self.thread
+        del self.state_file
+        del self.config
+        del self.gateway
+        del self.groups
+        return super().tearDown()
+
+    def test_defaults(self) -> None:
+        """Assert only the url is required"""
+        gateway = Pushgateway({'pushgateway': {'url': 'http://gw:9091'}})
+        self.assertEqual(gateway.job, 'ping_stats')
+        self.assertTrue(gateway.instance)
+        self.assertEqual(gateway.connections, 4)
+
+    def test_invalid_config(self) -> None:
+        """Assert raise ValueError on invalid settings"""
+        for key, value in (('unknown', 1), ('url', 'gw:9091'), ('job', ''),
+                           ('instance', None), ('connections', 0),
+                           ('timeout', -1)):
+            config = {'pushgateway': {'url': 'http://gw:9091', key: value}}
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(ValueError):
+                    Pushgateway(config)
+
+    def test_grouping_path(self) -> None:
+        """Assert groups are keyed by job, instance and shard"""
+        self.assertEqual(self.gateway.grouping_path(),
+                         '/metrics/job/ping_stats/instance/probe-1')
+        self.assertEqual(self.gateway.grouping_path('dns'),
+                         '/metrics/job/ping_stats/instance/probe-1/shard/dns')
+        self.assertEqual(Pushgateway.label('instance', 'a/b'),
+                         '/instance@base64/YS9i')
+
+    def test_push(self) -> None:
+        """Assert every group is PUT with its own grouping key"""
+        self.assertTrue(self.gateway.push(self.groups))
+        pushed = {path: body for _, path, body in self.server.requests}
+        self.assertEqual(pushed, {
+            self.gateway.grouping_path(shard): body
+            for shard, body in self.groups.items()
+        })
+        # Three groups over at most two reused connections
+        self.assertLessEqual(len(self.server.connections), 2)
+
+    def test_push_changed(self) -> None:
+        """Assert unchanged groups are skipped, also by a later run"""
+        self.assertTrue(self.gateway.push(self.groups))
+        self.assertTrue(self.gateway.save())
+        self.server.requests.clear()
+
+        gateway = Pushgateway(self.config, self.state_file)
+        self.assertTrue(gateway.load())
+        self.groups['dns'] = b'ping_stats{stat="loss", shard="dns"} 9.0\n'
+        self.assertTrue(gateway.push(self.groups))
+        gateway.close()
+        self.assertEqual(
+            self.server.requests,
+            [('PUT', gateway.grouping_path('dns'), self.groups['dns'])])
+
+    def test_push_changed_rendered(self) -> None:
+        """
+        Assert the group of a shard whose target kept timing out is not
+        pushed again, while the group of a target that succeeded is, as its
+        last success time changed
+        """
+        trace = Trace()
+        trace.append('1.1.1.1', 0.0, 4, 12.0, 13.0, 11.5, 15.0, 1.5)
+        config = {'prometheus': {'filepath': '.', 'filename': 'a.prom'}}
+        for now in (1714607940.0, 1714608000.0):
+            result = CycleResult(shards={
+                'dns': CycleResult(trace, {'1.1.1.1': {
+                    'timed_out': 0, 'last_success_timestamp': now}}),
+                'web': CycleResult(None, {'2.2.2.2': {
+                    'timed_out': 1, 'last_success_timestamp': 1714600000.0}})
+            })
+            self.server.requests.clear()
+            self.assertTrue(self.gateway.push({
+                shard: render_prometheus(config, group, shard)
+                for shard, group in result.shards.items()
+            }))
+        self.assertEqual(
+            [path for _, path, _ in self.server.requests],
+            [self.gateway.grouping_path('dns')])
+
+    def test_push_removed(self) -> None:
+        """Assert the groups of shards that are gone are deleted"""
+        self.assertTrue(self.gateway.push(self.groups))
+        self.server.requests.clear()
+        del self.groups['web']
+        self.assertTrue(self.gateway.push(self.groups))
+        self.assertEqual(
+            self.server.requests,
+            [('DELETE', self.gateway.grouping_path('web'), None)])
+
+    def test_push_failed(self) -> None:
+        """Assert groups that failed are pushed again"""
+        self.server.status = 500
+        self.assertFalse(self.gateway.push(self.groups))
+        self.server.status = 200
+        self.server.requests.clear()
+        self.assertTrue(self.gateway.push(self.groups))
+        self.assertEqual(len(self.server.requests), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
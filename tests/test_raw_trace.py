@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the RawTrace() class
+"""
+
+import unittest
+
+from src.classes.raw_trace import RawTrace
+
+
+class TestRawTrace(unittest.TestCase):
+    """
+    Unit Tests for the RawTrace() class
+    """
+
+    def setUp(self) -> None:
+        self.raw_trace = RawTrace()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.raw_trace
+        return super().tearDown()
+
+    def test_feed_ignores_unknown_lines(self) -> None:
+        """Assert unrecognised or malformed records are ignored"""
+        for line in [b'', b'garbage\n', b'p x 100 1\n', b'p 0 abc 1\n']:
+            self.raw_trace.feed(line)
+        self.assertEqual(self.raw_trace.to_trace(4), {})
+        self.assertEqual(self.raw_trace.hops, [])
+
+    def test_feed_with_transmit_records(self) -> None:
+        """Assert loss is counted from transmit records when present"""
+        lines = [
+            b'x 0 33000\n', b'h 0 10.10.28.1\n', b'p 0 5800 33000\n',
+            b'x 0 33001\n', b'p 0 16800 33001\n',
+            b'x 0 33002\n', b'x 0 33003\n', b'p 0 13100 33003\n',
+        ]
+        for line in lines:
+            self.raw_trace.feed(line)
+        trace = self.raw_trace.to_trace(4)
+        hop = trace['10.10.28.1']
+        self.assertEqual(hop.sent, 4)
+        self.assertEqual(hop.loss, 25.0)
+        self.assertEqual(hop.last, 13.1)
+        self.assertEqual(hop.best, 5.8)
+        self.assertEqual(hop.worst, 16.8)
+        self.assertAlmostEqual(hop.average, 11.9)
+        self.assertAlmostEqual(hop.stdev, 5.6, places=1)
+        self.assertEqual(
+            list(self.raw_trace.samples_by_ip()['10.10.28.1']),
+            [5.8, 16.8, 13.1])
+
+    def test_feed_without_transmit_records(self) -> None:
+        """Assert the requested cycles are used as the sent count"""
+        for line in ['h 0 10.10.28.1', 'p 0 5000 1', 'h 2 1.1.1.1',
+                     'p 2 9000 2', 'p 2 11000 3', 'd 2 one.one.one.one']:
+            self.raw_trace.feed(line)
+        trace = self.raw_trace.to_trace(4)
+        self.assertEqual(trace['10.10.28.1'].loss, 75.0)
+        self.assertEqual(trace['1.1.1.1'].loss, 50.0)
+        self.assertEqual(trace['1.1.1.1'].average, 10.0)
+        self.assertEqual(self.raw_trace.names[3], 'one.one.one.one')
+        self.assertEqual(
+            self.raw_trace.hops,
+            [(1, '10.10.28.1'), (2, '???'), (3, '1.1.1.1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
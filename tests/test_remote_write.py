@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the RemoteWrite() class
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from src.classes.remote_write import RemoteWrite
+from src.classes.write_request import WriteRequest
+from tests.test_write_request import decode, read_varint
+
+
+def snappy_decompress(data: bytes) -> bytes:
+    """Decode the snappy block format"""
+    length, offset = read_varint(data, 0)
+    output = bytearray()
+    while offset < len(data):
+        tag = data[offset]
+        offset += 1
+        if tag & 3 == 0:
+            size = tag >> 2
+            if size >= 60:
+                extra = size - 59
+                size = int.from_bytes(data[offset:offset + extra], 'little')
+                offset += extra
+            output += data[offset:offset + size + 1]
+            offset += size + 1
+            continue
+        if tag & 3 == 1:
+            size = 4 + (tag >> 2 & 7)
+            distance = (tag >> 5) << 8 | data[offset]
+            offset += 1
+        else:
+            extra = 2 if tag & 3 == 2 else 4
+            size = (tag >> 2) + 1
+            distance = int.from_bytes(data[offset:offset + extra], 'little')
+            offset += extra
+        for _ in range(size):
+            output.append(output[-distance])
+    assert len(output) == length
+    return bytes(output)
+
+
+class Receiver(BaseHTTPRequestHandler):
+    """A stand-in remote_write receiver that records every request"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self) -> None:
+        """Record the request and answer with the status of the server"""
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((dict(self.headers), body))
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        """Requests are not logged"""
+
+
+class TestRemoteWrite(unittest.TestCase):
+    """
+    Unit Tests for the RemoteWrite() class
+    """
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Receiver)
+        self.server.requests = []
+        self.server.status = 204
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.spool = tempfile.mkdtemp()
+        host, port = self.server.server_address[:2]
+        self.config = {
+            'remote_write': {
+                'url': f'http://{host}:{port}/api/v1/write',
+                'connections': 2,
+                'max_queue': 3,
+                'labels': {'instance': 'site-a'}
+            }
+        }
+        self.remote = RemoteWrite(self.config, self.spool)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.remote.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.spool)
+        del self.server
+        del self.thread
+        del self.spool
+        del self.config
+        del self.remote
+        return super().tearDown()
+
+    def requests(self, count: int) -> list:
+        """Build count requests of one series each"""
+        requests = []
+        for index in range(count):
+            request = WriteRequest()
+            request.add('ping_stats', {'ip_addr': f'10.0.0.{index}'},
+                        float(index), 1.0)
+            requests.append(request)
+        return requests
+
+    def received(self) -> list:
+        """Decode the ip_addr of every series received, in order"""
+        ips = []
+        for _, body in self.server.requests:
+            for labels, _, _ in decode(snappy_decompress(body)):
+                ips.append(dict(labels)['ip_addr'])
+        return ips
+
+    def test_defaults(self) -> None:
+        """Assert only the url is required"""
+        remote = RemoteWrite({'remote_write': {'url': 'https://example'}})
+        self.assertEqual(remote.batch_size, 2000)
+        self.assertEqual(remote.max_queue, 1000)
+        self.assertIn('instance', remote.labels)
+
+    def test_invalid_config(self) -> None:
+        """Assert raise ValueError on invalid settings"""
+        for key, value in (('unknown', 1), ('url', 'ftp://example'),
+                           ('url', None), ('batch_size', 0),
+                           ('connections', True), ('timeout', 0),
+                           ('max_queue', -1), ('labels', ['a']),
+                           ('labels', {'__name__': 'x'})):
+            config = {'remote_write': {'url': 'http://example', key: value}}
+            with self.subTest(key=key, value=value):
+                with self.assertRaises(ValueError):
+                    RemoteWrite(config)
+        with self.assertRaises(ValueError):
+            RemoteWrite({'remote_write': {'batch_size': 1}})
+
+    def test_compress(self) -> None:
+        """Assert compressed requests decode to the original"""
+        for data in (b'', b'a', b'ping_stats' * 1000):
+            with self.subTest(size=len(data)):
+                self.assertEqual(
+                    snappy_decompress(RemoteWrite.compress(data)), data)
+
+    def test_push(self) -> None:
+        """Assert every request is posted with the remote_write headers"""
+        self.assertTrue(self.remote.push(self.requests(5)))
+        self.assertEqual(sorted(self.received()),
+                         [f'10.0.0.{index}' for index in range(5)])
+        headers, _ = self.server.requests[0]
+        self.assertEqual(headers['Content-Encoding'], 'snappy')
+        self.assertEqual(headers['Content-Type'], 'application/x-protobuf')
+        self.assertEqual(headers['X-Prometheus-Remote-Write-Version'],
+                         '0.1.0')
+        # Connections are kept open and reused
+        self.assertTrue(self.remote.push(self.requests(5)))
+        self.assertIn(len(self.remote._pool), (1, 2))
+
+    def test_spool(self) -> None:
+        """Assert failed requests are spooled and pushed again first"""
+        self.server.status = 503
+        self.assertFalse(self.remote.push(self.requests(2)))
+        self.assertEqual(len(os.listdir(self.spool)), 2)
+        self.server.requests.clear()
+
+        self.server.status = 204
+        request = WriteRequest()
+        request.add('ping_stats', {'ip_addr': '10.0.0.9'}, 1.0, 2.0)
+        self.assertTrue(self.remote.push([request]))
+        self.assertEqual(os.listdir(self.spool), [])
+        self.assertEqual(self.received()[-1], '10.0.0.9')
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_spool_bound(self) -> None:
+        """Assert the oldest requests are dropped beyond max_queue"""
+        self.server.status = 500
+        self.assertFalse(self.remote.push(self.requests(2)))
+        self.assertFalse(self.remote.push(self.requests(3)))
+        self.assertEqual(len(os.listdir(self.spool)), 3)
+        self.assertEqual(self.remote.dropped, 2)
+
+    def test_rejected(self) -> None:
+        """Assert requests the receiver rejects are not spooled"""
+        self.server.status = 400
+        self.assertTrue(self.remote.push(self.requests(1)))
+        self.assertFalse(os.path.exists(self.spool) and
+                         os.listdir(self.spool))
+
+    def test_receiver_down(self) -> None:
+        """Assert requests are spooled when the receiver is unreachable"""
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertFalse(self.remote.push(self.requests(1)))
+        self.assertEqual(len(os.listdir(self.spool)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
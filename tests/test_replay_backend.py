@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the ReplayBackend() class
+"""
+
+import asyncio
+import unittest
+
+from src.classes.replay_backend import ReplayBackend
+
+
+class TestReplayBackend(unittest.TestCase):
+    """
+    Unit Tests for the ReplayBackend() class
+    """
+
+    def setUp(self) -> None:
+        self.config = {
+            'replay': {
+                'directory': 'tests/fixtures/replay',
+                'seed': 1
+            }
+        }
+        self.backend = ReplayBackend(self.config)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.backend
+        del self.config
+        return super().tearDown()
+
+    def test_missing_config_section(self) -> None:
+        """Assert raise KeyError when 'replay' key is missing"""
+        with self.assertRaises(KeyError):
+            ReplayBackend({'mtr': {}})
+
+    def test_invalid_key_in_config(self) -> None:
+        """Assert raise ValueError when an unknown key exists"""
+        self.config['replay'].update({'invalid': 'something'})
+        with self.assertRaises(ValueError):
+            ReplayBackend(self.config)
+
+    def test_missing_directory(self) -> None:
+        """Assert raise ValueError when the directory does not exist"""
+        self.config['replay'].update({'directory': 'tests/fixtures/none'})
+        with self.assertRaises(ValueError):
+            ReplayBackend(self.config)
+
+    def test_invalid_failure_rate(self) -> None:
+        """Assert raise ValueError when a rate is above 1"""
+        self.config['replay'].update({'failure_rate': 1.5})
+        with self.assertRaises(ValueError):
+            ReplayBackend(self.config)
+
+    def test_trace_report(self) -> None:
+        """Assert a recorded report is replayed"""
+        trace = asyncio.run(self.backend.trace('1.1.1.1'))
+        self.assertEqual(
+            list(trace), ['10.10.28.1', '192.168.1.254', '1.1.1.1'])
+        self.assertEqual(trace['1.1.1.1'].average, 13.0)
+
+    def test_trace_json(self) -> None:
+        """Assert a recorded json report is replayed"""
+        trace = asyncio.run(self.backend.trace('8.8.8.8'))
+        self.assertEqual(trace['192.168.1.254'].loss, 25.0)
+
+    def test_trace_raw(self) -> None:
+        """Assert a recorded raw report is replayed"""
+        trace = asyncio.run(self.backend.trace('9.9.9.9'))
+        self.assertEqual(trace['9.9.9.9'].best, 12.1)
+        self.assertEqual(trace['10.10.28.1'].sent, 2)
+
+    def test_trace_ttl_range(self) -> None:
+        """Assert only the requested hops are replayed"""
+        hops = []
+        trace = asyncio.run(self.backend.trace('1.1.1.1', 2, 3, hops))
+        self.assertEqual(list(trace), ['192.168.1.254'])
+        self.assertEqual(hops, [(2, '192.168.1.254')])
+
+    def test_trace_default(self) -> None:
+        """Assert IPs without a recording use the default recording"""
+        trace = asyncio.run(self.backend.trace('4.4.4.4'))
+        self.assertEqual(list(trace), ['10.10.28.1', '192.168.1.254'])
+
+    def test_trace_invalid_ip(self) -> None:
+        """Assert raise ValueError when the IP is not IPv4"""
+        with self.assertRaises(ValueError):
+            asyncio.run(self.backend.trace('fe80::1'))
+
+    def test_trace_failure_injected(self) -> None:
+        """Assert injected failures return an empty trace"""
+        self.backend.failure_rate = 1
+        self.assertEqual(asyncio.run(self.backend.trace('1.1.1.1')), {})
+
+    def test_trace_timeout_injected(self) -> None:
+        """Assert injected timeouts hang until cancelled"""
+        self.backend.timeout_rate = 1
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(
+                asyncio.wait_for(self.backend.trace('1.1.1.1'), 0.05))
+
+    def test_ping(self) -> None:
+        """Assert pinged hops replay the statistics of any recording"""
+        trace = asyncio.run(
+            self.backend.ping(['192.168.1.254', '1.1.1.1', '4.4.4.4']))
+        self.assertEqual(trace['192.168.1.254'].average, 10.9)
+        self.assertEqual(trace['1.1.1.1'].loss, 0.0)
+        self.assertEqual(trace['4.4.4.4'].loss, 100.0)
+
+    def test_ping_failure_injected(self) -> None:
+        """Assert injected failures return no ping results"""
+        self.backend.failure_rate = 1
+        self.assertEqual(asyncio.run(self.backend.ping(['1.1.1.1'])), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the RingBuffer() class
+"""
+
+from array import array
+import os
+import tempfile
+import unittest
+
+from src.classes.ring_buffer import RingBuffer
+from src.classes.trace import Trace
+
+
+class TestRingBuffer(unittest.TestCase):
+    """
+    Unit Tests for the RingBuffer() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'ring.bin')
+        self.ring = RingBuffer(self.filename, 3, 2)
+        self.assertTrue(self.ring.open())
+        self.ips = array('I', [Trace.pack_ip('10.10.28.1'),
+                               Trace.pack_ip('1.1.1.1')])
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.ring.close()
+        self.directory.cleanup()
+        del self.directory
+        del self.filename
+        del self.ring
+        del self.ips
+        return super().tearDown()
+
+    def append(self, timestamp: float, received: float,
+               mean: float) -> None:
+        """Append a run where both hops were sent 4 probes"""
+        self.ring.append(
+            timestamp, self.ips, array('d', [4.0, 4.0]),
+            array('d', [4.0, received]), array('d', [1.0, mean]))
+
+    def test_file_size(self) -> None:
+        """Assert the file has a fixed size no matter how many runs"""
+        self.assertEqual(os.path.getsize(self.filename), self.ring.size)
+        for timestamp in range(10):
+            self.append(timestamp, 4.0, 10.0)
+        self.assertEqual(os.path.getsize(self.filename), self.ring.size)
+        self.assertEqual(len(self.ring), 3)
+
+    def test_window(self) -> None:
+        """Assert only the runs inside the window are merged"""
+        self.append(100, 4.0, 10.0)
+        self.append(160, 2.0, 20.0)
+        self.append(220, 0.0, 0.0)
+        stats = self.ring.window(60, 220)
+        self.assertEqual(stats['1.1.1.1'], {'loss': 100.0, 'average': 0.0})
+        stats = self.ring.window(300, 220)
+        self.assertEqual(stats['1.1.1.1'], {'loss': 50.0, 'average': 13.3})
+        self.assertEqual(stats['10.10.28.1'], {'loss': 0.0, 'average': 1.0})
+
+    def test_window_wraps(self) -> None:
+        """Assert overwritten runs are no longer merged"""
+        for timestamp in range(5):
+            self.append(timestamp, float(timestamp % 5), 10.0)
+        stats = self.ring.window(100, 4)
+        # Runs 2, 3 and 4 remain, with 9 of 12 replies
+        self.assertEqual(stats['1.1.1.1']['loss'], 25.0)
+
+    def test_max_hops(self) -> None:
+        """Assert runs only keep their first max_hops hops"""
+        self.ring.append(
+            10, array('I', [*self.ips, Trace.pack_ip('8.8.8.8')]),
+            array('d', [4.0] * 3), array('d', [4.0] * 3),
+            array('d', [1.0] * 3))
+        self.assertEqual(
+            sorted(self.ring.window(60, 10)), ['1.1.1.1', '10.10.28.1'])
+
+    def test_reopen(self) -> None:
+        """Assert runs survive reopening the file"""
+        self.append(100, 4.0, 10.0)
+        self.ring.close()
+        ring = RingBuffer(self.filename, 3, 2)
+        self.assertTrue(ring.open())
+        self.assertEqual(len(ring), 1)
+        self.assertEqual(ring.window(60, 120)['1.1.1.1']['average'], 10.0)
+        ring.close()
+
+    def test_reopen_different_size(self) -> None:
+        """Assert a file with a different geometry is started over"""
+        self.append(100, 4.0, 10.0)
+        self.ring.close()
+        with RingBuffer(self.filename, 5, 2) as ring:
+            self.assertEqual(len(ring), 0)
+            self.assertEqual(os.path.getsize(self.filename), ring.size)
+
+    def test_invalid_size(self) -> None:
+        """Assert raise ValueError when runs or max_hops is not positive"""
+        with self.assertRaises(ValueError):
+            RingBuffer(self.filename, 0, 2)
+        with self.assertRaises(ValueError):
+            RingBuffer(self.filename, 2, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the RouteCache() class
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from src.classes.hop import Hop
+from src.classes.route_cache import RouteCache
+from src.classes.trace import Trace
+
+
+class TestRouteCache(unittest.TestCase):
+    """
+    Unit Tests for the RouteCache() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'routes.json')
+        self.cache = RouteCache(self.filename, 900)
+        self.cache.store('1.1.1.1', [
+            (1, '10.10.28.1'), (3, '???'), (2, '192.168.1.254'),
+            (4, '1.1.1.1')])
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.filename
+        del self.cache
+        return super().tearDown()
+
+    def test_store_skips_unknown_hops(self) -> None:
+        """Assert only hops that answered are cached, in hop order"""
+        self.assertEqual(
+            self.cache.hosts('1.1.1.1'),
+            ['10.10.28.1', '192.168.1.254', '1.1.1.1'])
+
+    def test_numbered_hosts(self) -> None:
+        """Assert the cached hops keep their hop numbers"""
+        self.assertEqual(
+            self.cache.numbered_hosts('1.1.1.1'),
+            [(1, '10.10.28.1'), (2, '192.168.1.254'), (4, '1.1.1.1')])
+        del self.cache.routes['1.1.1.1']['ttls']
+        self.assertEqual(
+            self.cache.numbered_hosts('1.1.1.1')[-1], (3, '1.1.1.1'))
+
+    def test_is_fresh(self) -> None:
+        """Assert a route is fresh until its ttl expires"""
+        self.assertTrue(self.cache.is_fresh('1.1.1.1'))
+        self.assertFalse(self.cache.is_fresh('8.8.8.8'))
+        self.cache.routes['1.1.1.1']['discovered_at'] = time.time() - 901
+        self.assertFalse(self.cache.is_fresh('1.1.1.1'))
+
+    def test_has_changed(self) -> None:
+        """Assert a route changed once a cached hop stops answering"""
+        trace = Trace()
+        for host in self.cache.hosts('1.1.1.1'):
+            trace.add(Hop(host))
+        self.assertFalse(self.cache.has_changed('1.1.1.1', trace))
+        trace.put('192.168.1.254', 100.0, 4, 0.0, 0.0, 0.0, 0.0, 0.0)
+        self.assertTrue(self.cache.has_changed('1.1.1.1', trace))
+        trace = trace.subset(['10.10.28.1', '1.1.1.1'])
+        self.assertTrue(self.cache.has_changed('1.1.1.1', trace))
+
+    def test_save_and_load(self) -> None:
+        """Assert the cache survives a round trip through its file"""
+        self.assertTrue(self.cache.save())
+        cache = RouteCache(self.filename, 900)
+        self.assertTrue(cache.load())
+        self.assertEqual(cache.routes, self.cache.routes)
+
+    def test_load_missing_file(self) -> None:
+        """Assert a missing cache file is not an error"""
+        cache = RouteCache(os.path.join(self.directory.name, 'missing'), 900)
+        self.assertTrue(cache.load())
+        self.assertEqual(cache.routes, {})
+
+    def test_load_invalid_file(self) -> None:
+        """Assert an invalid cache file is reported"""
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            file.write('not json')
+        self.assertFalse(self.cache.load())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the SeriesLimiter() class
+"""
+
+import unittest
+
+from src.classes.series_limiter import SeriesLimiter
+from src.classes.trace import Trace
+
+
+class TestSeriesLimiter(unittest.TestCase):
+    """
+    Unit Tests for the SeriesLimiter() class
+    """
+
+    def setUp(self) -> None:
+        self.first = Trace()
+        self.first.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+        self.first.append('100.64.0.1', 50.0, 4, 9.1, 9.0, 8.8, 9.3, 0.2)
+        self.first.append('1.1.1.1', 25.0, 4, 12.1, 13.0, 11.8, 15.2, 1.5)
+        self.second = Trace()
+        self.second.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+        self.second.append('8.8.8.8', 0.0, 4, 20.1, 20.0, 19.8, 20.2, 0.1)
+        self.merged = self.first.copy()
+        self.merged.update(self.second)
+        self.costs = dict.fromkeys(self.merged, 7)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.first
+        del self.second
+        del self.merged
+        del self.costs
+        return super().tearDown()
+
+    def test_no_limits(self) -> None:
+        """Assert every hop is kept without limits"""
+        limiter = SeriesLimiter()
+        limiter.add(self.first)
+        limiter.add(self.second)
+        self.assertEqual(
+            limiter.select(self.merged, self.costs), set(self.costs))
+        self.assertEqual(limiter.dropped, {'top_hops': 0, 'max_series': 0})
+
+    def test_top_hops(self) -> None:
+        """Assert hops outside the top of every trace are dropped"""
+        limiter = SeriesLimiter(top_hops=1)
+        limiter.add(self.first)
+        limiter.add(self.second)
+        self.assertEqual(
+            limiter.select(self.merged, self.costs),
+            {'100.64.0.1', '10.10.28.1'})
+        self.assertEqual(limiter.dropped['top_hops'], 14)
+
+    def test_top_hops_by_average(self) -> None:
+        """Assert the top hops can be chosen by latency"""
+        limiter = SeriesLimiter(top_hops=1, rank_by='average')
+        limiter.add(self.first)
+        limiter.add(self.second)
+        self.assertEqual(
+            limiter.select(self.merged, self.costs), {'1.1.1.1', '8.8.8.8'})
+
+    def test_top_hops_keeps_unseen(self) -> None:
+        """Assert hops that are not in the run are not dropped by top_hops"""
+        limiter = SeriesLimiter(top_hops=1)
+        limiter.add(self.first)
+        self.costs['9.9.9.9'] = 14
+        self.assertIn('9.9.9.9', limiter.select(self.merged, self.costs))
+
+    def test_max_series(self) -> None:
+        """Assert the lowest ranked hops are dropped to fit max_series"""
+        limiter = SeriesLimiter(max_series=16)
+        limiter.add(self.first)
+        limiter.add(self.second)
+        self.assertEqual(
+            limiter.select(self.merged, self.costs, fixed=2),
+            {'100.64.0.1', '1.1.1.1'})
+        self.assertEqual(limiter.dropped['max_series'], 14)
+
+    def test_max_series_skips_expensive_hops(self) -> None:
+        """Assert a hop that does not fit does not drop cheaper hops"""
+        limiter = SeriesLimiter(max_series=16)
+        self.costs['100.64.0.1'] = 20
+        self.assertEqual(
+            limiter.select(self.merged, self.costs, fixed=2),
+            {'1.1.1.1', '10.10.28.1'})
+        self.assertEqual(limiter.dropped['max_series'], 27)
+
+    def test_invalid_rank_by(self) -> None:
+        """Assert raise ValueError on an unsupported statistic"""
+        with self.assertRaises(ValueError):
+            SeriesLimiter(rank_by='stdev')
+
+
+if __name__ == '__main__':
+    unittest.main()
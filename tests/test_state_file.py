@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the StateFile() class
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.classes.state_file import StateFile
+
+
+class TestStateFile(unittest.TestCase):
+    """
+    Unit Tests for the StateFile() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'state.json')
+        self.state = StateFile(self.filename)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.filename
+        del self.state
+        return super().tearDown()
+
+    def write(self, content: str) -> None:
+        """Write the state file by hand"""
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    def test_save_and_load(self) -> None:
+        """Assert the state survives a save and a load"""
+        self.assertTrue(self.state.save({'routes': {'1.1.1.1': [1, 2]}}))
+        self.assertEqual(StateFile(self.filename).load(),
+                         {'routes': {'1.1.1.1': [1, 2]}})
+        self.assertEqual(os.listdir(self.directory.name), ['state.json'])
+
+    def test_load_missing_file(self) -> None:
+        """Assert a missing state file loads as empty state"""
+        self.assertEqual(self.state.load(), {})
+
+    def test_load_invalid_file(self) -> None:
+        """Assert a file that is not a JSON object fails to load"""
+        for content in ('{"routes": ', '[1, 2]'):
+            with self.subTest(content=content):
+                self.write(content)
+                self.assertIsNone(self.state.load())
+
+    def test_save_failed(self) -> None:
+        """Assert a state file that cannot be written fails to save"""
+        state = StateFile(os.path.join(self.filename, 'missing', 'a.json'))
+        self.assertFalse(state.save({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
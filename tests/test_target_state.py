@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the TargetState() class
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.classes.target_state import TargetState
+
+
+class TestTargetState(unittest.TestCase):
+    """
+    Unit Tests for the TargetState() class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'state.json')
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        del self.directory
+        del self.filename
+        return super().tearDown()
+
+    def test_load_missing_file(self) -> None:
+        """Assert a missing state file loads as empty state"""
+        state = TargetState(self.filename)
+        self.assertTrue(state.load())
+        self.assertEqual(state.last_success, {})
+
+    def test_load_invalid_file(self) -> None:
+        """Assert an invalid state file fails to load"""
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            file.write('not json')
+        state = TargetState(self.filename)
+        self.assertFalse(state.load())
+
+    def test_save_and_load(self) -> None:
+        """Assert recorded successes survive between runs"""
+        state = TargetState(self.filename)
+        state.record_success('1.1.1.1', 1737668885.0)
+        self.assertTrue(state.save())
+
+        state = TargetState(self.filename)
+        self.assertTrue(state.load())
+        self.assertEqual(state.last_success, {'1.1.1.1': 1737668885.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the TokenBucket() class
+"""
+
+import asyncio
+import time
+import unittest
+
+from src.classes.token_bucket import TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """
+    Unit Tests for the TokenBucket() class
+    """
+
+    def test_invalid_rate(self) -> None:
+        """Assert raise ValueError when the rate is not positive"""
+        with self.assertRaises(ValueError):
+            TokenBucket(0, 10)
+
+    def test_invalid_capacity(self) -> None:
+        """Assert raise ValueError when the capacity is not positive"""
+        with self.assertRaises(ValueError):
+            TokenBucket(10, 0)
+
+    def test_acquire_within_capacity(self) -> None:
+        """Assert a full bucket hands out tokens without waiting"""
+        bucket = TokenBucket(1, 10)
+        start = time.monotonic()
+        asyncio.run(bucket.acquire(10))
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertLess(bucket.tokens, 1)
+
+    def test_acquire_waits_for_refill(self) -> None:
+        """Assert an empty bucket waits for the rate to refill it"""
+        bucket = TokenBucket(100, 10)
+
+        async def drain() -> None:
+            await bucket.acquire(10)
+            await bucket.acquire(10)
+
+        start = time.monotonic()
+        asyncio.run(drain())
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_acquire_larger_than_capacity(self) -> None:
+        """Assert a request larger than the capacity does not hang"""
+        bucket = TokenBucket(100, 5)
+        asyncio.run(asyncio.wait_for(bucket.acquire(50), 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
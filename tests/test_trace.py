@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the Trace() class
+"""
+
+from array import array
+import unittest
+
+from src.classes.hop import Hop
+from src.classes.trace import Trace
+
+
+class TestTrace(unittest.TestCase):
+    """
+    Unit Tests for the Trace() class
+    """
+
+    def setUp(self) -> None:
+        self.trace = Trace()
+        self.trace.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+        self.trace.append('1.1.1.1', 25.0, 4, 12.1, 13.0, 11.8, 15.2, 1.5)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.trace
+        return super().tearDown()
+
+    def test_pack_ip(self) -> None:
+        """Assert IP Addresses round trip through 32-bit integers"""
+        self.assertEqual(Trace.pack_ip('10.10.28.1'), 0x0A0A1C01)
+        self.assertEqual(Trace.unpack_ip(0x0A0A1C01), '10.10.28.1')
+
+    def test_pack_invalid_ip(self) -> None:
+        """Assert raise ValueError when the IP is not IPv4"""
+        for ip in ('???', 'fe80::1', '300.1.1.1'):
+            with self.subTest(ip=ip), self.assertRaises(ValueError):
+                Trace.pack_ip(ip)
+
+    def test_mapping(self) -> None:
+        """Assert a trace reads like a dictionary of hops in hop order"""
+        self.assertEqual(list(self.trace), ['10.10.28.1', '1.1.1.1'])
+        self.assertEqual(len(self.trace), 2)
+        self.assertIn('1.1.1.1', self.trace)
+        self.assertNotIn('8.8.8.8', self.trace)
+        self.assertNotIn('???', self.trace)
+        self.assertEqual(self.trace['1.1.1.1'].loss, 25.0)
+        self.assertEqual(
+            self.trace['10.10.28.1'],
+            Hop('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6))
+
+    def test_put_replaces(self) -> None:
+        """Assert put() replaces the row of an IP already present"""
+        self.trace.put('1.1.1.1', 0.0, 4, 1.0, 1.0, 1.0, 1.0, 0.0)
+        self.trace.put('8.8.8.8', 0.0, 4, 2.0, 2.0, 2.0, 2.0, 0.0)
+        self.assertEqual(len(self.trace), 3)
+        self.assertEqual(self.trace['1.1.1.1'].average, 1.0)
+        self.assertEqual(self.trace['8.8.8.8'].average, 2.0)
+
+    def test_extend_keeps_every_row(self) -> None:
+        """Assert combining traces keeps a row per trace for each IP"""
+        combined = self.trace.copy()
+        combined.extend(self.trace)
+        self.assertEqual(len(combined), 4)
+        self.assertEqual(
+            [hop.ip for hop in combined.hops()],
+            ['10.10.28.1', '1.1.1.1', '10.10.28.1', '1.1.1.1'])
+        self.assertEqual(combined['1.1.1.1'], self.trace['1.1.1.1'])
+
+    def test_update(self) -> None:
+        """Assert update() merges like dict.update()"""
+        other = Trace()
+        other.append('1.1.1.1', 0.0, 4, 1.0, 1.0, 1.0, 1.0, 0.0)
+        other.append('8.8.8.8', 0.0, 4, 2.0, 2.0, 2.0, 2.0, 0.0)
+        self.trace.update(other)
+        self.assertEqual(
+            list(self.trace), ['10.10.28.1', '1.1.1.1', '8.8.8.8'])
+        self.assertEqual(self.trace['1.1.1.1'].loss, 0.0)
+
+    def test_subset(self) -> None:
+        """Assert subset() keeps the hops present, in the order given"""
+        subset = self.trace.subset(['1.1.1.1', '8.8.8.8', '10.10.28.1'])
+        self.assertEqual(list(subset), ['1.1.1.1', '10.10.28.1'])
+
+    def test_ttls(self) -> None:
+        """Assert rows are numbered by TTL, skipping unanswered hops"""
+        self.assertEqual([self.trace.ttl(row) for row in range(2)], [1, 2])
+        self.trace.set_ttls([(1, '10.10.28.1'), (2, '???'), (3, '1.1.1.1'),
+                             (4, '1.1.1.1')])
+        self.assertEqual([self.trace.ttl(row) for row in range(2)], [1, 3])
+
+        tail = Trace()
+        tail.append('8.8.8.8', 0.0, 4, 2.0, 2.0, 2.0, 2.0, 0.0)
+        tail.set_ttls([(5, '8.8.8.8')])
+        copy = self.trace.copy()
+        copy.update(tail)
+        self.assertEqual([copy.ttl(row) for row in range(3)], [1, 3, 5])
+        subset = copy.subset(['8.8.8.8', '1.1.1.1'])
+        self.assertEqual([subset.ttl(row) for row in range(2)], [5, 3])
+
+    def test_samples_follow_hops(self) -> None:
+        """Assert samples are carried by extend(), update() and subset()"""
+        self.trace.samples['1.1.1.1'] = array('d', [12.1, 13.9])
+        combined = self.trace.copy()
+        combined.extend(self.trace)
+        self.assertEqual(
+            list(combined.samples['1.1.1.1']), [12.1, 13.9, 12.1, 13.9])
+        subset = self.trace.subset(['1.1.1.1'])
+        self.assertEqual(list(subset.samples['1.1.1.1']), [12.1, 13.9])
+        subset.samples['1.1.1.1'].append(1.0)
+        self.assertEqual(len(self.trace.samples['1.1.1.1']), 2)
+
+    def test_to_dict(self) -> None:
+        """Assert a trace converts to the dictionary the parsers produced"""
+        self.assertEqual(self.trace.to_dict()['10.10.28.1'], {
+            'loss': 0.0, 'sent': 4, 'last': 5.8, 'average': 11.9,
+            'best': 5.8, 'worst': 16.8, 'stdev': 5.6
+        })
+
+    def test_equal_to_dict(self) -> None:
+        """Assert an empty trace equals an empty dictionary"""
+        self.assertEqual(Trace(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
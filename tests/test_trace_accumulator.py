@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the TraceAccumulator() class
+"""
+
+import random
+import unittest
+from unittest.mock import patch
+
+from src.classes.raw_trace import RawTrace
+from src.classes.trace import Trace
+from src.classes.trace_accumulator import TraceAccumulator
+
+
+def summarise(samples: list, sent: int) -> Trace:
+    """Summarise round-trip times the way a trace would"""
+    raw_trace = RawTrace()
+    raw_trace.add_host(1, '10.10.28.1')
+    for _ in range(sent):
+        raw_trace.add_transmit(1)
+    for rtt in samples:
+        raw_trace.add_ping(1, rtt)
+    return raw_trace.to_trace(sent)
+
+
+class TestTraceAccumulator(unittest.TestCase):
+    """
+    Unit Tests for the TraceAccumulator() class
+    """
+
+    def setUp(self) -> None:
+        self.accumulator = TraceAccumulator()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.accumulator
+        return super().tearDown()
+
+    def test_merge_matches_all_samples(self) -> None:
+        """Assert merged traces match one trace over every reply"""
+        rand = random.Random(1)
+        runs = []
+        for _ in range(20):
+            sent = rand.randint(1, 10)
+            received = rand.randint(0, sent)
+            runs.append(
+                ([rand.uniform(1, 100) for _ in range(received)], sent))
+        for samples, sent in runs:
+            self.accumulator.add(summarise(samples, sent))
+
+        merged = self.accumulator.to_trace()['10.10.28.1']
+        expected = summarise(
+            [rtt for samples, _ in runs for rtt in samples],
+            sum(sent for _, sent in runs))['10.10.28.1']
+        self.assertEqual(merged.sent, expected.sent)
+        self.assertEqual(round(merged.loss, 1), expected.loss)
+        self.assertAlmostEqual(merged.average, expected.average)
+        self.assertAlmostEqual(merged.stdev, expected.stdev)
+        self.assertEqual(merged.best, expected.best)
+        self.assertEqual(merged.worst, expected.worst)
+        self.assertEqual(merged.last, runs[-1][0][-1])
+
+    def test_unique_hops(self) -> None:
+        """Assert one row is kept per hop, in the order first seen"""
+        for _ in range(3):
+            trace = Trace()
+            trace.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+            trace.append('1.1.1.1', 0.0, 4, 12.1, 13.0, 11.8, 15.2, 1.5)
+            self.accumulator.add(trace)
+        self.assertEqual(len(self.accumulator), 2)
+        self.assertEqual(
+            list(self.accumulator.to_trace()), ['10.10.28.1', '1.1.1.1'])
+
+    def test_shared_hops(self) -> None:
+        """Assert hops shared by every target are merged once"""
+        for target in ('1.1.1.1', '8.8.8.8'):
+            trace = Trace()
+            trace.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+            trace.append(target, 0.0, 4, 12.1, 13.0, 11.8, 15.2, 1.5)
+            trace.shared = frozenset([Trace.pack_ip('10.10.28.1')])
+            self.accumulator.add(trace)
+        merged = self.accumulator.to_trace()
+        self.assertEqual(merged['10.10.28.1'].sent, 4)
+        self.assertEqual(merged['10.10.28.1'].average, 11.9)
+        self.assertEqual(merged['8.8.8.8'].sent, 4)
+
+    def test_hop_never_answered(self) -> None:
+        """Assert a hop without replies reports full loss and no times"""
+        trace = Trace()
+        trace.append('10.10.28.1', 100.0, 4, 0.0, 0.0, 0.0, 0.0, 0.0)
+        self.accumulator.add(trace)
+        self.accumulator.add(trace)
+        hop = self.accumulator.to_trace()['10.10.28.1']
+        self.assertEqual((hop.loss, hop.sent), (100.0, 8))
+        self.assertEqual((hop.best, hop.worst, hop.stdev), (0.0, 0.0, 0.0))
+
+    def traces(self) -> list:
+        """Build traces over overlapping hops, some of them shared"""
+        rand = random.Random(2)
+        hosts = [f'10.0.0.{host}' for host in range(1, 41)]
+        traces = []
+        for index in range(50):
+            trace = Trace()
+            for host in hosts[:2] + rand.sample(hosts[2:], 8):
+                average = rand.uniform(1, 50)
+                trace.append(
+                    host, rand.choice([0.0, 25.0, 50.0, 100.0]), 4,
+                    average + 1, average, average - 1, average + 2,
+                    rand.uniform(0, 3))
+            if index % 2:
+                trace.shared = frozenset(trace.ips[:2])
+            traces.append(trace)
+        return traces
+
+    def assert_merged(self, expected: Trace, merged: Trace) -> None:
+        """Assert two merged traces hold the same rows"""
+        self.assertEqual(list(merged), list(expected))
+        for name in Trace.STATS:
+            for value, other in zip(getattr(merged, name),
+                                    getattr(expected, name)):
+                self.assertAlmostEqual(value, other, places=9)
+
+    def test_add_many(self) -> None:
+        """Assert a batch merges the same as every trace in turn"""
+        traces = self.traces()
+        for trace in traces:
+            self.accumulator.add(trace)
+        batched = TraceAccumulator()
+        batched.add_many(traces[:5])
+        batched.add_many(traces[5:])
+        self.assert_merged(self.accumulator.to_trace(), batched.to_trace())
+        self.assertEqual(batched._shared, self.accumulator._shared)
+
+    def test_add_many_shared_hops(self) -> None:
+        """Assert shared hops are merged once across batches"""
+        trace = Trace()
+        trace.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+        trace.shared = frozenset(trace.ips)
+        unshared = Trace()
+        unshared.append('10.10.28.1', 0.0, 4, 5.8, 11.9, 5.8, 16.8, 5.6)
+        self.accumulator.add_many([trace, trace])
+        self.accumulator.add_many([trace, unshared, Trace()])
+        self.assertEqual(self.accumulator.to_trace()['10.10.28.1'].sent, 8)
+
+    @patch('src.classes.trace_accumulator.np', None)
+    def test_add_many_without_numpy(self) -> None:
+        """Assert a batch is merged one trace at a time without NumPy"""
+        traces = self.traces()
+        for trace in traces:
+            self.accumulator.add(trace)
+        batched = TraceAccumulator()
+        batched.add_many(traces)
+        self.assertEqual(batched.to_trace(), self.accumulator.to_trace())
+
+    def test_to_trace_rounded(self) -> None:
+        """Assert statistics are rounded when asked"""
+        self.accumulator.add(summarise([1.0, 2.0], 3))
+        hop = self.accumulator.to_trace(1)['10.10.28.1']
+        self.assertEqual(hop.loss, 33.3)
+        self.assertEqual(hop.stdev, 0.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
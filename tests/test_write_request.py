@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit Tests for the WriteRequest() class
+"""
+
+import struct
+import unittest
+
+from src.classes.write_request import WriteRequest
+
+
+def read_varint(data: bytes, offset: int) -> tuple:
+    """Decode a varint and return it with the offset after it"""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def read_fields(data: bytes) -> list:
+    """Decode the fields of a message as (field number, value) pairs"""
+    fields = []
+    offset = 0
+    while offset < len(data):
+        key, offset = read_varint(data, offset)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, offset = read_varint(data, offset)
+        elif wire_type == 1:
+            value = struct.unpack_from('<d', data, offset)[0]
+            offset += 8
+        else:
+            length, offset = read_varint(data, offset)
+            value = data[offset:offset + length]
+            offset += length
+        fields.append((number, value))
+    return fields
+
+
+def decode(data: bytes) -> list:
+    """Decode a WriteRequest into (labels, value, timestamp) tuples"""
+    series = []
+    for _, timeseries in read_fields(data):
+        labels = []
+        samples = []
+        for number, value in read_fields(timeseries):
+            if number == 1:
+                label = dict(read_fields(value))
+                labels.append((label[1].decode(), label[2].decode()))
+            else:
+                samples.append(dict(read_fields(value)))
+        for sample in samples:
+            series.append((labels, sample[1], sample[2]))
+    return series
+
+
+class TestWriteRequest(unittest.TestCase):
+    """
+    Unit Tests for the WriteRequest() class
+    """
+
+    def setUp(self) -> None:
+        self.request = WriteRequest()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        del self.request
+        return super().tearDown()
+
+    def test_varint(self) -> None:
+        """Assert integers are encoded 7 bits at a time"""
+        for value, encoded in ((0, b'\x00'), (1, b'\x01'),
+                               (300, b'\xac\x02'),
+                               (1700000000000, b'\x80\xd0\x95\xff\xbc1')):
+            with self.subTest(value=value):
+                self.assertEqual(WriteRequest.varint(value), encoded)
+
+    def test_empty(self) -> None:
+        """Assert an empty request encodes to nothing"""
+        self.assertEqual(len(self.request), 0)
+        self.assertEqual(self.request.encode(), b'')
+
+    def test_encode(self) -> None:
+        """Assert series are encoded with sorted labels and one sample"""
+        self.request.add(
+            'ping_stats', {'stat': 'loss', 'ip_addr': '1.1.1.1'}, 12.5,
+            1700000000.25)
+        self.request.add(
+            'ping_stats', {'stat': 'sent', 'ip_addr': '1.1.1.1'}, 10, 1.0)
+        self.assertEqual(len(self.request), 2)
+        self.assertEqual(decode(self.request.encode()), [
+            ([('__name__', 'ping_stats'), ('ip_addr', '1.1.1.1'),
+              ('stat', 'loss')], 12.5, 1700000000250),
+            ([('__name__', 'ping_stats'), ('ip_addr', '1.1.1.1'),
+              ('stat', 'sent')], 10.0, 1000)
+        ])
+
+    def test_known_bytes(self) -> None:
+        """Assert the encoding matches the protobuf wire format"""
+        self.request.add('up', {}, 1.0, 0.001)
+        self.assertEqual(
+            self.request.encode(),
+            b'\x0a\x1d'
+            b'\x0a\x0e\x0a\x08__name__\x12\x02up'
+            b'\x12\x0b\x09' + struct.pack('<d', 1.0) + b'\x10\x01')
+
+
+if __name__ == '__main__':
+    unittest.main()